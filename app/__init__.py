@@ -15,7 +15,15 @@ def create_app(config_class=Config):
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, render_as_batch=True)
+
+    # Per-request SQL counts, timing and N+1 warnings
+    from app.services.query_stats import init_query_stats
+    init_query_stats(app)
+
+    # JSON encoding for jsonify and API responses (orjson when installed)
+    from app.services.serializer import init_serializer
+    init_serializer(app)
 
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
@@ -34,7 +42,7 @@ def create_app(config_class=Config):
     app.register_blueprint(student_bp)
 
     # Import models (required for table creation)
-    from app.models import user, subject, topic, enrollment, topic_progress, course, department, academic_year, comment, resource, notification, activity_log, report_cache
+    from app.models import user, subject, topic, enrollment, topic_progress, course, department, academic_year, comment, resource, notification, activity_log, report_cache, change_log
 
     # Create tables if they don't exist (for production deployment)
     with app.app_context():
@@ -44,4 +52,9 @@ def create_app(config_class=Config):
         except Exception as e:
             app.logger.error(f"Database initialization error: {e}")
 
+    # Background purge of expired report cache rows
+    if not app.testing:
+        from app.services.report_cache import start_purge_thread
+        start_purge_thread(app)
+
     return app
@@ -1,8 +1,9 @@
-from flask import jsonify, request, make_response
+from flask import abort, current_app, jsonify, request, make_response
 from flask_login import login_required
 from app.blueprints.auth.decorators import role_required
 from . import api_bp
 from app import db
+from app.services.analytics import invalidate_dashboard_reports
 
 
 
@@ -11,23 +12,47 @@ def health():
     return jsonify({'status': 'ok'}), 200
 
 
+@api_bp.route('/batch', methods=['POST'])
+@login_required
+def batch():
+    """Run ``{"operations": [{"method", "path", "body"}, ...], "atomic": bool}`` in order."""
+    from app.services.batch import BatchError, parse_batch, run_batch
+    try:
+        operations, atomic = parse_batch(request.get_json(silent=True),
+                                         current_app.config.get('BATCH_MAX_OPERATIONS', 50))
+    except BatchError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(run_batch(operations, atomic=atomic))
+
+
+@api_bp.route('/changes', methods=['GET'])
+@login_required
+def changes():
+    """Changes after ``since`` to subjects, topics, enrollments and progress (see app/services/sync.py)."""
+    from flask_login import current_user
+    from app.services.sync import CursorExpired, SyncError, changes_since
+    try:
+        page = changes_since(request.args, current_user)
+    except CursorExpired as e:
+        return jsonify({'error': str(e)}), 410
+    except SyncError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(page)
+
+
 @api_bp.route('/coordinator/subjects', methods=['GET'])
 @login_required
 @role_required('coordinator')
 def coordinator_list_subjects():
-    from app.models import Subject, User
-    subjects = Subject.query.order_by(Subject.code.asc()).all()
-    data = []
-    for s in subjects:
-        data.append({
-            'id': s.id,
-            'name': s.name,
-            'code': s.code,
-            'teacher_id': s.teacher_id,
-            'teacher_name': s.teacher.name if s.teacher_id else None,
-            'is_active': s.is_active
-        })
-    return jsonify({'subjects': data})
+    from app.services.fieldsets import SUBJECT_FIELDSET, FieldsetError
+    from app.services.listings import list_subjects
+    from app.services.pagination import PaginationError
+    try:
+        # fields= / include= pick the columns and embedded resources (teacher, counts)
+        page = list_subjects(request.args, projection=SUBJECT_FIELDSET.project(request.args))
+    except (FieldsetError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'subjects': page['items'], 'next_cursor': page['next_cursor'], 'sort': page['sort'], 'dir': page['dir']})
 
 
 @api_bp.route('/coordinator/subjects', methods=['POST'])
@@ -53,6 +78,7 @@ def coordinator_create_subject():
         subject.credits = credits
 
     db.session.add(subject)
+    invalidate_dashboard_reports()
     db.session.commit()
 
     return jsonify({'id': subject.id, 'name': subject.name, 'code': subject.code}), 201
@@ -63,17 +89,24 @@ def coordinator_create_subject():
 @role_required('coordinator')
 def coordinator_add_topic(subject_id):
     from app.models import Subject, Topic
+    from app.services.topics import ORDER_GAP, TopicBulkError, last_order_key, lock_topic_order
     from datetime import datetime
     payload = request.get_json(silent=True) or {}
+    # {"topics": [...]} creates many topics in one transaction
+    if 'topics' in payload:
+        return _create_topics_batch(subject_id, payload['topics'])
     name = (payload.get('name') or '').strip()
     expected_date = payload.get('expected_date')
     if not name:
         return jsonify({'error': 'Missing topic name'}), 400
 
     subject = Subject.query.get_or_404(subject_id)
-    # Determine next order
-    last = subject.topics.order_by(Topic.order.desc()).first()
-    next_order = (last.order + 1) if last else 1
+    try:
+        lock_topic_order(subject.id)
+    except TopicBulkError as e:
+        return _topic_bulk_error(e)
+    # Append after the current last topic, leaving a gap for later moves
+    next_order = last_order_key(subject.id) + ORDER_GAP
 
     topic = Topic(subject_id=subject.id, name=name, order=next_order)
     if expected_date:
@@ -83,34 +116,78 @@ def coordinator_add_topic(subject_id):
             return jsonify({'error': 'expected_date must be YYYY-MM-DD'}), 400
 
     db.session.add(topic)
+    invalidate_dashboard_reports()
     db.session.commit()
 
     return jsonify({'id': topic.id, 'name': topic.name, 'order': topic.order}), 201
 
 
+def _topic_bulk_error(e):
+    db.session.rollback()
+    body = {'error': str(e)}
+    if e.errors:
+        body['errors'] = e.errors
+    return jsonify(body), e.status
+
+
+def _create_topics_batch(subject_id, items):
+    from app.models import Subject
+    from app.services.topics import TopicBulkError, create_topics
+    Subject.query.get_or_404(subject_id)
+    try:
+        created = create_topics(subject_id, items)
+    except TopicBulkError as e:
+        return _topic_bulk_error(e)
+    db.session.commit()
+    return jsonify({'topics': created}), 201
+
+
+@api_bp.route('/coordinator/subjects/<int:subject_id>/topics', methods=['PATCH'])
+@login_required
+@role_required('coordinator')
+def coordinator_update_topics(subject_id):
+    """Patch many topics of a subject: ``{"topics": [{"id": 1, "name": ...}, ...]}``."""
+    from app.models import Subject
+    from app.services.topics import TopicBulkError, update_topics
+    Subject.query.get_or_404(subject_id)
+    payload = request.get_json(silent=True) or {}
+    try:
+        updated = update_topics(subject_id, payload.get('topics'))
+    except TopicBulkError as e:
+        return _topic_bulk_error(e)
+    db.session.commit()
+    return jsonify({'topics': updated})
+
+
 @api_bp.route('/coordinator/subjects/<int:subject_id>/topics', methods=['GET'])
 @login_required
 @role_required('coordinator')
 def coordinator_list_topics(subject_id):
-    from app.models import Subject, Topic
-    subject = Subject.query.get_or_404(subject_id)
-    topics = subject.topics.order_by(Topic.order.asc()).all()
+    from app.models import Subject, Topic, User
+    from app.services.fieldsets import SUBJECT_FIELDSET, TOPIC_FIELDSET, FieldsetError
+    from app.services.read_models import select_rows
+    try:
+        # fields= applies to the topics, include= to the subject
+        header = SUBJECT_FIELDSET.project({'fields': 'name,code', 'include': request.args.get('include')},
+                                          prefix='subject__')
+        topics = TOPIC_FIELDSET.project({'fields': request.args.get('fields')})
+    except FieldsetError as e:
+        return jsonify({'error': str(e)}), 400
+    # One query: the subject header repeats on each topic row, and the outer
+    # join still yields it (with a NULL topic) for a subject without topics
+    rows = (
+        select_rows(header.columns + topics.columns, Subject)
+        .outerjoin(User, Subject.teacher_id == User.id)
+        .outerjoin(Topic, Topic.subject_id == Subject.id)
+        .filter(Subject.id == subject_id)
+        .order_by(Topic.order.asc())
+        .all()
+    )
+    if not rows:
+        abort(404)
     return jsonify({
-        'subject': {
-            'id': subject.id,
-            'name': subject.name,
-            'code': subject.code
-        },
-        'topics': [
-            {
-                'id': t.id,
-                'name': t.name,
-                'order': t.order,
-                'is_completed': t.is_completed,
-                'expected_date': t.expected_date.isoformat() if t.expected_date else None
-            }
-            for t in topics
-        ]
+        'subject': header.shape(rows[0]),
+        'topics': [topics.shape(row) for row in rows if row._mapping['id'] is not None],
     })
 
 
@@ -121,6 +198,7 @@ def coordinator_delete_topic(topic_id):
     from app.models import Topic
     topic = Topic.query.get_or_404(topic_id)
     db.session.delete(topic)
+    invalidate_dashboard_reports()
     db.session.commit()
     return jsonify({'status': 'deleted'})
 
@@ -149,53 +227,68 @@ def coordinator_update_topic(topic_id):
             except ValueError:
                 return jsonify({'error': 'expected_date must be YYYY-MM-DD'}), 400
     db.session.commit()
-    return jsonify({'id': topic.id, 'name': topic.name, 'expected_date': topic.expected_date.isoformat() if topic.expected_date else None})
+    return jsonify({'id': topic.id, 'name': topic.name, 'expected_date': topic.expected_date})
 
 
 @api_bp.route('/coordinator/subjects/<int:subject_id>/topics/reorder', methods=['POST'])
 @login_required
 @role_required('coordinator')
 def coordinator_reorder_topics(subject_id):
-    from app.models import Subject, Topic
+    from app.models import Subject
+    from app.services.topics import TopicBulkError, reorder_topics
     payload = request.get_json(silent=True) or {}
     order_list = payload.get('order')
     if not isinstance(order_list, list) or not all(isinstance(i, int) for i in order_list):
         return jsonify({'error': 'order must be a list of topic ids'}), 400
-    subject = Subject.query.get_or_404(subject_id)
-    # Fetch topics for subject to validate and update
-    topics = {t.id: t for t in subject.topics.all()}
-    if set(order_list) != set(topics.keys()):
-        return jsonify({'error': 'order list must match exactly the subject\'s topic ids'}), 400
-    for idx, tid in enumerate(order_list, start=1):
-        topics[tid].order = idx
-    db.session.commit()
+    Subject.query.get_or_404(subject_id)
+    try:
+        reorder_topics(subject_id, order_list)
+    except TopicBulkError as e:
+        return _topic_bulk_error(e)
     return jsonify({'status': 'ok'})
 
 
+@api_bp.route('/coordinator/topics/<int:topic_id>/move', methods=['POST'])
+@login_required
+@role_required('coordinator')
+def coordinator_move_topic(topic_id):
+    """Move a topic: ``{"after_id": A}`` puts it right after A, ``{"before_id": B}`` right before B.
+
+    Send both to mean "between A and B"; ``after_id`` wins if they are no
+    longer adjacent. Send neither (or ``after_id: null``) to move it first.
+    """
+    from app.services.topics import TopicBulkError, move_topic
+    payload = request.get_json(silent=True) or {}
+    after_id, before_id = payload.get('after_id'), payload.get('before_id')
+    for value in (after_id, before_id):
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            return jsonify({'error': 'after_id and before_id must be topic ids'}), 400
+    try:
+        result = move_topic(topic_id, after_id=after_id, before_id=before_id)
+    except TopicBulkError as e:
+        return _topic_bulk_error(e)
+    return jsonify({'status': 'ok', **result})
+
+
 @api_bp.route('/coordinator/subjects/<int:subject_id>/enrollments', methods=['GET'])
 @login_required
 @role_required('coordinator')
 def coordinator_list_enrollments(subject_id):
     from app.models import Subject, Enrollment, User
-    Subject.query.get_or_404(subject_id)
-    rows = (
-        db.session.query(Enrollment, User)
+    from app.services.export import stream_query
+    from app.services.read_models import ENROLLMENT_COLUMNS, EnrollmentRow, select_rows
+    from app.services.serializer import stream_json
+    if select_rows((Subject.id,)).filter(Subject.id == subject_id).first() is None:
+        abort(404)
+    query = (
+        select_rows(ENROLLMENT_COLUMNS, Enrollment)
         .join(User, Enrollment.student_id == User.id)
         .filter(Enrollment.subject_id == subject_id)
         .order_by(User.name.asc())
-        .all()
     )
-    data = [
-        {
-            'student_id': u.id,
-            'name': u.name,
-            'email': u.email,
-            'status': e.status,
-            'enrolled_at': e.enrolled_at.isoformat(),
-        }
-        for e, u in rows
-    ]
-    return jsonify({'enrollments': data})
+    # Rosters can be long: rows are encoded and sent in batches as they are read
+    fields = EnrollmentRow._fields
+    return stream_json('enrollments', (dict(zip(fields, row)) for row in stream_query(query)))
 
 
 @api_bp.route('/coordinator/subjects/<int:subject_id>/enrollments', methods=['POST'])
@@ -215,6 +308,7 @@ def coordinator_add_enrollment(subject_id):
     if existing:
         return jsonify({'status':'exists'}), 200
     db.session.add(Enrollment(subject_id=subject_id, student_id=user.id))
+    invalidate_dashboard_reports()
     db.session.commit()
     return jsonify({'status':'added', 'student_id': user.id})
 
@@ -223,34 +317,16 @@ def coordinator_add_enrollment(subject_id):
 @login_required
 @role_required('coordinator')
 def coordinator_upload_enrollments(subject_id):
-    from app.models import Subject, Enrollment, User
-    import csv, io
+    from app.models import Subject
+    from app.services.enrollment_import import import_enrollments_csv
     Subject.query.get_or_404(subject_id)
     f = request.files.get('file')
     if not f:
         return jsonify({'error':'file required'}), 400
-    content = f.read().decode('utf-8', errors='ignore')
-    reader = csv.reader(io.StringIO(content))
-    added = 0
-    skipped = 0
-    for row in reader:
-        if not row:
-            continue
-        email = row[0].strip().lower()
-        if not email:
-            continue
-        user = User.query.filter_by(email=email, is_active=True).first()
-        if not user or user.role != 'student':
-            skipped += 1
-            continue
-        exists = Enrollment.query.filter_by(subject_id=subject_id, student_id=user.id).first()
-        if exists:
-            skipped += 1
-            continue
-        db.session.add(Enrollment(subject_id=subject_id, student_id=user.id))
-        added += 1
+    include_rows = request.args.get('report', 'rows') != 'summary'
+    report = import_enrollments_csv(subject_id, f.stream, include_rows=include_rows)
     db.session.commit()
-    return jsonify({'status':'ok', 'added': added, 'skipped': skipped})
+    return jsonify({'status':'ok', **report})
 
 
 @api_bp.route('/coordinator/subjects/<int:subject_id>/enrollments/<int:student_id>', methods=['DELETE'])
@@ -260,10 +336,35 @@ def coordinator_delete_enrollment(subject_id, student_id):
     from app.models import Enrollment
     e = Enrollment.query.filter_by(subject_id=subject_id, student_id=student_id).first_or_404()
     db.session.delete(e)
+    invalidate_dashboard_reports()
     db.session.commit()
     return jsonify({'status':'deleted'})
 
 
+@api_bp.route('/coordinator/users', methods=['GET'])
+@login_required
+@role_required('coordinator')
+def coordinator_list_users():
+    from app.services.listings import list_users
+    from app.services.pagination import PaginationError
+    try:
+        page = list_users(request.args)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    data = [
+        {
+            'id': u.id,
+            'name': u.name,
+            'email': u.email,
+            'role': u.role,
+            'department': u.department,
+            'is_active': u.is_active,
+        }
+        for u in page['items']
+    ]
+    return jsonify({'users': data, 'next_cursor': page['next_cursor'], 'sort': page['sort'], 'dir': page['dir']})
+
+
 @api_bp.route('/coordinator/users', methods=['POST'])
 @login_required
 @role_required('coordinator')
@@ -285,6 +386,7 @@ def coordinator_create_user():
     # Set a temporary password; in production change flow to invite/reset
     user.set_password('changeme123')
     db.session.add(user)
+    invalidate_dashboard_reports()
     db.session.commit()
     return jsonify({'id': user.id, 'name': user.name, 'email': user.email, 'role': user.role}), 201
 
@@ -298,3 +400,62 @@ def coordinator_enrollment_template():
     resp.headers['Content-Type'] = 'text/csv'
     resp.headers['Content-Disposition'] = 'attachment; filename="enrollments_template.csv"'
     return resp
+
+
+def _export_format():
+    from app.services.export import EXPORT_FORMATS
+    fmt = request.args.get('format', 'csv').lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+@api_bp.route('/coordinator/subjects/<int:subject_id>/enrollments/export', methods=['GET'])
+@login_required
+@role_required('coordinator')
+def coordinator_export_enrollments(subject_id):
+    from app.models import Subject, Enrollment, User
+    from app.services.export import export_response, stream_query
+    fmt = _export_format()
+    if not fmt:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    subject = Subject.query.get_or_404(subject_id)
+    query = (
+        db.session.query(User.id, User.name, User.email, Enrollment.status, Enrollment.enrolled_at)
+        .join(User, Enrollment.student_id == User.id)
+        .filter(Enrollment.subject_id == subject_id)
+        .order_by(User.name.asc(), User.id.asc())
+    )
+    fields = ('student_id', 'name', 'email', 'status', 'enrolled_at')
+    return export_response(stream_query(query), fields, fmt, f'{subject.code}_enrollments')
+
+
+@api_bp.route('/coordinator/users/export', methods=['GET'])
+@login_required
+@role_required('coordinator')
+def coordinator_export_users():
+    from app.models import User
+    from app.services.export import export_response, stream_query
+    fmt = _export_format()
+    if not fmt:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    query = (
+        db.session.query(User.id, User.name, User.email, User.role, User.department,
+                         User.phone, User.is_active, User.created_at)
+        .order_by(User.id.asc())
+    )
+    fields = ('id', 'name', 'email', 'role', 'department', 'phone', 'is_active', 'created_at')
+    return export_response(stream_query(query), fields, fmt, 'users')
+
+
+@api_bp.route('/hod/reports/subjects/export', methods=['GET'])
+@login_required
+@role_required('hod')
+def hod_export_subject_report():
+    from flask_login import current_user
+    from app.services.analytics import DEPARTMENT_SUBJECT_EXPORT_FIELDS, department_subject_export_query
+    from app.services.export import export_response, stream_query
+    fmt = _export_format()
+    if not fmt:
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    query = department_subject_export_query(current_user.department)
+    filename = f'{current_user.department or "department"}_subject_report'
+    return export_response(stream_query(query), DEPARTMENT_SUBJECT_EXPORT_FIELDS, fmt, filename)
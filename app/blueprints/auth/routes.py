@@ -7,6 +7,7 @@ from .forms import LoginForm, RegistrationForm, RequestResetForm, ResetPasswordF
 from . import auth_bp
 from app.services.email import send_email
 from app.services.ratelimit import rate_limit
+from app.services.analytics import invalidate_dashboard_reports
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
@@ -99,6 +100,7 @@ def reset_password(token):
 
 @auth_bp.route('/change-password', methods=['GET', 'POST'])
 @login_required
+@rate_limit(limit=5, window_seconds=300, per='user')
 def change_password():
     form = ChangePasswordForm()
     if form.validate_on_submit():
@@ -131,6 +133,7 @@ def register():
         )
         user.set_password(form.password.data)
         db.session.add(user)
+        invalidate_dashboard_reports()
         db.session.commit()
         flash('Congratulations, you are now a registered user!', 'success')
         return redirect(url_for('auth.login'))
@@ -1,6 +1,7 @@
-from flask import render_template, request, url_for, current_app
+from flask import render_template, request, url_for, current_app, abort
 from flask_login import login_required, current_user
 from app.blueprints.auth.decorators import role_required
+from app.services.analytics import invalidate_dashboard_reports
 from datetime import datetime, timedelta
 from . import dashboard_bp
 
@@ -9,19 +10,23 @@ from . import dashboard_bp
 @login_required
 @role_required('student')
 def student():
-    from app.models import Enrollment, Subject
-    from app.services.progress import subject_progress
+    from app.models import Enrollment
+    from app.services.loading import load_graph
     from flask_login import current_user
     from datetime import datetime
     
-    enrollments = current_user.enrollments.join(Subject, Enrollment.subject_id == Subject.id).all()
+    enrollments = (
+        Enrollment.query.filter_by(student_id=current_user.id)
+        .options(*load_graph(Enrollment, 'subject', strict=True))
+        .all()
+    )
 
     # Build subject progress list
     subject_data = []
     total_progress = 0
     for e in enrollments:
         subj = e.subject
-        progress = subject_progress(subj)
+        progress = subj.progress_percent
         subject_data.append({
             'subject': subj,
             'progress_percent': progress
@@ -46,16 +51,23 @@ def teacher():
     from app import db
     
     # Get subjects taught by the teacher with topic stats
-    subjects = current_user.subjects_teaching.filter_by(is_active=True).all()
+    subjects = Subject.query.filter_by(teacher_id=current_user.id, is_active=True).all()
+    subject_ids = [s.id for s in subjects]
+    enroll_counts = dict(
+        db.session.query(Enrollment.subject_id, func.count(Enrollment.student_id))
+        .filter(Enrollment.subject_id.in_(subject_ids))
+        .group_by(Enrollment.subject_id)
+        .all()
+    ) if subject_ids else {}
 
     subject_rows = []
     total_progress_accum = 0
     pending_updates = 0
     for subject in subjects:
-        total_topics = subject.topics.count()
-        completed_topics = subject.topics.filter_by(is_completed=True).count()
-        progress = (completed_topics / total_topics * 100) if total_topics else 0
-        enroll_count = Enrollment.query.filter_by(subject_id=subject.id).count()
+        total_topics = subject.topic_count
+        completed_topics = subject.completed_topic_count
+        progress = subject.progress_percent
+        enroll_count = enroll_counts.get(subject.id, 0)
         if total_topics - completed_topics > 0:
             pending_updates += 1
         subject_rows.append({
@@ -80,22 +92,25 @@ def teacher():
 @login_required
 @role_required('teacher')
 def teacher_subject(subject_id):
-    from app.models import Subject, Topic, Enrollment, User
+    from app.models import Subject, Enrollment
+    from app.services.loading import load_graph
+    from app.services.progress import topics_progress
     from flask_login import current_user
     from datetime import datetime
     try:
         # Ensure subject belongs to teacher
-        subject = Subject.query.get_or_404(subject_id)
+        subject = Subject.query.options(*load_graph(Subject, 'topics')).get_or_404(subject_id)
         if subject.teacher_id != current_user.id:
             return render_template('dashboard/teacher_subject.html', error='Unauthorized access.'), 403
 
-        topics = subject.topics.order_by(Topic.order.asc()).all()
-        total = len(topics)
-        completed = sum(1 for t in topics if t.is_completed)
-        progress_percent = round(completed / total * 100, 1) if total else 0
-        enroll_q = Enrollment.query.filter_by(subject_id=subject.id)
-        enroll_count = enroll_q.count()
-        enrollments = enroll_q.all()
+        topics = subject.topics
+        progress_percent = topics_progress(topics)
+        enrollments = (
+            Enrollment.query.filter_by(subject_id=subject.id)
+            .options(*load_graph(Enrollment, 'student', strict=True))
+            .all()
+        )
+        enroll_count = len(enrollments)
         return render_template(
             'dashboard/teacher_subject.html',
             subject=subject,
@@ -120,78 +135,81 @@ def teacher_mark_topic(topic_id):
         return {'status': 'error', 'message': 'Unauthorized'}, 403
     if not topic.is_completed:
         topic.is_completed = True
+        invalidate_dashboard_reports()
         db.session.commit()
     return {'status': 'ok', 'completed': topic.is_completed}
 
 
+@dashboard_bp.route('/teacher/topics/cover', methods=['POST'])
+@login_required
+@role_required('teacher')
+def teacher_bulk_cover_topics():
+    """Cover or uncover several topics at once.
+
+    JSON body: ``topic_ids`` (list), optional ``covered`` (a JSON boolean,
+    default true), ``completed_date`` (YYYY-MM-DD) and ``completion_notes``
+    (a string).
+    """
+    from app.services.topics import TopicBulkError, set_topics_covered
+    from flask_login import current_user
+    from app import db
+    data = request.get_json(silent=True) or {}
+    covered = data.get('covered', True)
+    if not isinstance(covered, bool):
+        return {'status': 'error', 'message': 'covered must be true or false'}, 400
+    completion_notes = data.get('completion_notes')
+    if completion_notes is not None and not isinstance(completion_notes, str):
+        return {'status': 'error', 'message': 'completion_notes must be a string'}, 400
+    completed_date = None
+    if data.get('completed_date'):
+        try:
+            completed_date = datetime.strptime(data['completed_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return {'status': 'error', 'message': 'completed_date must be YYYY-MM-DD'}, 400
+    try:
+        result = set_topics_covered(
+            current_user.id,
+            data.get('topic_ids'),
+            covered=covered,
+            completed_date=completed_date,
+            completion_notes=completion_notes,
+        )
+    except TopicBulkError as e:
+        db.session.rollback()
+        return {'status': 'error', 'message': str(e), 'topic_ids': e.topic_ids}, e.status
+    db.session.commit()
+    return {'status': 'ok', 'updated': result['updated'],
+            'subjects': {str(sid): p for sid, p in result['subjects'].items()}}
+
+
 @dashboard_bp.route('/hod')
 @login_required
 @role_required('hod')
 def hod():
-    from app.models import User, Subject, Enrollment, Topic, Department
+    from app.models import Department
+    from app.services.analytics import department_analytics
     from flask_login import current_user
-    from sqlalchemy import func
-    from app import db
     
     # Get HOD's department
     department = Department.query.filter_by(code=current_user.department).first()
-    
-    # Count faculty in department
-    faculty_count = User.query.filter_by(
-        department=current_user.department,
-        role='teacher',
-        is_active=True
-    ).count()
-    
-    # Get subjects in department (via teachers)
-    dept_teachers = User.query.filter_by(
-        department=current_user.department,
-        role='teacher',
-        is_active=True
-    ).all()
-    teacher_ids = [t.id for t in dept_teachers]
-    
-    subjects = Subject.query.filter(
-        Subject.teacher_id.in_(teacher_ids),
-        Subject.is_active == True
-    ).all() if teacher_ids else []
-    
-    # Count students enrolled in department subjects
-    subject_ids = [s.id for s in subjects]
-    student_count = db.session.query(func.count(func.distinct(Enrollment.student_id))).filter(
-        Enrollment.subject_id.in_(subject_ids)
-    ).scalar() if subject_ids else 0
-    
-    # Calculate average progress across all department subjects
-    total_topics = 0
-    completed_topics = 0
-    for subject in subjects:
-        total_topics += subject.topics.count()
-        completed_topics += subject.topics.filter_by(is_completed=True).count()
-    
-    avg_progress = round((completed_topics / total_topics * 100), 1) if total_topics > 0 else 0
+    stats = department_analytics(current_user.department)
     
     # Get faculty with their subject stats
-    faculty_data = []
-    for teacher in dept_teachers:
-        teacher_subjects = [s for s in subjects if s.teacher_id == teacher.id]
-        subject_ids_teacher = [s.id for s in teacher_subjects]
-        student_count_teacher = db.session.query(func.count(func.distinct(Enrollment.student_id))).filter(
-            Enrollment.subject_id.in_(subject_ids_teacher)
-        ).scalar() if subject_ids_teacher else 0
-        
-        faculty_data.append({
-            'teacher': teacher,
-            'subject_count': len(teacher_subjects),
-            'student_count': student_count_teacher
-        })
+    faculty_data = [
+        {
+            'teacher': f['teacher'],
+            'subject_count': f['subject_count'],
+            'student_count': f['student_count']
+        }
+        for f in stats['faculty']
+    ]
     
     return render_template('dashboard/hod.html',
                           department=department,
-                          faculty_count=faculty_count,
-                          subject_count=len(subjects),
-                          student_count=student_count,
-                          avg_progress=avg_progress,
+                          faculty_count=stats['faculty_count'],
+                          subject_count=stats['subject_count'],
+                          student_count=stats['student_count'],
+                          avg_progress=stats['avg_progress'],
                           faculty_data=faculty_data)
 
 
@@ -199,48 +217,22 @@ def hod():
 @login_required
 @role_required('hod')
 def hod_faculty():
-    from app.models import User, Subject, Enrollment, Department
+    from app.services.analytics import department_analytics
     from flask_login import current_user
-    from sqlalchemy import func
-    from app import db
     
-    # Get faculty in HOD's department
-    dept_teachers = User.query.filter_by(
-        department=current_user.department,
-        role='teacher',
-        is_active=True
-    ).all()
+    stats = department_analytics(current_user.department)
     
-    # Get detailed faculty information
-    faculty_list = []
-    for teacher in dept_teachers:
-        # Get subjects taught by this teacher
-        subjects = Subject.query.filter_by(teacher_id=teacher.id, is_active=True).all()
-        
-        # Calculate total students across all subjects
-        total_students = 0
-        total_progress = 0
-        subject_count = len(subjects)
-        
-        for subject in subjects:
-            student_count = Enrollment.query.filter_by(subject_id=subject.id).count()
-            total_students += student_count
-            
-            # Calculate subject progress
-            total_topics = subject.topics.count()
-            completed_topics = subject.topics.filter_by(is_completed=True).count()
-            subject_progress = (completed_topics / total_topics * 100) if total_topics > 0 else 0
-            total_progress += subject_progress
-        
-        avg_progress = round(total_progress / subject_count, 1) if subject_count > 0 else 0
-        
-        faculty_list.append({
-            'teacher': teacher,
-            'subjects': subjects,
-            'subject_count': subject_count,
-            'student_count': total_students,
-            'avg_progress': avg_progress
-        })
+    # Get detailed faculty information; student_count sums enrollments across subjects
+    faculty_list = [
+        {
+            'teacher': f['teacher'],
+            'subjects': f['subjects'],
+            'subject_count': f['subject_count'],
+            'student_count': f['enrollment_count'],
+            'avg_progress': f['avg_progress']
+        }
+        for f in stats['faculty']
+    ]
     
     return render_template('dashboard/hod_faculty.html',
                           faculty_list=faculty_list,
@@ -251,52 +243,21 @@ def hod_faculty():
 @login_required
 @role_required('hod')
 def hod_reports():
-    from app.models import User, Subject, Enrollment, Topic
+    from app.services.analytics import department_analytics
     from flask_login import current_user
-    from sqlalchemy import func
-    from app import db
-    from datetime import datetime, timedelta
-    
-    # Get department statistics
-    dept_teachers = User.query.filter_by(
-        department=current_user.department,
-        role='teacher',
-        is_active=True
-    ).all()
+    from datetime import datetime
     
-    teacher_ids = [t.id for t in dept_teachers]
-    subjects = Subject.query.filter(
-        Subject.teacher_id.in_(teacher_ids),
-        Subject.is_active == True
-    ).all() if teacher_ids else []
+    stats = department_analytics(current_user.department)
     
     # Generate progress report data
     report_data = {
         'department': current_user.department,
-        'total_faculty': len(dept_teachers),
-        'total_subjects': len(subjects),
-        'generated_date': datetime.now().strftime('%B %d, %Y'),
-        'subjects_report': []
+        'total_faculty': stats['faculty_count'],
+        'total_subjects': stats['subject_count'],
+        'generated_date': datetime.fromisoformat(stats['generated_at']).strftime('%B %d, %Y'),
+        'subjects_report': stats['subjects']
     }
     
-    for subject in subjects:
-        total_topics = subject.topics.count()
-        completed_topics = subject.topics.filter_by(is_completed=True).count()
-        student_count = Enrollment.query.filter_by(subject_id=subject.id).count()
-        progress_percent = (completed_topics / total_topics * 100) if total_topics > 0 else 0
-        
-        # Get teacher name
-        teacher = User.query.get(subject.teacher_id)
-        
-        report_data['subjects_report'].append({
-            'subject': subject,
-            'teacher_name': teacher.name if teacher else 'Unknown',
-            'total_topics': total_topics,
-            'completed_topics': completed_topics,
-            'progress_percent': round(progress_percent, 1),
-            'student_count': student_count
-        })
-    
     return render_template('dashboard/hod_reports.html', report_data=report_data)
 
 
@@ -305,33 +266,22 @@ def hod_reports():
 @role_required('coordinator')
 def coordinator():
     from app.models import User, Subject, Enrollment, Department
+    from app.services.analytics import coordinator_metrics
     from sqlalchemy import func
     from flask_login import current_user
     from app import db
 
     departments = Department.query.all()
-    total_users = User.query.filter_by(is_active=True).count()
-    active_subjects = Subject.query.filter_by(is_active=True).count()
-
-    # Unassigned teachers = teachers with no active subject
-    teachers = User.query.filter_by(role='teacher', is_active=True).all()
-    teacher_ids_with_subjects = set([s.teacher_id for s in Subject.query.filter_by(is_active=True).all() if s.teacher_id])
-    unassigned_teachers = sum(1 for t in teachers if t.id not in teacher_ids_with_subjects)
+    metrics = coordinator_metrics()
 
     # Recent activity (if model exists)
     recent_activity = []
     try:
         from app.models import ActivityLog
-        recent_activity = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(5).all()
+        recent_activity = ActivityLog.query.order_by(ActivityLog.created_at.desc()).limit(5).all()
     except Exception:
         pass
 
-    metrics = {
-        'total_users': total_users,
-        'active_subjects': active_subjects,
-        'unassigned_teachers': unassigned_teachers
-    }
-
     return render_template('dashboard/coordinator.html', metrics=metrics, recent_activity=recent_activity, active_section='dashboard')
 
 
@@ -340,9 +290,34 @@ def coordinator():
 @login_required
 @role_required('coordinator')
 def coordinator_users():
-    from app.models import User
-    users = User.query.order_by(User.name.asc()).all()
-    return render_template('coordinator/users.html', users=users, active_section='users')
+    from app.services.listings import list_users
+    from app.services.pagination import PaginationError
+    try:
+        page = list_users(request.args, default_active='true')
+    except PaginationError as e:
+        abort(400, description=str(e))
+    return render_template('coordinator/users.html', users=page['items'], page=page,
+                           page_url=_listing_url_builder('dashboard.coordinator_users', page),
+                           active_section='users')
+
+
+def _listing_url_builder(endpoint, page):
+    """Return ``page_url(**changes)`` building links that keep the current filters.
+
+    Changing the sort or any filter drops the cursor, since a cursor is
+    only valid for the ordering it was issued for.
+    """
+    current = request.args.to_dict()
+    current.setdefault('sort', page['sort'])
+    current.setdefault('dir', page['dir'])
+
+    def page_url(**changes):
+        args = dict(current)
+        if 'cursor' not in changes:
+            args.pop('cursor', None)
+        args.update(changes)
+        return url_for(endpoint, **{k: v for k, v in args.items() if v not in (None, '')})
+    return page_url
 
 # Create user (AJAX)
 @dashboard_bp.route('/coordinator/users/create', methods=['POST'])
@@ -367,6 +342,7 @@ def coordinator_create_user():
     u.set_password(password)
     try:
         db.session.add(u)
+        invalidate_dashboard_reports()
         db.session.commit()
         # Send invite/reset email if email config allows
         try:
@@ -413,6 +389,7 @@ def coordinator_edit_user(user_id):
     user.email = data.get('email', user.email)
     user.role = data.get('role', user.role)
     user.department = data.get('department', user.department)
+    invalidate_dashboard_reports()
     try:
         db.session.commit()
     except Exception as e:
@@ -436,6 +413,7 @@ def coordinator_delete_user(user_id):
     user = User.query.get_or_404(user_id)
     try:
         user.is_active = False
+        invalidate_dashboard_reports()
         db.session.commit()
         return {'status': 'ok', 'deactivated': user_id}
     except Exception as e:
@@ -452,6 +430,7 @@ def coordinator_restore_user(user_id):
     user = User.query.get_or_404(user_id)
     try:
         user.is_active = True
+        invalidate_dashboard_reports()
         db.session.commit()
         return {'status': 'ok', 'restored': user_id}
     except Exception as e:
@@ -463,10 +442,20 @@ def coordinator_restore_user(user_id):
 @login_required
 @role_required('coordinator')
 def coordinator_subjects():
-    from app.models import Subject, User
-    subjects = Subject.query.filter_by(is_active=True).order_by(Subject.code.asc()).all()
-    teachers = User.query.filter_by(role='teacher', is_active=True).order_by(User.name.asc()).all()
-    return render_template('coordinator/subjects.html', subjects=subjects, teachers=teachers, active_section='subjects')
+    from app.models import User
+    from app.services.listings import list_subjects
+    from app.services.pagination import PaginationError
+    from app.services.read_models import USER_COLUMNS, UserRow, select_rows, to_rows
+    from sqlalchemy import true
+    try:
+        page = list_subjects(request.args, default_active='true')
+    except PaginationError as e:
+        abort(400, description=str(e))
+    teachers = to_rows(UserRow, select_rows(USER_COLUMNS).filter(User.role == 'teacher', User.is_active == true())
+                       .order_by(User.name.asc()))
+    return render_template('coordinator/subjects.html', subjects=page['items'], teachers=teachers, page=page,
+                           page_url=_listing_url_builder('dashboard.coordinator_subjects', page),
+                           active_section='subjects')
 
 
 @dashboard_bp.route('/coordinator/enrollments')
@@ -474,7 +463,10 @@ def coordinator_subjects():
 @role_required('coordinator')
 def coordinator_enrollments():
     from app.models import Subject
-    subjects = Subject.query.filter_by(is_active=True).order_by(Subject.code.asc()).all()
+    from app.services.read_models import SUBJECT_OPTION_COLUMNS, SubjectOptionRow, select_rows, to_rows
+    from sqlalchemy import true
+    subjects = to_rows(SubjectOptionRow, select_rows(SUBJECT_OPTION_COLUMNS).filter(Subject.is_active == true())
+                       .order_by(Subject.code.asc()))
     return render_template('coordinator/enrollments.html', subjects=subjects, active_section='enrollments')
 
 
@@ -2,25 +2,27 @@ from flask import render_template, abort
 from flask_login import login_required, current_user
 from app.blueprints.auth.decorators import role_required
 from . import student_bp
-from app.models import Enrollment, Subject, Topic, User
-from app.services.progress import subject_progress, topics_progress
-from app import db
-from sqlalchemy import func
+from app.models import Enrollment, Subject
+from app.services.loading import load_graph
+from app.services.progress import topics_progress
 
 @student_bp.route('/subjects')
 @login_required
 @role_required('student')
 def subjects():
-    # Fetch enrollments with related subjects efficiently
-    enrollments = Enrollment.query.filter_by(student_id=current_user.id).all()
+    # Enrollments, subjects and teachers in one query
+    enrollments = (
+        Enrollment.query.filter_by(student_id=current_user.id)
+        .options(*load_graph(Enrollment, 'subject.teacher', strict=True))
+        .all()
+    )
     listing = []
     for e in enrollments:
         subj = e.subject
-        teacher = User.query.get(subj.teacher_id)
-        progress = subject_progress(subj)
+        progress = subj.progress_percent
         listing.append({
             'subject': subj,
-            'teacher': teacher,
+            'teacher': subj.teacher,
             'progress_percent': progress
         })
     return render_template('student/subjects.html', subjects=listing, active_section='subjects')
@@ -35,15 +37,15 @@ def subject_detail(subject_id):
         if not enrollment:
             abort(404)
 
-        subject = Subject.query.get_or_404(subject_id)
-        topics = subject.topics.order_by(Topic.order.asc()).all()
+        subject = Subject.query.options(*load_graph(Subject, 'topics', 'teacher')).get_or_404(subject_id)
+        topics = subject.topics
 
         progress_percent = topics_progress(topics)
 
         # Sample learn list (placeholder) could be derived from topics types later
         learn_items = [t.name for t in topics[:4]]
 
-        teacher = User.query.get(subject.teacher_id)
+        teacher = subject.teacher
         instructors = [
             {'name': teacher.name if teacher else 'Unknown', 'role': 'Professor'},
         ]
@@ -11,9 +11,10 @@ from app.models.notification import Notification
 from app.models.activity_log import ActivityLog
 from app.models.comment import Comment
 from app.models.report_cache import ReportCache
+from app.models.change_log import ChangeLog, ChangeSequence
 
 __all__ = [
     'User', 'Subject', 'Topic', 'Enrollment', 'Department', 'AcademicYear',
     'Course', 'TopicProgress', 'Resource', 'Notification', 'ActivityLog',
-    'Comment', 'ReportCache'
+    'Comment', 'ReportCache', 'ChangeLog', 'ChangeSequence'
 ]
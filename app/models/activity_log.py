@@ -10,4 +10,4 @@ class ActivityLog(db.Model):
     entity_id = db.Column(db.Integer)
     details = db.Column(db.JSON)
     ip_address = db.Column(db.String(45))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,168 @@
+from datetime import datetime
+from sqlalchemy import DDL, event, func, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models.enrollment import Enrollment
+from app.models.subject import Subject
+from app.models.topic import Topic
+from app.models.topic_progress import TopicProgress
+
+
+class ChangeLog(db.Model):
+    """One row per insert, update or delete of a synced entity.
+
+    ``id`` is the change sequence clients sync from (app/services/sync.py).
+    It is taken from ChangeSequence when the transaction commits, not from
+    autoincrement, so ids become visible in order and never repeat. A row
+    only names what changed; current values are read from the entity table,
+    and ``deleted`` rows are the tombstones. No foreign keys, so tombstones
+    outlive the rows they describe.
+    """
+    __tablename__ = 'change_log'
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # topic, subject, enrollment, topic_progress
+    entity_id = db.Column(db.Integer)  # None for enrollments, keyed by (subject_id, student_id)
+    subject_id = db.Column(db.Integer)
+    student_id = db.Column(db.Integer)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Scoped syncs (a teacher's or student's subjects) and retention pruning
+        db.Index('ix_change_log_subject_id_id', 'subject_id', 'id'),
+        db.Index('ix_change_log_changed_at', 'changed_at'),
+    )
+
+
+class ChangeSequence(db.Model):
+    """The last change sequence number handed out: a single row, id 1.
+
+    Committing writers lock it to number their change log rows, so commits
+    are numbered in the order they become visible. It outlives pruning of
+    the log, so the sequence never starts over.
+    """
+    __tablename__ = 'change_sequence'
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+# db.create_all() seeds the counter from the log, as the migration does
+ChangeSequence.__table__.add_is_dependent_on(ChangeLog.__table__)
+event.listen(ChangeSequence.__table__, 'after_create', DDL(
+    'INSERT INTO change_sequence (id, value) SELECT 1, COALESCE(MAX(id), 0) FROM change_log'
+))
+
+
+TRACKED_ENTITIES = {Topic: 'topic', Subject: 'subject', Enrollment: 'enrollment', TopicProgress: 'topic_progress'}
+
+
+def _change_row(obj, values, deleted: bool) -> dict:
+    """ChangeLog values for ``obj`` from its key attribute ``values``."""
+    entity = TRACKED_ENTITIES[type(obj)]
+    row = {'entity': entity, 'entity_id': values.get('id'), 'subject_id': values.get('subject_id'),
+           'student_id': values.get('student_id'), 'deleted': deleted}
+    if entity == 'subject':
+        row['subject_id'] = values['id']
+    elif entity == 'topic_progress':
+        # Resolved to the topic's subject by _log_changes
+        row['topic_id'] = values['topic_id']
+    return row
+
+
+_KEY_ATTRS = {
+    'subject': ('id',),
+    'topic': ('id', 'subject_id'),
+    'enrollment': ('subject_id', 'student_id'),
+    'topic_progress': ('id', 'topic_id', 'student_id'),
+}
+
+
+def _current(obj):
+    return {key: getattr(obj, key) for key in _KEY_ATTRS[TRACKED_ENTITIES[type(obj)]]}
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_deleted_entities(session, flush_context, instances):
+    """Read the keys of tracked rows about to be deleted while they exist."""
+    deleted = []
+    for obj in session.deleted:
+        if type(obj) in TRACKED_ENTITIES:
+            state = inspect(obj)
+            values = {}
+            for key in _KEY_ATTRS[TRACKED_ENTITIES[type(obj)]]:
+                hist = state.attrs[key].history
+                values[key] = hist.deleted[0] if hist.deleted else getattr(obj, key)
+            deleted.append(_change_row(obj, values, True))
+    if deleted:
+        session.info.setdefault('_deleted_changes', []).extend(deleted)
+
+
+def queue_changes(session, rows) -> None:
+    """Queue ChangeLog values to be written when ``session`` commits."""
+    now = datetime.utcnow()
+    session.info.setdefault('_pending_changes', []).extend(dict(row, changed_at=now) for row in rows)
+
+
+def _reserve_sequence(conn, count: int) -> int:
+    """Advance the sequence by ``count`` and return the first number reserved.
+
+    The UPDATE locks the counter row until the transaction ends.
+    """
+    table = ChangeSequence.__table__
+    if not conn.execute(table.update().where(table.c.id == 1).values(value=table.c.value + count)).rowcount:
+        # The seed row is missing (e.g. deleted by hand)
+        start = conn.execute(select(func.coalesce(func.max(ChangeLog.id), 0))).scalar()
+        conn.execute(table.insert().values(id=1, value=start + count))
+    return conn.execute(select(table.c.value).where(table.c.id == 1)).scalar() - count + 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _log_changes(session, flush_context):
+    """Queue a ChangeLog row for every tracked insert, update and delete.
+
+    Core statements (``create_topics``, ``update_topics``, the CSV
+    enrollment import) bypass this hook and call
+    ``app.services.sync.record_changes`` instead.
+    """
+    rows = session.info.pop('_deleted_changes', [])
+    for obj in session.new:
+        if type(obj) in TRACKED_ENTITIES:
+            rows.append(_change_row(obj, _current(obj), False))
+    for obj in session.dirty:
+        if type(obj) in TRACKED_ENTITIES and session.is_modified(obj, include_collections=False):
+            rows.append(_change_row(obj, _current(obj), False))
+    if not rows:
+        return
+    conn = session.connection()
+    topic_ids = {row['topic_id'] for row in rows if 'topic_id' in row}
+    if topic_ids:
+        topic = Topic.__table__
+        subject_of = dict(conn.execute(select(topic.c.id, topic.c.subject_id).where(topic.c.id.in_(topic_ids))).all())
+        for row in rows:
+            if 'topic_id' in row:
+                row['subject_id'] = subject_of.get(row.pop('topic_id'))
+    queue_changes(session, rows)
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_change_log(session):
+    """Number the transaction's queued changes and write them to the log.
+
+    Runs last in the transaction, so the counter row stays locked only
+    until the commit; a transaction that commits later always gets higher
+    ids, and a client can never pass over changes still to be committed.
+    """
+    # before_commit runs ahead of the commit's own flush
+    session.flush()
+    rows = session.info.pop('_pending_changes', None)
+    if not rows:
+        return
+    conn = session.connection()
+    first = _reserve_sequence(conn, len(rows))
+    conn.execute(ChangeLog.__table__.insert(), [dict(row, id=first + i) for i, row in enumerate(rows)])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_change_state(session, previous_transaction):
+    session.info.pop('_deleted_changes', None)
+    session.info.pop('_pending_changes', None)
@@ -7,3 +7,8 @@ class Enrollment(db.Model):
     enrolled_at = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='active')  # active, completed, dropped
     progress = db.Column(db.Float, default=0.0)  # Percentage of topics completed
+
+    # The primary key leads with student_id; subject rosters need subject_id first
+    __table_args__ = (
+        db.Index('ix_enrollment_subject_id_student_id', 'subject_id', 'student_id'),
+    )
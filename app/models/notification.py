@@ -10,3 +10,7 @@ class Notification(db.Model):
     notification_type = db.Column(db.String(20))  # info, warning, success, error
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_notification_user_id_is_read', 'user_id', 'is_read'),
+    )
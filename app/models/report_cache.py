@@ -5,7 +5,9 @@ class ReportCache(db.Model):
     __tablename__ = 'report_cache'
     id = db.Column(db.Integer, primary_key=True)
     report_type = db.Column(db.String(64), nullable=False)
+    # sha256 of report_type + canonical JSON filters, see app/services/report_cache.py
+    cache_key = db.Column(db.String(64), index=True)
     filters = db.Column(db.JSON)
     data = db.Column(db.JSON)
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
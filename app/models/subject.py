@@ -15,7 +15,33 @@ class Subject(db.Model):
     total_hours = db.Column(db.Integer)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Denormalized topic counters, kept current by the Topic flush hooks in
+    # app/models/topic.py and rebuilt by scripts/rebuild_topic_counters.py
+    topic_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_topic_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_hours = db.Column(db.Integer, nullable=False, default=0)
+
+    # Keyset pagination indexes for the coordinator subject listing (sort column, id)
+    __table_args__ = (
+        db.Index('ix_subject_code_id', 'code', 'id'),
+        db.Index('ix_subject_name_id', 'name', 'id'),
+        db.Index('ix_subject_semester_id', 'semester', 'id'),
+        db.Index('ix_subject_created_at_id', 'created_at', 'id'),
+        db.Index('ix_subject_teacher_id_code', 'teacher_id', 'code'),
+        # A teacher's active subjects (dashboards, analytics)
+        db.Index('ix_subject_teacher_id_is_active', 'teacher_id', 'is_active'),
+    )
     
-    # Relationships
-    topics = db.relationship('Topic', backref='subject', lazy='dynamic', cascade='all, delete-orphan')
+    # Relationships. A syllabus is short, so topics load as an ordered list
+    # (eager-loadable, see app/services/loading.py); rosters can be long and
+    # stay dynamic for paging.
+    topics = db.relationship('Topic', backref='subject', order_by='Topic.order', cascade='all, delete-orphan')
     enrollments = db.relationship('Enrollment', backref='subject', lazy='dynamic', cascade='all, delete-orphan')
+
+    @property
+    def progress_percent(self):
+        """Percent (0-100) of completed topics, read from the counters."""
+        if not self.topic_count:
+            return 0.0
+        return round((self.completed_topic_count or 0) / self.topic_count * 100, 1)
@@ -1,17 +1,142 @@
+from collections import defaultdict
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
 from app import db
+from app.models.subject import Subject
 
 class Topic(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    # active_history keeps the pre-change value for the Subject counter hooks
+    subject_id = db.column_property(db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False), active_history=True)
     name = db.Column(db.String(128), nullable=False)
     description = db.Column(db.Text)
     order = db.Column(db.Integer, nullable=False)
-    hours_allocated = db.Column(db.Integer)
+    hours_allocated = db.column_property(db.Column(db.Integer), active_history=True)
     expected_date = db.Column(db.Date)
     completed_date = db.Column(db.Date)
-    is_completed = db.Column(db.Boolean, default=False)
+    is_completed = db.column_property(db.Column(db.Boolean, default=False), active_history=True)
     completion_notes = db.Column(db.Text)
     attachments = db.Column(db.JSON)
     prerequisites = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # A subject's topics in display order
+    __table_args__ = (
+        db.Index('ix_topic_subject_id_order', 'subject_id', 'order'),
+    )
+
+
+def _counter_contribution(subject_id, is_completed, hours):
+    """(subject_id, topics, completed topics, completed hours) for one topic state."""
+    if subject_id is None:
+        return None
+    done = bool(is_completed)
+    return subject_id, 1, int(done), (hours or 0) if done else 0
+
+
+def _original_value(state, key):
+    hist = state.attrs[key].history
+    if hist.deleted:
+        return hist.deleted[0]
+    if hist.unchanged:
+        return hist.unchanged[0]
+    return state.dict.get(key)
+
+
+def _add_delta(deltas, contribution, sign):
+    if contribution is None:
+        return
+    subject_id, topics, completed, hours = contribution
+    d = deltas[subject_id]
+    d[0] += sign * topics
+    d[1] += sign * completed
+    d[2] += sign * hours
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_deleted_topics(session, flush_context, instances):
+    """Record counter contributions of topics about to be deleted.
+
+    Deleted rows may be expired, so their values are loaded here while the
+    row still exists; ``_update_subject_counters`` applies them.
+    """
+    removed = []
+    for obj in session.deleted:
+        if isinstance(obj, Topic):
+            state = inspect(obj)
+            for key in ('subject_id', 'is_completed', 'hours_allocated'):
+                getattr(obj, key)
+            removed.append(_counter_contribution(
+                _original_value(state, 'subject_id'),
+                _original_value(state, 'is_completed'),
+                _original_value(state, 'hours_allocated'),
+            ))
+    if removed:
+        session.info.setdefault('_deleted_topic_counters', []).extend(removed)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_subject_counters(session, flush_context):
+    """Apply Topic inserts, deletes and completion changes to Subject counters.
+
+    Runs inside the flush transaction so the counters commit or roll back
+    together with the topic rows. Bulk statements (``Query.update``,
+    ``bulk_insert_mappings``) bypass this hook and must call
+    ``app.services.progress.rebuild_subject_counters`` for the touched subjects.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for obj in session.new:
+        if isinstance(obj, Topic):
+            _add_delta(deltas, _counter_contribution(obj.subject_id, obj.is_completed, obj.hours_allocated), 1)
+    for contribution in session.info.pop('_deleted_topic_counters', ()):
+        _add_delta(deltas, contribution, -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Topic):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[k].history.has_changes() for k in ('subject_id', 'is_completed', 'hours_allocated')):
+            continue
+        _add_delta(deltas, _counter_contribution(
+            _original_value(state, 'subject_id'),
+            _original_value(state, 'is_completed'),
+            _original_value(state, 'hours_allocated'),
+        ), -1)
+        _add_delta(deltas, _counter_contribution(obj.subject_id, obj.is_completed, obj.hours_allocated), 1)
+
+    table = Subject.__table__
+    touched = set()
+    for subject_id, (topics, completed, hours) in deltas.items():
+        if not (topics or completed or hours):
+            continue
+        session.connection().execute(
+            table.update()
+            .where(table.c.id == subject_id)
+            .values(
+                topic_count=table.c.topic_count + topics,
+                completed_topic_count=table.c.completed_topic_count + completed,
+                completed_hours=table.c.completed_hours + hours,
+            )
+        )
+        touched.add(subject_id)
+    if touched:
+        session.info.setdefault('_stale_subject_counters', set()).update(touched)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_subject_counters(session, flush_context):
+    """Make loaded Subject objects re-read counters changed by the flush."""
+    stale = session.info.pop('_stale_subject_counters', None)
+    if not stale:
+        return
+    for subject_id in stale:
+        subject = session.identity_map.get(identity_key(Subject, subject_id))
+        if subject is not None:
+            session.expire(subject, ['topic_count', 'completed_topic_count', 'completed_hours'])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_counter_state(session, previous_transaction):
+    session.info.pop('_deleted_topic_counters', None)
+    session.info.pop('_stale_subject_counters', None)
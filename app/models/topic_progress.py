@@ -11,3 +11,9 @@ class TopicProgress(db.Model):
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # One row per student and topic; the unique index also serves lookups by student
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'topic_id', name='uq_topic_progress_student_id_topic_id'),
+        db.Index('ix_topic_progress_topic_id', 'topic_id'),
+    )
@@ -16,9 +16,21 @@ class User(UserMixin, db.Model):
     user_metadata = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # Relationships
-    subjects_teaching = db.relationship('Subject', backref='teacher', lazy='dynamic')
-    enrollments = db.relationship('Enrollment', backref='student', lazy='dynamic')
+    # Keyset pagination indexes for the coordinator user listing (sort column, id)
+    __table_args__ = (
+        db.Index('ix_user_name_id', 'name', 'id'),
+        db.Index('ix_user_role_name_id', 'role', 'name', 'id'),
+        db.Index('ix_user_department_name_id', 'department', 'name', 'id'),
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+        db.Index('ix_user_role_id', 'role', 'id'),
+        db.Index('ix_user_department_id', 'department', 'id'),
+        # HOD and analytics lookups of a department's active teachers/students
+        db.Index('ix_user_department_role_is_active', 'department', 'role', 'is_active'),
+    )
+
+    # Relationships; a user's own subjects and enrollments are short lists
+    subjects_teaching = db.relationship('Subject', backref='teacher')
+    enrollments = db.relationship('Enrollment', backref='student')
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -0,0 +1,178 @@
+from datetime import datetime
+from sqlalchemy import case, func
+from app import db
+from app.models import User, Subject, Enrollment
+from app.services.report_cache import cached_report, invalidate_on_commit
+
+# Reports built from users, subjects, topics and enrollments
+DASHBOARD_REPORTS = ('department_analytics', 'coordinator_metrics')
+
+
+def invalidate_dashboard_reports() -> None:
+    """Drop the cached dashboard reports when the current transaction commits.
+
+    Called by every write path that changes what they count: users,
+    subjects, topic coverage and enrollments.
+    """
+    invalidate_on_commit(*DASHBOARD_REPORTS)
+
+
+def _department_teacher_criteria(department):
+    return (
+        User.department == department,
+        User.role == 'teacher',
+        User.is_active == True,  # noqa: E712
+    )
+
+
+def _department_subject_query(department, *columns):
+    """Query over active subjects taught by active teachers of a department."""
+    return (
+        db.session.query(*columns)
+        .select_from(Subject)
+        .join(User, Subject.teacher_id == User.id)
+        .filter(Subject.is_active == True, *_department_teacher_criteria(department))  # noqa: E712
+    )
+
+
+def _teacher_dict(teacher):
+    return {'id': teacher.id, 'name': teacher.name, 'email': teacher.email}
+
+
+def _subject_dict(subject):
+    return {'id': subject.id, 'name': subject.name, 'code': subject.code, 'semester': subject.semester}
+
+
+@cached_report('department_analytics', key_func=lambda department: {'department': department}, stale_ttl=300)
+def department_analytics(department: str) -> dict:
+    """Faculty, subject, student and progress aggregates for one department.
+
+    Issues a fixed number of queries regardless of department size: the
+    teachers, their active subjects, enrollment counts per subject, distinct
+    students per teacher and distinct students across the department.
+    Progress comes from the denormalized topic counters on ``Subject``.
+    The result is plain JSON data and is cached in the report cache.
+    """
+    teachers = User.query.filter(*_department_teacher_criteria(department)).all()
+    subjects = _department_subject_query(department, Subject).all()
+
+    enroll_counts = dict(
+        _department_subject_query(department, Enrollment.subject_id, func.count(Enrollment.student_id))
+        .join(Enrollment, Enrollment.subject_id == Subject.id)
+        .group_by(Enrollment.subject_id)
+        .all()
+    )
+    teacher_students = dict(
+        _department_subject_query(department, Subject.teacher_id, func.count(func.distinct(Enrollment.student_id)))
+        .join(Enrollment, Enrollment.subject_id == Subject.id)
+        .group_by(Subject.teacher_id)
+        .all()
+    )
+    student_count = (
+        _department_subject_query(department, func.count(func.distinct(Enrollment.student_id)))
+        .join(Enrollment, Enrollment.subject_id == Subject.id)
+        .scalar()
+    ) or 0
+
+    teacher_names = {t.id: t.name for t in teachers}
+    subjects_report = []
+    by_teacher = {t.id: [] for t in teachers}
+    for subject in subjects:
+        by_teacher.setdefault(subject.teacher_id, []).append(subject)
+        subjects_report.append({
+            'subject': _subject_dict(subject),
+            'teacher_name': teacher_names.get(subject.teacher_id, 'Unknown'),
+            'total_topics': subject.topic_count,
+            'completed_topics': subject.completed_topic_count,
+            'progress_percent': subject.progress_percent,
+            'student_count': enroll_counts.get(subject.id, 0),
+        })
+
+    faculty = []
+    for teacher in teachers:
+        teacher_subjects = by_teacher[teacher.id]
+        subject_count = len(teacher_subjects)
+        total_progress = sum(s.progress_percent for s in teacher_subjects)
+        faculty.append({
+            'teacher': _teacher_dict(teacher),
+            'subjects': [_subject_dict(s) for s in teacher_subjects],
+            'subject_count': subject_count,
+            'student_count': teacher_students.get(teacher.id, 0),
+            'enrollment_count': sum(enroll_counts.get(s.id, 0) for s in teacher_subjects),
+            'avg_progress': round(total_progress / subject_count, 1) if subject_count else 0,
+        })
+
+    total_topics = sum(s.topic_count for s in subjects)
+    completed_topics = sum(s.completed_topic_count for s in subjects)
+    return {
+        'department': department,
+        'faculty': faculty,
+        'subjects': subjects_report,
+        'faculty_count': len(teachers),
+        'subject_count': len(subjects),
+        'student_count': student_count,
+        'total_topics': total_topics,
+        'completed_topics': completed_topics,
+        'avg_progress': round(completed_topics / total_topics * 100, 1) if total_topics else 0,
+        'generated_at': datetime.utcnow().isoformat(),
+    }
+
+
+@cached_report('coordinator_metrics', key_func=lambda: {}, stale_ttl=300)
+def coordinator_metrics() -> dict:
+    """Institution-wide counts shown on the coordinator dashboard."""
+    total_users = User.query.filter_by(is_active=True).count()
+    active_subjects = Subject.query.filter_by(is_active=True).count()
+    # Unassigned teachers = teachers with no active subject
+    has_subject = (
+        db.session.query(Subject.id)
+        .filter(Subject.teacher_id == User.id, Subject.is_active == True)  # noqa: E712
+        .exists()
+    )
+    unassigned_teachers = User.query.filter(
+        User.role == 'teacher',
+        User.is_active == True,  # noqa: E712
+        ~has_subject
+    ).count()
+    return {
+        'total_users': total_users,
+        'active_subjects': active_subjects,
+        'unassigned_teachers': unassigned_teachers
+    }
+
+
+DEPARTMENT_SUBJECT_EXPORT_FIELDS = (
+    'subject_id', 'code', 'name', 'semester', 'teacher_name', 'teacher_email',
+    'total_topics', 'completed_topics', 'completed_hours', 'progress_percent', 'student_count', 'status',
+)
+
+
+def department_subject_export_query(department):
+    """Column-only query with one row per subject for the HOD report export.
+
+    Enrollment counts come from a grouped subquery and progress from the
+    topic counters on ``Subject``, so each row is read once with no per-row
+    lookups. ``status`` uses the report page's bands: On Track from 80%,
+    Behind from 50%, otherwise Critical. Row order matches
+    ``DEPARTMENT_SUBJECT_EXPORT_FIELDS``.
+    """
+    enroll_counts = (
+        db.session.query(Enrollment.subject_id, func.count(Enrollment.student_id).label('student_count'))
+        .group_by(Enrollment.subject_id)
+        .subquery()
+    )
+    progress = case(
+        (Subject.topic_count > 0, func.round(Subject.completed_topic_count * 100.0 / Subject.topic_count, 1)),
+        else_=0,
+    )
+    status = case((progress >= 80, 'On Track'), (progress >= 50, 'Behind'), else_='Critical')
+    return (
+        _department_subject_query(
+            department,
+            Subject.id, Subject.code, Subject.name, Subject.semester, User.name, User.email,
+            Subject.topic_count, Subject.completed_topic_count, Subject.completed_hours, progress,
+            func.coalesce(enroll_counts.c.student_count, 0), status,
+        )
+        .outerjoin(enroll_counts, enroll_counts.c.subject_id == Subject.id)
+        .order_by(Subject.code.asc())
+    )
@@ -0,0 +1,164 @@
+"""Run several API requests in one HTTP round trip.
+
+``POST /api/batch`` takes an ordered list of operations::
+
+    {"atomic": false,
+     "operations": [
+        {"method": "POST", "path": "/api/coordinator/users", "body": {...}},
+        {"method": "POST", "path": "/api/coordinator/subjects/4/enrollments", "body": {...}},
+        {"method": "GET", "path": "/api/coordinator/subjects/4/enrollments"}]}
+
+Each operation is dispatched through the app like a normal request, with
+the caller's cookies and headers, so login, role checks, request hooks and
+error handlers all apply as they would on their own. The result list
+holds each operation's status and decoded body in order.
+
+By default every operation commits (or fails) on its own and the rest
+still run. With ``"atomic": true`` the routes' ``commit()`` only flushes
+for the length of the batch; the first operation that fails (status 400
+or above, or one that rolls the session back) stops the batch, everything
+before it is rolled back and the remaining operations are skipped.
+Otherwise the whole batch is committed once at the end. Topic order locks
+taken by the operations are held until then (see
+app/services/topics.py ``lock_topic_order``).
+"""
+from contextlib import contextmanager
+from flask import current_app, g, request
+from sqlalchemy import event
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+from werkzeug.test import EnvironBuilder
+from app import db
+
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+_MISSING = object()
+
+# Outer request headers not passed on to operations (they describe the batch body)
+_SKIP_HEADERS = {'content-type', 'content-length'}
+
+
+class BatchError(ValueError):
+    """Raised for a malformed batch (not for failing operations)."""
+
+
+def parse_batch(payload, max_operations: int) -> tuple[list[dict], bool]:
+    """Validated (operations, atomic) from a batch request body."""
+    if not isinstance(payload, dict):
+        raise BatchError('body must be a JSON object')
+    operations = payload.get('operations')
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list')
+    if len(operations) > max_operations:
+        raise BatchError(f'at most {max_operations} operations per batch')
+    parsed = []
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict):
+            raise BatchError(f'operation {index} must be an object')
+        method = str(op.get('method') or 'GET').upper()
+        path = op.get('path')
+        if method not in BATCH_METHODS:
+            raise BatchError(f"operation {index}: method must be one of {', '.join(BATCH_METHODS)}")
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            raise BatchError(f'operation {index}: path must start with /api/')
+        if _endpoint(method, path) == request.endpoint:
+            raise BatchError(f'operation {index}: batches cannot be nested')
+        parsed.append({'method': method, 'path': path, 'body': op.get('body')})
+    return parsed, bool(payload.get('atomic'))
+
+
+def _endpoint(method: str, path: str) -> str | None:
+    """The endpoint ``path`` dispatches to, decoded and matched as ``_dispatch`` would."""
+    builder = EnvironBuilder(path=path, method=method, base_url=request.host_url)
+    try:
+        endpoint, _ = current_app.url_map.bind_to_environ(builder.get_environ()).match()
+    except RequestRedirect as e:
+        return _endpoint(method, e.new_url)
+    except HTTPException:
+        return None
+    finally:
+        builder.close()
+    return endpoint
+
+
+def _dispatch(op: dict) -> dict:
+    """Run one operation as a request inside the current app context."""
+    app = current_app._get_current_object()
+    headers = [(k, v) for k, v in request.headers.items() if k.lower() not in _SKIP_HEADERS]
+    builder = EnvironBuilder(
+        path=op['path'], method=op['method'], base_url=request.host_url, headers=headers,
+        json=op['body'] if op['body'] is not None else None,
+        environ_base={'REMOTE_ADDR': request.remote_addr},
+    )
+    # Operations share the batch's app context (and g): keep the batch's
+    # own query stats; each operation is logged as a request of its own
+    outer_stats = g.get('_query_stats')
+    try:
+        with app.request_context(builder.get_environ()):
+            try:
+                response = app.full_dispatch_request()
+            except Exception:
+                app.logger.exception('batch operation %s %s failed', op['method'], op['path'])
+                db.session.rollback()
+                return {'status': 500, 'body': {'error': 'internal error'}}
+            # Read inside the context: streamed bodies are generated here
+            body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+            return {'status': response.status_code, 'body': body}
+    finally:
+        builder.close()
+        if outer_stats is not None:
+            g._query_stats = outer_stats
+
+
+@contextmanager
+def _deferred_commits(session):
+    """Make ``session.commit()`` flush only, and note any rollback.
+
+    Re-entrant: the ``commit`` in place before (possibly another deferral)
+    is restored on exit.
+    """
+    state = {'rolled_back': False}
+
+    def _on_rollback(sess):
+        state['rolled_back'] = True
+
+    previous = session.__dict__.get('commit', _MISSING)
+    session.commit = session.flush
+    event.listen(session, 'after_rollback', _on_rollback)
+    try:
+        yield state
+    finally:
+        event.remove(session, 'after_rollback', _on_rollback)
+        if previous is _MISSING:
+            del session.commit
+        else:
+            session.commit = previous
+
+
+def run_batch(operations: list[dict], atomic: bool = False) -> dict:
+    """Dispatch ``operations`` in order; see the module docstring."""
+    if not atomic:
+        results = []
+        for op in operations:
+            result = _dispatch(op)
+            if result['status'] >= 400:
+                # Drop anything the failed operation left pending
+                db.session.rollback()
+            results.append(result)
+        return {'atomic': False, 'results': results}
+
+    session = db.session()
+    results, failed = [], None
+    with _deferred_commits(session) as state:
+        for index, op in enumerate(operations):
+            result = _dispatch(op)
+            results.append(result)
+            if result['status'] >= 400 or state['rolled_back']:
+                failed = index
+                break
+    if failed is None:
+        db.session.commit()
+    else:
+        db.session.rollback()
+        results.extend({'status': None, 'skipped': True} for _ in operations[len(results):])
+    return {'atomic': True, 'committed': failed is None, 'failed': failed, 'results': results}
@@ -0,0 +1,377 @@
+"""Pluggable key/value and counter backends shared by caches and the rate limiter.
+
+Three implementations share one interface:
+
+* ``MemoryBackend``: in-process LRU with TTLs. Private to one worker.
+* ``SQLiteBackend``: a SQLite file in WAL mode, shared by every worker on
+  one host without any extra service.
+* ``RedisBackend``: speaks the Redis protocol (RESP) over a plain socket,
+  so it works with Redis or any compatible server and needs no client
+  package. Counters with a TTL use PEXPIRE NX, which needs Redis 7+.
+
+Select one with ``CACHE_BACKEND`` (memory, sqlite, redis) and ``CACHE_URL``
+(a file path for sqlite, ``redis://host:port/db`` for redis) and obtain it
+with ``get_cache_backend()``. Values must be JSON-serializable.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from flask import current_app
+
+_backend_lock = threading.Lock()
+
+
+class CacheBackend(ABC):
+    """Interface every backend implements. TTLs are in seconds."""
+
+    @abstractmethod
+    def get(self, key: str):
+        """Return the stored value, or None when missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        """Store ``value``, replacing any existing one."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the key if present."""
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        """Atomically add to an integer counter; ``ttl`` applies when it is created."""
+
+    @abstractmethod
+    def update(self, key: str, func):
+        """Atomically read-modify-write one key.
+
+        ``func(current)`` gets the current value (None if missing) and
+        returns ``(new_value, ttl, result)``. ``new_value`` None leaves the
+        key untouched. Returns ``result``.
+        """
+
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data: OrderedDict = OrderedDict()  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _get(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key, value, ttl, now):
+        self._data[key] = (value, now + ttl if ttl else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key, time.time())
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl, time.time())
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, amount=1, ttl=None):
+        with self._lock:
+            now = time.time()
+            current = self._get(key, now)
+            if current is None:
+                value = amount
+                self._set(key, value, ttl, now)
+            else:
+                value = current + amount
+                self._data[key] = (value, self._data[key][1])
+            return value
+
+    def update(self, key, func):
+        with self._lock:
+            now = time.time()
+            new_value, ttl, result = func(self._get(key, now))
+            if new_value is not None:
+                self._set(key, new_value, ttl, now)
+            return result
+
+
+class SQLiteBackend(CacheBackend):
+    """Shared store in a SQLite file; one connection per thread and process."""
+
+    PURGE_EVERY = 1000  # writes between sweeps of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entry ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entry_expires_at ON cache_entry (expires_at)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _read(self, conn, key, now):
+        row = conn.execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, now),
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _write(self, conn, key, value, ttl, now):
+        conn.execute(
+            'INSERT INTO cache_entry (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at',
+            (key, json.dumps(value), now + ttl if ttl else None),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache_entry WHERE expires_at <= ?', (now,))
+
+    def _transaction(self, fn):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn, time.time())
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    def get(self, key):
+        return self._read(self._conn(), key, time.time())
+
+    def set(self, key, value, ttl=None):
+        self._transaction(lambda conn, now: self._write(conn, key, value, ttl, now))
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM cache_entry WHERE key = ?', (key,))
+
+    def incr(self, key, amount=1, ttl=None):
+        def run(conn, now):
+            current = self._read(conn, key, now)
+            if current is None:
+                self._write(conn, key, amount, ttl, now)
+                return amount
+            conn.execute('UPDATE cache_entry SET value = ? WHERE key = ?', (json.dumps(current + amount), key))
+            return current + amount
+        return self._transaction(run)
+
+    def update(self, key, func):
+        def run(conn, now):
+            new_value, ttl, result = func(self._read(conn, key, now))
+            if new_value is not None:
+                self._write(conn, key, new_value, ttl, now)
+            return result
+        return self._transaction(run)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client; one socket per thread and process."""
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: str | None = None, timeout: float = 5.0):
+        self.host, self.port, self.db = host, port, db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db, parsed.password)
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or getattr(self._local, 'pid', None) != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._local.sock = sock
+            self._local.file = sock.makefile('rb')
+            self._local.pid = os.getpid()
+            if self.password:
+                self.execute('AUTH', self.password)
+            if self.db:
+                self.execute('SELECT', self.db)
+        return sock
+
+    def _read_reply(self):
+        line = self._local.file.readline()
+        if not line:
+            raise ConnectionError('Redis connection closed')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            # Returned, not raised, so the rest of a pipeline is still read
+            return RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._local.file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f'Unexpected reply: {line!r}')
+
+    @staticmethod
+    def _encode_command(args) -> bytes:
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f'${len(data)}\r\n'.encode() + data + b'\r\n')
+        return b''.join(parts)
+
+    def execute(self, *args):
+        return self.pipeline(args)[0]
+
+    def pipeline(self, *commands):
+        """Send several commands in one write and return their replies in order."""
+        sock = self._connection()
+        try:
+            sock.sendall(b''.join(self._encode_command(args) for args in commands))
+            replies = [self._read_reply() for _ in commands]
+        except (OSError, ConnectionError):
+            self._local.sock = None
+            raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    @staticmethod
+    def _ttl_args(ttl):
+        return ('PX', max(int(ttl * 1000), 1)) if ttl else ()
+
+    def get(self, key):
+        raw = self.execute('GET', key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.execute('SET', key, json.dumps(value), *self._ttl_args(ttl))
+
+    def delete(self, key):
+        self.execute('DEL', key)
+
+    def incr(self, key, amount=1, ttl=None):
+        if not ttl:
+            return self.execute('INCRBY', key, amount)
+        # One MULTI/EXEC round trip; NX (Redis 7+) sets the TTL only on a
+        # counter that has none, i.e. the one INCRBY just created
+        replies = self.pipeline(
+            ('MULTI',),
+            ('INCRBY', key, amount),
+            ('PEXPIRE', key, max(int(ttl * 1000), 1), 'NX'),
+            ('EXEC',),
+        )
+        value = replies[-1][0]
+        if isinstance(value, RedisError):
+            raise value
+        return value
+
+    def update(self, key, func):
+        # Optimistic transaction: retry when another client changed the key
+        while True:
+            self.execute('WATCH', key)
+            raw = self.execute('GET', key)
+            new_value, ttl, result = func(None if raw is None else json.loads(raw))
+            if new_value is None:
+                self.execute('UNWATCH')
+                return result
+            self.execute('MULTI')
+            self.execute('SET', key, json.dumps(new_value), *self._ttl_args(ttl))
+            if self.execute('EXEC') is not None:
+                return result
+
+
+class NamespacedBackend(CacheBackend):
+    """Prefixes every key so several features can share one backend."""
+
+    def __init__(self, backend: CacheBackend, prefix: str):
+        self.backend = backend
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.backend.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(self.prefix + key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(self.prefix + key)
+
+    def incr(self, key, amount=1, ttl=None):
+        return self.backend.incr(self.prefix + key, amount, ttl)
+
+    def update(self, key, func):
+        return self.backend.update(self.prefix + key, func)
+
+
+def create_backend(kind: str, url: str | None = None, max_entries: int = 10000) -> CacheBackend:
+    kind = (kind or 'memory').lower()
+    if kind == 'memory':
+        return MemoryBackend(max_entries=max_entries)
+    if kind == 'sqlite':
+        return SQLiteBackend(url or os.path.join(tempfile.gettempdir(), 'syllabus-tracker-cache.sqlite3'))
+    if kind == 'redis':
+        return RedisBackend.from_url(url or 'redis://localhost:6379/0')
+    raise ValueError(f'Unknown CACHE_BACKEND: {kind}')
+
+
+def get_cache_backend(namespace: str | None = None) -> CacheBackend:
+    """Return the app's configured backend, created on first use."""
+    app = current_app._get_current_object()
+    backend = app.extensions.get('cache_backend')
+    if backend is None:
+        with _backend_lock:
+            backend = app.extensions.get('cache_backend')
+            if backend is None:
+                backend = create_backend(
+                    app.config.get('CACHE_BACKEND', 'memory'),
+                    app.config.get('CACHE_URL') or None,
+                    app.config.get('CACHE_MAX_ENTRIES', 10000),
+                )
+                app.extensions['cache_backend'] = backend
+    return NamespacedBackend(backend, namespace + ':') if namespace else backend
@@ -0,0 +1,435 @@
+"""Deterministic synthetic datasets for load tests and benchmarks.
+
+generate_dataset() fills an empty database with a whole institution at a
+chosen scale. Scale 1.0 is production size: 8 departments, 500 faculty,
+100k students, 10k subjects, 500k topics, about 600k enrollments, 5M
+TopicProgress rows, 200k comments, 1M activity log entries and 200k
+notifications. Smaller scales shrink every table proportionally.
+
+The data is skewed the way real data is: departments, teachers and
+subjects follow Zipf-like popularity, topic counts per subject are
+log-normal, a minority of students and staff produce most of the activity
+and activity clusters in recent weeks. Every table is drawn from its own
+random stream derived from ``seed``, so the same seed and scale always
+produce the same rows. Ids are assigned here rather than by the database,
+rows are streamed in batches through executemany (COPY on PostgreSQL with
+psycopg2) and subject counters are written with the subjects instead of
+being rebuilt afterwards.
+
+All users share DEFAULT_PASSWORD; dataset_email() gives the login of any
+generated user.
+"""
+import csv
+import io
+import json
+import random
+from datetime import date, datetime, timedelta
+from itertools import islice
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import (
+    AcademicYear, ActivityLog, Comment, Course, Department, Enrollment,
+    Notification, Subject, Topic, TopicProgress, User,
+)
+from app.services.topics import ORDER_GAP
+
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_PASSWORD = 'Password123!'
+
+# Row counts at scale 1.0
+BASE_COUNTS = {
+    'teachers': 500,
+    'coordinators': 4,
+    'students': 100_000,
+    'subjects': 10_000,
+    'topics': 500_000,
+    'enrollments_per_student': 6,
+    'topic_progress': 5_000_000,
+    'comments': 200_000,
+    'activity_logs': 1_000_000,
+    'notifications': 200_000,
+}
+
+DEPARTMENTS = [
+    ('Computer Science', 'CSE'), ('Electronics', 'ECE'), ('Information Technology', 'IT'),
+    ('Mechanical', 'MECH'), ('Electrical', 'EEE'), ('Civil', 'CIVIL'),
+    ('Chemical', 'CHEM'), ('Biotechnology', 'BIO'),
+]
+SEMESTERS = 8
+HOURS_PER_TOPIC = 3
+
+# Dataset clock, fixed so that reruns produce identical timestamps
+TERM_START = date(2024, 8, 1)
+AS_OF = datetime(2025, 1, 31, 12, 0)
+
+ACTIONS = ('login', 'view_subject', 'update_progress', 'cover_topic', 'comment', 'export_report')
+ACTION_WEIGHTS = (30, 40, 15, 5, 7, 3)
+
+
+class DatasetError(RuntimeError):
+    pass
+
+
+def dataset_counts(scale: float = 1.0) -> dict:
+    """Target row counts for ``scale``; small scales keep at least one of each."""
+    if scale <= 0:
+        raise DatasetError('scale must be positive')
+    counts = {key: max(1, round(value * scale)) for key, value in BASE_COUNTS.items()}
+    counts['enrollments_per_student'] = BASE_COUNTS['enrollments_per_student']
+    counts['departments'] = min(len(DEPARTMENTS), max(1, counts['subjects'] // 20))
+    counts['teachers'] = max(counts['teachers'], counts['departments'])
+    counts['topics'] = max(counts['topics'], counts['subjects'])
+    return counts
+
+
+def dataset_email(role: str, number: int = 1, department: str | None = None) -> str:
+    """Login email of the ``number``-th generated user of ``role`` (1-based).
+
+    HODs are addressed by department code instead of number.
+    """
+    if role == 'hod':
+        return f'hod.{(department or DEPARTMENTS[0][1]).lower()}@example.edu'
+    return f'{role}{number}@example.edu'
+
+
+def _stream(seed, name):
+    return random.Random(f'{seed}:{name}')
+
+
+def _cumulative(weights):
+    total, out = 0.0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def _zipf(n, exponent=1.1):
+    return _cumulative(1.0 / (rank ** exponent) for rank in range(1, n + 1))
+
+
+def _split(total, weights):
+    """Integers proportional to ``weights``, each at least one, summing to ``total``."""
+    scale = sum(weights)
+    sizes = [max(1, int(total * w / scale)) for w in weights]
+    i = 0
+    while sum(sizes) < total:
+        sizes[i % len(sizes)] += 1
+        i += 1
+    i = 0
+    while sum(sizes) > total:
+        if sizes[i % len(sizes)] > 1:
+            sizes[i % len(sizes)] -= 1
+        i += 1
+    return sizes
+
+
+def _batches(rows, size):
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class BulkWriter:
+    """Streams dict rows into tables in batches on one connection."""
+
+    def __init__(self, connection, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.connection = connection
+        self.batch_size = batch_size
+        dialect = connection.dialect
+        self.use_copy = dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+        self.quote = dialect.identifier_preparer.quote
+
+    def write(self, table, rows) -> int:
+        written = 0
+        for batch in _batches(rows, self.batch_size):
+            with self.connection.begin():
+                if self.use_copy:
+                    self._copy(table, batch)
+                else:
+                    self.connection.execute(table.insert(), batch)
+            written += len(batch)
+        return written
+
+    def _copy(self, table, batch):
+        columns = list(batch[0])
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in batch:
+            writer.writerow([_copy_value(row[c]) for c in columns])
+        buf.seek(0)
+        names = ', '.join(self.quote(c) for c in columns)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY {self.quote(table.name)} ({names}) FROM STDIN WITH (FORMAT csv)', buf)
+        finally:
+            cursor.close()
+
+
+class _Plan:
+    """Ids and shapes shared between tables, decided before any row is written."""
+
+    def __init__(self, counts, seed):
+        self.counts = counts
+        self.seed = seed
+        rng = _stream(seed, 'plan')
+        ndept = counts['departments']
+        self.departments = DEPARTMENTS[:ndept]
+        dept_weights = [1.0 / (rank ** 0.8) for rank in range(1, ndept + 1)]
+
+        # User ids: coordinators, one HOD per department, teachers, students
+        self.coordinator_ids = list(range(1, counts['coordinators'] + 1))
+        next_id = len(self.coordinator_ids) + 1
+        self.hod_ids = list(range(next_id, next_id + ndept))
+        next_id += ndept
+        teachers_per_dept = _split(counts['teachers'], dept_weights)
+        self.teacher_ids = list(range(next_id, next_id + counts['teachers']))
+        self.teacher_dept = [d for d, n in enumerate(teachers_per_dept) for _ in range(n)]
+        next_id += counts['teachers']
+        self.first_student_id = next_id
+        self.student_dept = rng.choices(range(ndept), weights=dept_weights, k=counts['students'])
+        self.student_semester = [rng.randint(1, SEMESTERS) for _ in range(counts['students'])]
+        self.user_count = next_id - 1 + counts['students']
+        self.user_cum = _zipf(self.user_count, 0.8)
+
+        # Subjects: department, semester, teacher (Zipf within the department)
+        dept_teachers = [[] for _ in range(ndept)]
+        for tid, d in zip(self.teacher_ids, self.teacher_dept):
+            dept_teachers[d].append(tid)
+        teacher_cum = [_zipf(len(ids)) for ids in dept_teachers]
+        nsub = counts['subjects']
+        self.subject_dept = rng.choices(range(ndept), weights=dept_weights, k=nsub)
+        self.subject_semester = [1 + i % SEMESTERS for i in range(nsub)]
+        self.subject_teacher = [
+            rng.choices(dept_teachers[d], cum_weights=teacher_cum[d])[0] for d in self.subject_dept
+        ]
+
+        # Topics per subject are log-normal; completion is a per-subject prefix
+        self.topic_counts = _split(counts['topics'], [rng.lognormvariate(0, 0.6) for _ in range(nsub)])
+        self.first_topic_id, next_topic = [], 1
+        for n in self.topic_counts:
+            self.first_topic_id.append(next_topic)
+            next_topic += n
+        self.completed_topics = [int(n * rng.betavariate(2, 2)) for n in self.topic_counts]
+
+        # Enrollment pools per (department, semester) with Zipf popularity
+        self.pools = {}
+        for sid, (d, sem) in enumerate(zip(self.subject_dept, self.subject_semester), start=1):
+            self.pools.setdefault((d, sem), []).append(sid)
+        self.pool_cum = {key: _zipf(len(ids), 0.9) for key, ids in self.pools.items()}
+        # Small datasets may have no subject for a department and semester
+        self.fallback_pool = {d: min((k for k in self.pools if k[0] == d), default=min(self.pools))
+                              for d in range(ndept)}
+
+        # Share of enrolled (student, topic) pairs that get a progress row
+        pairs = sum(self.topic_counts[subject_id - 1] for _, subject_id, _, _ in self._enrollment_draws())
+        self.progress_ratio = counts['topic_progress'] / max(1, pairs)
+
+    def _enrollment_draws(self):
+        """Yield (student_id, subject_id, diligence, jitter); the same on every call."""
+        rng = _stream(self.seed, 'enrollments')
+        per_student = self.counts['enrollments_per_student']
+        for i in range(self.counts['students']):
+            student_id = self.first_student_id + i
+            key = (self.student_dept[i], self.student_semester[i])
+            if key not in self.pools:
+                key = self.fallback_pool[key[0]]
+            pool = self.pools[key]
+            wanted = min(len(pool), max(1, per_student + rng.randint(-2, 2)))
+            chosen = set(pool) if wanted == len(pool) else set()
+            while len(chosen) < wanted:
+                chosen.add(rng.choices(pool, cum_weights=self.pool_cum[key])[0])
+            # Mean 1: some students keep up with every subject, some barely start
+            diligence = rng.betavariate(2, 2) * 2
+            for subject_id in sorted(chosen):
+                yield student_id, subject_id, diligence, rng.random()
+
+    def enrollments(self):
+        """Yield (student_id, subject_id, topics with progress), replayable."""
+        for student_id, subject_id, diligence, jitter in self._enrollment_draws():
+            n = self.topic_counts[subject_id - 1]
+            yield student_id, subject_id, min(n, int(n * diligence * self.progress_ratio + jitter))
+
+
+def _user_rows(plan, password_hash):
+    created = datetime(2024, 7, 1)
+    for n, uid in enumerate(plan.coordinator_ids, start=1):
+        yield {'id': uid, 'name': f'Coordinator {n}', 'email': dataset_email('coordinator', n), 'role': 'coordinator',
+               'department': None, 'password_hash': password_hash, 'is_active': True, 'created_at': created}
+    for (name, code), uid in zip(plan.departments, plan.hod_ids):
+        yield {'id': uid, 'name': f'Head of {name}', 'email': dataset_email('hod', department=code), 'role': 'hod',
+               'department': code, 'password_hash': password_hash, 'is_active': True, 'created_at': created}
+    for n, (uid, d) in enumerate(zip(plan.teacher_ids, plan.teacher_dept), start=1):
+        yield {'id': uid, 'name': f'Teacher {n}', 'email': dataset_email('teacher', n), 'role': 'teacher',
+               'department': plan.departments[d][1], 'password_hash': password_hash, 'is_active': True,
+               'created_at': created}
+    rng = _stream(plan.seed, 'students')
+    for i, d in enumerate(plan.student_dept):
+        yield {'id': plan.first_student_id + i, 'name': f'Student {i + 1}', 'email': dataset_email('student', i + 1),
+               'role': 'student', 'department': plan.departments[d][1], 'password_hash': password_hash,
+               'is_active': rng.random() > 0.02, 'created_at': created + timedelta(minutes=i)}
+
+
+def _subject_rows(plan):
+    created = datetime(2024, 7, 15)
+    for i in range(plan.counts['subjects']):
+        code = plan.departments[plan.subject_dept[i]][1]
+        yield {'id': i + 1, 'name': f'{code} Subject {i + 1}', 'code': f'{code}{i + 1:05d}',
+               'teacher_id': plan.subject_teacher[i], 'course_id': plan.subject_dept[i] + 1,
+               'academic_year_id': 1, 'semester': plan.subject_semester[i], 'credits': 3 + i % 2,
+               'total_hours': plan.topic_counts[i] * HOURS_PER_TOPIC, 'is_active': True, 'created_at': created,
+               'topic_count': plan.topic_counts[i], 'completed_topic_count': plan.completed_topics[i],
+               'completed_hours': plan.completed_topics[i] * HOURS_PER_TOPIC}
+
+
+def _topic_rows(plan):
+    created = datetime(2024, 7, 20)
+    for i, n in enumerate(plan.topic_counts):
+        first = plan.first_topic_id[i]
+        done = plan.completed_topics[i]
+        for j in range(n):
+            expected = TERM_START + timedelta(days=(j * 120) // n)
+            yield {'id': first + j, 'subject_id': i + 1, 'name': f'Topic {j + 1}', 'order': (j + 1) * ORDER_GAP,
+                   'hours_allocated': HOURS_PER_TOPIC, 'expected_date': expected, 'is_completed': j < done,
+                   'completed_date': expected if j < done else None, 'created_at': created}
+
+
+def _enrollment_rows(plan):
+    for student_id, subject_id, progressed in plan.enrollments():
+        n = plan.topic_counts[subject_id - 1]
+        yield {'student_id': student_id, 'subject_id': subject_id, 'enrolled_at': datetime(2024, 8, 1),
+               'status': 'active', 'progress': round(100.0 * progressed / n, 1)}
+
+
+def _progress_rows(plan):
+    rng = _stream(plan.seed, 'progress')
+    next_id = 1
+    limit = plan.counts['topic_progress']
+    for student_id, subject_id, progressed in plan.enrollments():
+        first = plan.first_topic_id[subject_id - 1]
+        for j in range(progressed):
+            if next_id > limit:
+                return
+            done = rng.random() < 0.9
+            completed_at = datetime(2024, 8, 1) + timedelta(days=rng.randint(0, 180)) if done else None
+            yield {'id': next_id, 'topic_id': first + j, 'student_id': student_id, 'is_completed': done,
+                   'completed_at': completed_at, 'created_at': datetime(2024, 8, 1), 'updated_at': datetime(2024, 8, 1)}
+            next_id += 1
+
+
+def _active_user(rng, plan):
+    """A user id drawn so that a small minority of users accounts for most rows."""
+    rank = rng.choices(range(plan.user_count), cum_weights=plan.user_cum)[0]
+    # Scatter the busiest ranks across roles instead of the lowest ids
+    return rank * 7919 % plan.user_count + 1
+
+
+def _recent(rng):
+    return AS_OF - timedelta(seconds=int(rng.expovariate(1 / (21 * 86400))) % (180 * 86400))
+
+
+def _comment_rows(plan):
+    rng = _stream(plan.seed, 'comments')
+    subject_cum = _zipf(plan.counts['subjects'])
+    last_on_topic = {}
+    for cid in range(1, plan.counts['comments'] + 1):
+        subject = rng.choices(range(plan.counts['subjects']), cum_weights=subject_cum)[0]
+        topic_id = plan.first_topic_id[subject] + rng.randrange(plan.topic_counts[subject])
+        parent = last_on_topic.get(topic_id) if rng.random() < 0.3 else None
+        last_on_topic[topic_id] = cid
+        created = _recent(rng)
+        yield {'id': cid, 'topic_id': topic_id, 'user_id': _active_user(rng, plan), 'content': f'Comment {cid}',
+               'parent_id': parent, 'created_at': created, 'updated_at': created}
+
+
+def _activity_rows(plan):
+    rng = _stream(plan.seed, 'activity')
+    for lid in range(1, plan.counts['activity_logs'] + 1):
+        action = rng.choices(ACTIONS, weights=ACTION_WEIGHTS)[0]
+        subject_id = rng.randint(1, plan.counts['subjects'])
+        yield {'id': lid, 'user_id': _active_user(rng, plan), 'action': action, 'entity_type': 'subject',
+               'entity_id': subject_id, 'details': {'subject_id': subject_id},
+               'ip_address': f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+               'created_at': _recent(rng)}
+
+
+def _notification_rows(plan):
+    rng = _stream(plan.seed, 'notifications')
+    for nid in range(1, plan.counts['notifications'] + 1):
+        yield {'id': nid, 'user_id': _active_user(rng, plan), 'title': 'Topic covered',
+               'message': f'A topic in one of your subjects was covered ({nid}).',
+               'is_read': rng.random() < 0.7, 'created_at': _recent(rng)}
+
+
+def _reset_sequences(connection, tables):
+    if connection.dialect.name != 'postgresql':
+        return
+    quote = connection.dialect.identifier_preparer.quote
+    with connection.begin():
+        for table in tables:
+            if 'id' in table.c:
+                name = quote(table.name)
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE((SELECT MAX(id) FROM {name}), 1))"
+                ))
+
+
+def generate_dataset(scale: float = 1.0, seed: int = DEFAULT_SEED, batch_size: int = DEFAULT_BATCH_SIZE,
+                     log=None) -> dict:
+    """Fill the (empty) application database; returns rows written per table.
+
+    Needs an application context. ``log`` is called with a message after
+    each table. Raises DatasetError when users already exist, since
+    generated ids would collide with them.
+    """
+    counts = dataset_counts(scale)
+    if db.session.execute(select(func.count()).select_from(User.__table__)).scalar():
+        raise DatasetError('database already has users; generate into an empty database')
+    db.session.remove()
+    plan = _Plan(counts, seed)
+    password_hash = generate_password_hash(DEFAULT_PASSWORD)
+
+    stages = [
+        (AcademicYear.__table__, lambda: [{'id': 1, 'year': '2024-2025', 'is_current': True, 'start_date': TERM_START,
+                                           'end_date': date(2025, 5, 31), 'created_at': datetime(2024, 7, 1)}]),
+        (User.__table__, lambda: _user_rows(plan, password_hash)),
+        (Department.__table__, lambda: [{'id': d + 1, 'name': name, 'code': code, 'hod_id': plan.hod_ids[d],
+                                         'created_at': datetime(2024, 7, 1)}
+                                        for d, (name, code) in enumerate(plan.departments)]),
+        (Course.__table__, lambda: [{'id': d + 1, 'name': f'B.Tech {name}', 'code': f'BT-{code}', 'department_id': d + 1,
+                                     'total_semesters': SEMESTERS, 'created_at': datetime(2024, 7, 1)}
+                                    for d, (name, code) in enumerate(plan.departments)]),
+        (Subject.__table__, lambda: _subject_rows(plan)),
+        (Topic.__table__, lambda: _topic_rows(plan)),
+        (Enrollment.__table__, lambda: _enrollment_rows(plan)),
+        (TopicProgress.__table__, lambda: _progress_rows(plan)),
+        (Comment.__table__, lambda: _comment_rows(plan)),
+        (ActivityLog.__table__, lambda: _activity_rows(plan)),
+        (Notification.__table__, lambda: _notification_rows(plan)),
+    ]
+    written = {}
+    with db.engine.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA synchronous = OFF')
+        writer = BulkWriter(connection, batch_size)
+        for table, rows in stages:
+            written[table.name] = writer.write(table, rows())
+            if log:
+                log(f'{table.name}: {written[table.name]} rows')
+        _reset_sequences(connection, [table for table, _ in stages])
+    return written
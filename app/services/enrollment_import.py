@@ -0,0 +1,99 @@
+import codecs
+import csv
+from itertools import islice
+from app import db
+from app.models import User, Enrollment
+from app.services.analytics import invalidate_dashboard_reports
+from app.services.sync import record_changes
+
+# Rows resolved per batch; keeps IN lists under SQLite's parameter limit
+IMPORT_CHUNK_SIZE = 500
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _numbered_emails(reader):
+    """Yield (row number, normalized email) for each non-blank CSV row."""
+    for line_no, row in enumerate(reader, start=1):
+        if not row:
+            continue
+        email = row[0].strip().lower()
+        if not email:
+            continue
+        if line_no == 1 and email == 'email':
+            continue  # header row from the download template
+        yield line_no, email
+
+
+def import_enrollments_csv(subject_id: int, stream, include_rows: bool = True) -> dict:
+    """Enroll the students listed in a CSV byte stream (email in column one).
+
+    The file is decoded and parsed incrementally and handled in chunks of
+    IMPORT_CHUNK_SIZE rows: one query resolves the chunk's emails, one finds
+    existing enrollments, and one executemany INSERT adds the rest, so
+    memory stays flat and round trips grow with chunks rather than rows.
+    Returns counts plus, when ``include_rows`` is set, a per-row report.
+    The caller commits.
+    """
+    reader = csv.reader(codecs.iterdecode(stream, 'utf-8-sig', errors='ignore'))
+    enrollment_table = Enrollment.__table__
+    seen_students = set()
+    report = {'added': 0, 'skipped': 0, 'invalid': 0}
+    rows = [] if include_rows else None
+
+    def record(line_no, email, status, reason=None):
+        report[status] += 1
+        if rows is not None:
+            entry = {'row': line_no, 'email': email, 'status': status}
+            if reason:
+                entry['reason'] = reason
+            rows.append(entry)
+
+    for chunk in _chunks(_numbered_emails(reader), IMPORT_CHUNK_SIZE):
+        emails = {email for _, email in chunk if '@' in email}
+        users = {
+            email: (uid, role)
+            for uid, email, role in db.session.query(User.id, User.email, User.role)
+            .filter(User.email.in_(emails), User.is_active == True)  # noqa: E712
+        } if emails else {}
+        student_ids = {uid for uid, role in users.values() if role == 'student'}
+        enrolled = {
+            sid for (sid,) in db.session.query(Enrollment.student_id)
+            .filter(Enrollment.subject_id == subject_id, Enrollment.student_id.in_(student_ids))
+        } if student_ids else set()
+
+        new_rows = []
+        for line_no, email in chunk:
+            if '@' not in email:
+                record(line_no, email, 'invalid', 'not an email address')
+                continue
+            user = users.get(email)
+            if not user:
+                record(line_no, email, 'skipped', 'no active user with this email')
+            elif user[1] != 'student':
+                record(line_no, email, 'skipped', 'user is not a student')
+            elif user[0] in enrolled:
+                record(line_no, email, 'skipped', 'already enrolled')
+            elif user[0] in seen_students:
+                record(line_no, email, 'skipped', 'duplicate row')
+            else:
+                seen_students.add(user[0])
+                new_rows.append({'subject_id': subject_id, 'student_id': user[0]})
+                record(line_no, email, 'added')
+        if new_rows:
+            db.session.execute(enrollment_table.insert(), new_rows)
+            # Core inserts skip the ChangeLog flush hook
+            record_changes('enrollment', new_rows)
+
+    if report['added']:
+        invalidate_dashboard_reports()
+    if rows is not None:
+        report['rows'] = rows
+    return report
@@ -0,0 +1,144 @@
+"""Sparse fieldsets and embedded resources for the JSON API.
+
+A listing endpoint accepts two optional query parameters:
+
+* ``fields=id,name,code`` limits each item to those fields (``id`` is
+  always returned). Without it the endpoint's default fields are used.
+* ``include=teacher,enrollment_counts`` embeds related resources as
+  nested objects, e.g. ``"teacher": {"id": 3, "name": ...}``.
+
+``Fieldset.project(args)`` turns both into a ``Projection``: the labelled
+columns to select and a ``shape(row)`` that builds the item dict. Every
+field and include is a column expression (joined columns, counters or
+correlated counts), so the caller adds them to its one projected query
+and asking for more never costs another round trip.
+"""
+from sqlalchemy import func, select
+from app.models import Enrollment, Subject, Topic, User
+
+
+class FieldsetError(ValueError):
+    """Raised for unknown names in ``fields=`` or ``include=``."""
+
+
+def _names(value) -> list[str]:
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class Projection:
+    """The columns one request selects and how a result row becomes a dict.
+
+    Labels carry ``prefix`` so two projections can share a query (a
+    subject header and its topics).
+    """
+
+    def __init__(self, fields: dict, includes: dict, prefix: str = ''):
+        self.fields = fields
+        self.includes = includes
+        self.prefix = prefix
+
+    @property
+    def columns(self) -> tuple:
+        p = self.prefix
+        columns = [column.label(p + name) for name, column in self.fields.items()]
+        for include, members in self.includes.items():
+            columns.extend(column.label(f'{p}{include}__{key}') for key, column in members.items())
+        return tuple(columns)
+
+    def shape(self, row) -> dict:
+        m, p = row._mapping, self.prefix
+        item = {name: m[p + name] for name in self.fields}
+        for include, members in self.includes.items():
+            item[include] = {key: m[f'{p}{include}__{key}'] for key in members}
+        return item
+
+
+class Fieldset:
+    """The selectable fields and includes of one API resource.
+
+    ``fields`` and each include map output names to column expressions;
+    ``default`` lists the fields returned when ``fields=`` is absent.
+    """
+
+    def __init__(self, fields: dict, default: tuple, includes: dict | None = None):
+        self.fields = fields
+        self.default = default
+        self.includes = includes or {}
+
+    def project(self, args, prefix: str = '', fields_param: str = 'fields',
+                include_param: str = 'include') -> Projection:
+        """Projection for request-style ``args``; raises FieldsetError."""
+        names = _names(args.get(fields_param)) or list(self.default)
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise FieldsetError(f"unknown {fields_param}: {', '.join(unknown)} "
+                                f"(allowed: {', '.join(self.fields)})")
+        includes = _names(args.get(include_param))
+        unknown = [name for name in includes if name not in self.includes]
+        if unknown:
+            allowed = ', '.join(self.includes) or 'none'
+            raise FieldsetError(f"unknown {include_param}: {', '.join(unknown)} (allowed: {allowed})")
+        # id first, then the requested order; duplicates are ignored
+        selected = dict.fromkeys(['id', *names])
+        return Projection(
+            {name: self.fields[name] for name in selected},
+            {name: self.includes[name] for name in dict.fromkeys(includes)},
+            prefix,
+        )
+
+
+def _enrollment_count(*criteria):
+    """Correlated count of the enclosing subject's enrollments (uses the
+    (subject_id, student_id) index, so it stays per-row cheap)."""
+    return (select(func.count()).select_from(Enrollment)
+            .where(Enrollment.subject_id == Subject.id, *criteria)
+            .correlate(Subject).scalar_subquery())
+
+
+# Both need Subject outer-joined to its teacher (User)
+SUBJECT_INCLUDES = {
+    'teacher': {'id': User.id, 'name': User.name, 'email': User.email, 'department': User.department},
+    # Denormalized counters on Subject, no join needed
+    'topic_counts': {
+        'total': Subject.topic_count,
+        'completed': Subject.completed_topic_count,
+        'completed_hours': Subject.completed_hours,
+    },
+    'enrollment_counts': {
+        'total': _enrollment_count(),
+        'active': _enrollment_count(Enrollment.status == 'active'),
+    },
+}
+
+SUBJECT_FIELDSET = Fieldset(
+    {
+        'id': Subject.id,
+        'name': Subject.name,
+        'code': Subject.code,
+        'description': Subject.description,
+        'semester': Subject.semester,
+        'credits': Subject.credits,
+        'total_hours': Subject.total_hours,
+        'is_active': Subject.is_active,
+        'created_at': Subject.created_at,
+        'teacher_id': Subject.teacher_id,
+        'teacher_name': User.name,
+    },
+    ('id', 'name', 'code', 'teacher_id', 'teacher_name', 'is_active'),
+    SUBJECT_INCLUDES,
+)
+
+TOPIC_FIELDSET = Fieldset(
+    {
+        'id': Topic.id,
+        'name': Topic.name,
+        'description': Topic.description,
+        'order': Topic.order,
+        'hours_allocated': Topic.hours_allocated,
+        'expected_date': Topic.expected_date,
+        'completed_date': Topic.completed_date,
+        'is_completed': Topic.is_completed,
+        'created_at': Topic.created_at,
+    },
+    ('id', 'name', 'order', 'is_completed', 'expected_date'),
+)
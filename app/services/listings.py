@@ -0,0 +1,126 @@
+from sqlalchemy import or_
+from app.models import User, Subject
+from app.services.pagination import PaginationError, keyset_page, page_size, prefix_pattern
+from app.services.read_models import (
+    SUBJECT_COLUMNS, USER_COLUMNS, SubjectRow, UserRow, select_rows, to_rows,
+)
+
+# Sortable columns per listing; each has a (column, id) index that yields the
+# page order (see __table_args__ on User and Subject)
+USER_SORTS = {
+    'name': User.name,
+    'email': User.email,
+    'role': User.role,
+    'department': User.department,
+    'created_at': User.created_at,
+}
+SUBJECT_SORTS = {
+    'code': Subject.code,
+    'name': Subject.name,
+    'semester': Subject.semester,
+    'created_at': Subject.created_at,
+}
+ACTIVE_FILTERS = ('true', 'false', 'all')
+
+
+def _sort_args(args, sorts, default_sort):
+    sort = args.get('sort') or default_sort
+    if sort not in sorts:
+        raise PaginationError(f"sort must be one of: {', '.join(sorts)}")
+    direction = (args.get('dir') or 'asc').lower()
+    if direction not in ('asc', 'desc'):
+        raise PaginationError("dir must be 'asc' or 'desc'")
+    return sort, direction
+
+
+def _active_filter(query, column, value):
+    value = (value or 'all').lower()
+    if value not in ACTIVE_FILTERS:
+        raise PaginationError("active must be 'true', 'false' or 'all'")
+    if value == 'all':
+        return query
+    return query.filter(column == (value == 'true'))
+
+
+def user_query(args, default_active: str = 'all'):
+    """(query, sort, direction) of the filtered users ``list_users`` pages through."""
+    sort, direction = _sort_args(args, USER_SORTS, 'name')
+    query = select_rows(USER_COLUMNS)
+    if args.get('role'):
+        query = query.filter(User.role == args['role'])
+    if args.get('department'):
+        query = query.filter(User.department == args['department'])
+    query = _active_filter(query, User.is_active, args.get('active') or default_active)
+    q = (args.get('q') or '').strip()
+    if q:
+        pattern = prefix_pattern(q)
+        query = query.filter(or_(User.name.ilike(pattern, escape='\\'), User.email.ilike(pattern, escape='\\')))
+    return query, sort, direction
+
+
+def list_users(args, default_active: str = 'all') -> dict:
+    """One keyset page of users (UserRow) from request-style ``args``.
+
+    Filters: ``role``, ``department``, ``active`` (true/false/all) and
+    ``q``, a case-insensitive prefix of the name or email. Paging:
+    ``sort``, ``dir``, ``limit`` and ``cursor``. Raises PaginationError for
+    invalid arguments.
+    """
+    query, sort, direction = user_query(args, default_active)
+    users, next_cursor = keyset_page(
+        query, sort, USER_SORTS[sort], User.id, direction, args.get('cursor'), page_size(args.get('limit')),
+        key=lambda u: (getattr(u, sort), u.id),
+    )
+    return {'items': to_rows(UserRow, users), 'next_cursor': next_cursor, 'sort': sort, 'dir': direction}
+
+
+def subject_query(args, default_active: str = 'all', projection=None):
+    """(query, sort, direction) of the filtered subjects ``list_subjects`` pages through."""
+    sort, direction = _sort_args(args, SUBJECT_SORTS, 'code')
+    if projection is None:
+        columns = SUBJECT_COLUMNS
+    else:
+        # The cursor needs the sort value and id whatever fields were asked for
+        columns = projection.columns + (SUBJECT_SORTS[sort].label('_sort'), Subject.id.label('_id'))
+    query = select_rows(columns, Subject).outerjoin(User, Subject.teacher_id == User.id)
+    if args.get('teacher_id'):
+        query = query.filter(Subject.teacher_id == _int_arg(args, 'teacher_id'))
+    if args.get('semester'):
+        query = query.filter(Subject.semester == _int_arg(args, 'semester'))
+    if args.get('department'):
+        query = query.filter(User.department == args['department'])
+    query = _active_filter(query, Subject.is_active, args.get('active') or default_active)
+    q = (args.get('q') or '').strip()
+    if q:
+        pattern = prefix_pattern(q)
+        query = query.filter(or_(Subject.code.ilike(pattern, escape='\\'), Subject.name.ilike(pattern, escape='\\')))
+    return query, sort, direction
+
+
+def list_subjects(args, default_active: str = 'all', projection=None) -> dict:
+    """One keyset page of subjects (SubjectRow) with their teacher's name.
+
+    Filters: ``teacher_id``, ``department`` (the teacher's), ``semester``,
+    ``active`` and ``q``, a case-insensitive prefix of the code or name.
+    Paging as for ``list_users``. With a ``projection`` (see
+    app/services/fieldsets.py) only its columns are selected and the items
+    are the dicts it shapes.
+    """
+    query, sort, direction = subject_query(args, default_active, projection)
+    if projection is None:
+        key = lambda s: (getattr(s, sort), s.id)
+    else:
+        key = lambda s: (s._mapping['_sort'], s._mapping['_id'])
+    subjects, next_cursor = keyset_page(
+        query, sort, SUBJECT_SORTS[sort], Subject.id, direction, args.get('cursor'),
+        page_size(args.get('limit')), key=key,
+    )
+    items = to_rows(SubjectRow, subjects) if projection is None else [projection.shape(s) for s in subjects]
+    return {'items': items, 'next_cursor': next_cursor, 'sort': sort, 'dir': direction}
+
+
+def _int_arg(args, name):
+    try:
+        return int(args[name])
+    except (TypeError, ValueError):
+        raise PaginationError(f'{name} must be an integer')
@@ -0,0 +1,54 @@
+"""Relationship loading policy for list views.
+
+Relationships load lazily by default, which is right for a single object
+but runs one query per row when a list template touches ``e.subject`` or
+``s.teacher``. A route that renders rows declares the relationships it
+will touch as dotted paths from the queried model:
+
+    Enrollment.query.filter_by(student_id=user_id).options(
+        *load_graph(Enrollment, 'subject.teacher'))
+
+Many-to-one steps are joined into the same statement (``joinedload``),
+collections are fetched with one extra ``IN`` query per step
+(``selectinload``). With ``strict=True`` any relationship outside the
+graph raises instead of emitting SQL, so a template that starts touching
+a new relationship fails in tests rather than turning into an N+1.
+
+Dynamic relationships (``Subject.enrollments``) are query builders meant
+for paging and cannot be part of a graph.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+
+class LoadGraphError(ValueError):
+    pass
+
+
+def _relationship(model, name):
+    prop = inspect(model).relationships.get(name)
+    if prop is None:
+        raise LoadGraphError(f'{model.__name__} has no relationship {name!r}')
+    if prop.lazy == 'dynamic':
+        raise LoadGraphError(f'{model.__name__}.{name} is dynamic; query it with paging instead')
+    return prop
+
+
+def load_graph(model, *paths: str, strict: bool = False) -> list:
+    """Loader options that fetch ``paths`` (e.g. ``'subject.teacher'``) up front."""
+    options = []
+    for path in paths:
+        option, current = None, model
+        for name in path.split('.'):
+            prop = _relationship(current, name)
+            attr = getattr(current, name)
+            loader = selectinload if prop.uselist else joinedload
+            option = loader(attr) if option is None else getattr(option, loader.__name__)(attr)
+            current = prop.mapper.class_
+            if strict:
+                options.append(option.raiseload('*', sql_only=True))
+        options.append(option)
+    if strict:
+        # Undeclared relationships may still come from the identity map, never from SQL
+        options.append(raiseload('*', sql_only=True))
+    return options
@@ -0,0 +1,133 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import DateTime, and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class PaginationError(ValueError):
+    """Raised for invalid paging arguments, e.g. a cursor issued for a different sort."""
+
+
+def encode_cursor(sort: str, direction: str, value, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({'s': sort, 'd': direction, 'v': value, 'id': row_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, sort: str, direction: str):
+    """Return the (value, id) a page ended on."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+        value, row_id = data['v'], int(data['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise PaginationError('invalid cursor')
+    if data.get('s') != sort or data.get('d') != direction:
+        raise PaginationError('cursor does not match the requested sort')
+    return value, row_id
+
+
+def page_size(value, default: int | None = DEFAULT_PAGE_SIZE) -> int | None:
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+# Dialects that sort NULL below every other value; PostgreSQL and Oracle sort it above
+_NULLS_LOW_DIALECTS = ('sqlite', 'mysql', 'mariadb', 'mssql')
+
+
+def _nullable(column) -> bool:
+    return getattr(getattr(column, 'expression', column), 'nullable', True)
+
+
+def _nulls_low(query) -> bool:
+    return query.session.get_bind().dialect.name in _NULLS_LOW_DIALECTS
+
+
+def _order_by(column, id_column, direction):
+    """The listing order: plain (column, id), so an index on it yields the order.
+
+    NULL sort values go where the database puts them (first ascending on
+    SQLite and MySQL, last on PostgreSQL); forcing a placement would need
+    ``column IS NULL`` or NULLS FIRST/LAST in the key, which no index serves.
+    """
+    return [column.asc(), id_column.asc()] if direction == 'asc' else [column.desc(), id_column.desc()]
+
+
+def _after(column, id_column, direction, value, row_id, nulls_low=True):
+    """Rows strictly after (value, row_id) in the order of ``_order_by``.
+
+    ``nulls_low`` says whether the database sorts NULL below other values.
+    """
+    asc = direction == 'asc'
+    nulls_first = nulls_low == asc
+    tie = id_column > row_id if asc else id_column < row_id
+    if value is None:
+        after = and_(column.is_(None), tie)
+        return or_(after, column.isnot(None)) if nulls_first else after
+    after = or_(column > value if asc else column < value, and_(column == value, tie))
+    return or_(after, column.is_(None)) if _nullable(column) and not nulls_first else after
+
+
+def _parse_value(column, value):
+    if value is not None and isinstance(getattr(column, 'type', None), DateTime):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise PaginationError('invalid cursor')
+    return value
+
+
+def keyset_query(query, sort: str, column, id_column, direction: str = 'asc',
+                 cursor: str | None = None, limit: int | None = DEFAULT_PAGE_SIZE):
+    """The query ``keyset_page`` runs for one page.
+
+    ``query`` filtered to the rows after ``cursor``, in page order and
+    limited to one row more than ``limit``, which tells whether a next page
+    exists.
+    """
+    if direction not in ('asc', 'desc'):
+        raise PaginationError("direction must be 'asc' or 'desc'")
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort, direction)
+        query = query.filter(_after(column, id_column, direction, _parse_value(column, value), row_id,
+                                    _nulls_low(query)))
+    query = query.order_by(*_order_by(column, id_column, direction))
+    return query if limit is None else query.limit(limit + 1)
+
+
+def keyset_page(query, sort: str, column, id_column, direction: str = 'asc',
+                cursor: str | None = None, limit: int | None = DEFAULT_PAGE_SIZE, key=None):
+    """Fetch one page of ``query`` ordered by (column, id_column).
+
+    Instead of OFFSET, the next page starts from the last row's sort value
+    and id carried in an opaque cursor, so with an index on (column, id)
+    every page costs the same as the first. ``key(row)`` returns
+    (sort value, id) for a result row. Returns (rows, next_cursor), with
+    next_cursor None on the last page. ``limit`` None returns every
+    remaining row.
+    """
+    query = keyset_query(query, sort, column, id_column, direction, cursor, limit)
+    if limit is None:
+        return query.all(), None
+    rows = query.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        value, row_id = key(rows[-1])
+        next_cursor = encode_cursor(sort, direction, value, row_id)
+    return rows, next_cursor
+
+
+def prefix_pattern(text: str) -> str:
+    """LIKE pattern matching values that start with ``text`` literally."""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
@@ -1,14 +1,48 @@
+from sqlalchemy import func, select
+from app import db
 from app.models import Topic, Subject
 
-def subject_progress(subject: Subject) -> float:
-    """Return percent (0-100) of completed topics for a subject."""
-    topics = subject.topics.order_by(Topic.order.asc()).all()
-    total = len(topics)
+
+def _percent(completed: int, total: int) -> float:
     if not total:
         return 0.0
-    completed = sum(1 for t in topics if t.is_completed)
     return round(completed / total * 100, 1)
 
+
+def subjects_progress(subject_ids) -> dict[int, dict]:
+    """Return completed/total/percent for many subjects in one query.
+
+    Reads the denormalized counters on ``Subject`` by primary key, so the
+    cost does not depend on how many topics each subject has. The result
+    maps every requested subject id to
+    ``{'completed': int, 'total': int, 'percent': float}``; unknown subjects
+    report zeros.
+    """
+    ids = {int(i) for i in subject_ids if i is not None}
+    if not ids:
+        return {}
+    rows = (
+        db.session.query(Subject.id, Subject.topic_count, Subject.completed_topic_count)
+        .filter(Subject.id.in_(ids))
+        .all()
+    )
+    result = {sid: {'completed': 0, 'total': 0, 'percent': 0.0} for sid in ids}
+    for subject_id, total, completed in rows:
+        total = total or 0
+        completed = completed or 0
+        result[subject_id] = {
+            'completed': completed,
+            'total': total,
+            'percent': _percent(completed, total),
+        }
+    return result
+
+
+def subject_progress(subject: Subject) -> float:
+    """Return percent (0-100) of completed topics for a subject."""
+    return subject.progress_percent
+
+
 def topics_progress(topics) -> float:
     """Return progress percent for an iterable of Topic objects."""
     topics_list = list(topics)
@@ -16,4 +50,40 @@ def topics_progress(topics) -> float:
     if not total:
         return 0.0
     completed = sum(1 for t in topics_list if t.is_completed)
-    return round(completed / total * 100, 1)
\ No newline at end of file
+    return _percent(completed, total)
+
+
+def rebuild_subject_counters(subject_ids=None) -> int:
+    """Recompute Subject topic counters from the Topic table.
+
+    Rebuilds every subject when ``subject_ids`` is None. Used by the repair
+    script and by bulk topic statements that bypass the ORM flush hooks.
+    Returns the number of subjects updated; the caller commits.
+    """
+    subject = Subject.__table__
+    topic = Topic.__table__
+    done = topic.c.is_completed == True  # noqa: E712
+
+    def _scalar(expr, *criteria):
+        return (
+            select(func.coalesce(expr, 0))
+            .where(topic.c.subject_id == subject.c.id, *criteria)
+            .scalar_subquery()
+        )
+
+    stmt = subject.update().values(
+        topic_count=_scalar(func.count(topic.c.id)),
+        completed_topic_count=_scalar(func.count(topic.c.id), done),
+        completed_hours=_scalar(func.sum(topic.c.hours_allocated), done),
+    )
+    if subject_ids is not None:
+        ids = {int(i) for i in subject_ids if i is not None}
+        if not ids:
+            return 0
+        stmt = stmt.where(subject.c.id.in_(ids))
+    db.session.flush()
+    result = db.session.execute(stmt)
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Subject):
+            db.session.expire(obj, ['topic_count', 'completed_topic_count', 'completed_hours'])
+    return result.rowcount
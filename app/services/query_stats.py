@@ -0,0 +1,134 @@
+"""Per-request SQL statistics and N+1 detection.
+
+SQLAlchemy engine events count the statements each Flask request runs,
+their total time, and how often each statement shape (the SQL text with
+bound parameters, so ``WHERE id = ?`` for every id) repeats. Each
+response carries ``X-Query-Count`` and a ``Server-Timing`` db entry, and
+one JSON log line is written per request: at WARNING level when the
+request exceeded QUERY_BUDGET statements or ran one shape more than
+QUERY_REPEAT_THRESHOLD times (the N+1 signature), at DEBUG otherwise.
+The log line is written when the request context is torn down, after a
+streamed body has been generated, so it counts the statements the body
+ran; the headers go out before the body and only count those run so far.
+
+The per-statement work is a perf_counter call and a dict increment, so
+it is meant to stay on in production; QUERY_STATS_ENABLED turns it off.
+"""
+import json
+import logging
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_listeners_installed = False
+
+# Longest statement text kept in log lines
+LOG_STATEMENT_CHARS = 300
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'shapes', 'status')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: dict[str, int] = {}
+        self.status: int | None = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement] = self.shapes.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes run more than ``threshold`` times, most frequent first."""
+        hits = [(sql, n) for sql, n in self.shapes.items() if n > threshold]
+        return sorted(hits, key=lambda item: item[1], reverse=True)
+
+
+def current_query_stats() -> QueryStats | None:
+    """Stats of the request being handled, or None outside a tracked request."""
+    if not has_request_context():
+        return None
+    return g.get('_query_stats')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_query_stats() is not None:
+        conn.info.setdefault('_query_stats_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats()
+    starts = conn.info.get('_query_stats_start')
+    if stats is None or not starts:
+        return
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+
+def _install_listeners() -> None:
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listeners_installed = True
+
+
+def _shorten(statement: str) -> str:
+    text = ' '.join(statement.split())
+    return text if len(text) <= LOG_STATEMENT_CHARS else text[:LOG_STATEMENT_CHARS] + '...'
+
+
+def init_query_stats(app) -> None:
+    """Track SQL statements per request for ``app`` (see module docstring)."""
+    if not app.config.get('QUERY_STATS_ENABLED', True):
+        return
+    _install_listeners()
+
+    @app.before_request
+    def _start_query_stats():
+        g._query_stats = QueryStats()
+
+    @app.after_request
+    def _query_stats_headers(response):
+        stats = g.get('_query_stats')
+        if stats is None:
+            return response
+        stats.status = response.status_code
+        db_ms = round(stats.duration * 1000, 2)
+        response.headers['X-Query-Count'] = str(stats.count)
+        response.headers.add('Server-Timing', f'db;dur={db_ms};desc="{stats.count} queries"')
+        return response
+
+    @app.teardown_request
+    def _report_query_stats(exc):
+        # Runs once a streamed body is exhausted (stream_with_context keeps
+        # the request context until then), so its statements are included
+        stats = g.pop('_query_stats', None)
+        if stats is None:
+            return
+        db_ms = round(stats.duration * 1000, 2)
+        budget = app.config.get('QUERY_BUDGET', 50)
+        threshold = app.config.get('QUERY_REPEAT_THRESHOLD', 10)
+        repeated = stats.repeated(threshold)
+        problems = []
+        if budget and stats.count > budget:
+            problems.append('over_budget')
+        if repeated:
+            problems.append('repeated_statement')
+        level = logging.WARNING if problems else logging.DEBUG
+        if app.logger.isEnabledFor(level):
+            record = {
+                'event': 'sql_queries',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': stats.status if exc is None else 500,
+                'queries': stats.count,
+                'db_ms': db_ms,
+                'budget': budget,
+                'problems': problems,
+                'repeated': [{'count': n, 'statement': _shorten(sql)} for sql, n in repeated[:5]],
+            }
+            app.logger.log(level, json.dumps(record))
@@ -1,14 +1,81 @@
+import ipaddress
+import math
 import time
-from collections import deque, defaultdict
 from functools import wraps
 from flask import request, abort, current_app
+from flask_login import current_user
+from app.services.cache_backend import get_cache_backend
 
-# Simple in-memory rate limiter: not suitable for multi-process/production
-# Keyed by (IP, endpoint)
-_BUCKETS: dict[tuple[str, str], deque] = defaultdict(deque)
+# GCRA (generic cell rate algorithm) limiter. Each key stores a single float,
+# its theoretical arrival time (TAT), in the shared cache backend with a TTL
+# equal to how long the key still matters, so idle keys expire on their own
+# and the in-memory backend's LRU bound caps the total. With CACHE_BACKEND
+# set to sqlite or redis every gunicorn worker sees the same state.
 
 
-def rate_limit(limit: int = 5, window_seconds: int = 60):
+def gcra_allow(backend, key: str, limit: int, window_seconds: float, now: float | None = None):
+    """Check and record one request; return (allowed, retry_after_seconds).
+
+    Allows bursts of up to ``limit`` requests and a sustained rate of
+    ``limit`` per ``window_seconds``.
+    """
+    interval = window_seconds / limit
+
+    def step(stored):
+        t = time.time() if now is None else now
+        tat = max(stored or t, t)
+        new_tat = tat + interval
+        if new_tat - t > window_seconds:
+            return None, None, (False, new_tat - window_seconds - t)
+        return new_tat, new_tat - t, (True, 0.0)
+
+    return backend.update(key, step)
+
+
+def _valid_ip(value: str | None) -> str | None:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return None
+
+
+def client_ip() -> str:
+    """Return the client address, trusting only TRUSTED_PROXY_COUNT proxies.
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For, so with N proxies the client is the Nth entry from the
+    right. Entries further left are client-supplied and ignored.
+    """
+    remote = _valid_ip(request.remote_addr)
+    trusted = current_app.config.get('TRUSTED_PROXY_COUNT', 0)
+    if trusted > 0:
+        hops = [h for h in request.headers.get('X-Forwarded-For', '').split(',') if h.strip()]
+        if len(hops) >= trusted:
+            forwarded = _valid_ip(hops[-trusted])
+            if forwarded:
+                return forwarded
+    return remote or 'unknown'
+
+
+def _subject(per: str) -> str:
+    if per == 'user' and current_user and current_user.is_authenticated:
+        return f'user:{current_user.get_id()}'
+    return f'ip:{client_ip()}'
+
+
+def rate_limit(limit: int = 5, window_seconds: int = 60, per: str = 'ip'):
+    """Limit a view to ``limit`` requests per ``window_seconds``.
+
+    ``per='ip'`` keys on the client address; ``per='user'`` keys on the
+    logged-in user and falls back to the address for anonymous requests.
+    Stack two decorators to enforce both.
+    """
+    if per not in ('ip', 'user'):
+        raise ValueError("per must be 'ip' or 'user'")
+
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
@@ -17,21 +84,12 @@ def rate_limit(limit: int = 5, window_seconds: int = 60):
             if cfg.get('DISABLE_RATE_LIMITS'):
                 return fn(*args, **kwargs)
 
-            ip = request.headers.get('X-Forwarded-For', request.remote_addr) or 'unknown'
-            key = (ip, request.endpoint or fn.__name__)
-            now = time.time()
-            window = window_seconds
-            q = _BUCKETS[key]
-
-            # purge old timestamps
-            while q and (now - q[0]) > window:
-                q.popleft()
-
-            if len(q) >= limit:
+            key = f'{request.endpoint or fn.__name__}|{per}|{_subject(per)}'
+            allowed, retry_after = gcra_allow(get_cache_backend('ratelimit'), key, limit, window_seconds)
+            if not allowed:
                 # Too many requests
-                abort(429)
+                abort(429, retry_after=max(1, math.ceil(retry_after)))
 
-            q.append(now)
             return fn(*args, **kwargs)
         return wrapper
     return decorator
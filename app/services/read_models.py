@@ -0,0 +1,88 @@
+"""Read models for list pages and JSON listings.
+
+A listing row only needs a handful of columns, but an ORM entity loads
+every column (``description``, ``attachments``, ``user_metadata``, ...),
+tracks its state and enters the session identity map. The row types here
+are named tuples filled from column-projected selects: the database sends
+only the listed columns, nothing is tracked, and templates read them
+with the same attribute syntax (``u.name``, ``s.teacher_name``).
+
+Each row type has a matching ``*_COLUMNS`` tuple in field order; use
+``select_rows`` to build the query and ``to_rows`` to convert its result.
+"""
+from datetime import date, datetime
+from typing import NamedTuple
+from app import db
+from app.models import Enrollment, Subject, Topic, User
+
+
+class UserRow(NamedTuple):
+    id: int
+    name: str
+    email: str
+    role: str
+    department: str | None
+    is_active: bool | None
+    created_at: datetime | None
+
+
+USER_COLUMNS = (User.id, User.name, User.email, User.role, User.department, User.is_active, User.created_at)
+
+
+class SubjectRow(NamedTuple):
+    id: int
+    name: str
+    code: str | None
+    semester: int | None
+    is_active: bool | None
+    created_at: datetime | None
+    teacher_id: int
+    teacher_name: str | None
+
+
+# Needs an outer join to the teacher (User)
+SUBJECT_COLUMNS = (Subject.id, Subject.name, Subject.code, Subject.semester, Subject.is_active,
+                   Subject.created_at, Subject.teacher_id, User.name.label('teacher_name'))
+
+
+class SubjectOptionRow(NamedTuple):
+    """A subject in a select box."""
+    id: int
+    code: str | None
+    name: str
+
+
+SUBJECT_OPTION_COLUMNS = (Subject.id, Subject.code, Subject.name)
+
+
+class TopicRow(NamedTuple):
+    id: int
+    name: str
+    order: int
+    is_completed: bool | None
+    expected_date: date | None
+
+
+TOPIC_COLUMNS = (Topic.id, Topic.name, Topic.order, Topic.is_completed, Topic.expected_date)
+
+
+class EnrollmentRow(NamedTuple):
+    student_id: int
+    name: str
+    email: str
+    status: str | None
+    enrolled_at: datetime | None
+
+
+# Needs a join to the student (User)
+ENROLLMENT_COLUMNS = (User.id, User.name, User.email, Enrollment.status, Enrollment.enrolled_at)
+
+
+def select_rows(columns, from_entity=None):
+    """A query for ``columns`` only; its results are plain rows, not entities."""
+    query = db.session.query(*columns)
+    return query.select_from(from_entity) if from_entity is not None else query
+
+
+def to_rows(row_type, result) -> list:
+    return [row_type._make(row) for row in result]
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from app import db
+from app.models import ReportCache
+from app.services.singleflight import KeyLock, single_flight
+
+# Returned by get_cached() on a miss, since None is a valid cached value
+MISSING = object()
+
+_purge_thread = None
+_purge_lock = threading.Lock()
+
+
+def make_cache_key(report_type: str, filters) -> str:
+    """Deterministic key for a report type and its JSON-serializable filters."""
+    canonical = json.dumps({'type': report_type, 'filters': filters}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _table():
+    return ReportCache.__table__
+
+
+def get_cached_entry(report_type: str, filters=None):
+    """Return (data, generated_at) of the unexpired entry, or MISSING."""
+    table = _table()
+    key = make_cache_key(report_type, filters)
+    stmt = (
+        select(table.c.data, table.c.generated_at)
+        .where(table.c.cache_key == key, table.c.expires_at > datetime.utcnow())
+        .order_by(table.c.generated_at.desc())
+        .limit(1)
+    )
+    with db.engine.connect() as conn:
+        row = conn.execute(stmt).first()
+    return MISSING if row is None else (row[0], row[1])
+
+
+def get_cached(report_type: str, filters=None):
+    """Return the cached data for (report_type, filters) or MISSING."""
+    entry = get_cached_entry(report_type, filters)
+    return MISSING if entry is MISSING else entry[0]
+
+
+def set_cached(report_type: str, filters, data, ttl: int | None = None):
+    """Store data for (report_type, filters) for ttl seconds and return it as stored.
+
+    Writes go through their own connection and transaction so caching never
+    commits or rolls back the caller's session. Keeps at most
+    REPORT_CACHE_MAX_ENTRIES rows, evicting expired rows first and then the
+    oldest entries.
+    """
+    cfg = current_app.config
+    ttl = ttl if ttl is not None else cfg.get('REPORT_CACHE_TTL', 600)
+    max_entries = cfg.get('REPORT_CACHE_MAX_ENTRIES', 1000)
+    table = _table()
+    key = make_cache_key(report_type, filters)
+    now = datetime.utcnow()
+    # Round-trip through JSON so unserializable values fail here, not on read
+    payload = json.loads(json.dumps(data))
+    with db.engine.begin() as conn:
+        conn.execute(table.delete().where(table.c.cache_key == key))
+        conn.execute(table.insert().values(
+            report_type=report_type,
+            cache_key=key,
+            filters=filters,
+            data=payload,
+            generated_at=now,
+            expires_at=now + timedelta(seconds=ttl),
+        ))
+        if max_entries:
+            _evict(conn, max_entries, now)
+    return payload
+
+
+def _evict(conn, max_entries: int, now: datetime) -> None:
+    table = _table()
+    count = conn.execute(select(func.count()).select_from(table)).scalar()
+    if count <= max_entries:
+        return
+    conn.execute(table.delete().where(table.c.expires_at <= now))
+    count = conn.execute(select(func.count()).select_from(table)).scalar()
+    excess = count - max_entries
+    if excess > 0:
+        ids = [r[0] for r in conn.execute(
+            select(table.c.id).order_by(table.c.generated_at.asc(), table.c.id.asc()).limit(excess)
+        )]
+        conn.execute(table.delete().where(table.c.id.in_(ids)))
+
+
+def invalidate_report(report_type: str, filters=MISSING) -> int:
+    """Drop cached rows of a report type, or only the entry for given filters."""
+    table = _table()
+    stmt = table.delete().where(table.c.report_type == report_type)
+    if filters is not MISSING:
+        stmt = stmt.where(table.c.cache_key == make_cache_key(report_type, filters))
+    with db.engine.begin() as conn:
+        return conn.execute(stmt).rowcount
+
+
+def invalidate_on_commit(*report_types: str) -> None:
+    """Drop every cached row of ``report_types`` once the session commits.
+
+    Write paths call this before they commit; nothing is dropped if the
+    transaction rolls back. This does not close every race: a report that
+    another request started computing from pre-write data before the commit
+    and stores after the delete keeps that data until its TTL (plus any
+    ``stale_ttl``) runs out.
+    """
+    db.session().info.setdefault('_invalidate_reports', set()).update(report_types)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_reports(session):
+    report_types = session.info.pop('_invalidate_reports', None)
+    if not report_types:
+        return
+    table = _table()
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.report_type.in_(sorted(report_types))))
+    except Exception as e:
+        current_app.logger.error(f"Invalidating {', '.join(sorted(report_types))} failed: {e}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_report_invalidations(session, previous_transaction):
+    session.info.pop('_invalidate_reports', None)
+
+
+def purge_expired() -> int:
+    """Delete expired cache rows and return how many were removed."""
+    table = _table()
+    with db.engine.begin() as conn:
+        return conn.execute(table.delete().where(table.c.expires_at <= datetime.utcnow())).rowcount
+
+
+def _is_fresh(entry, fresh_ttl: int) -> bool:
+    return entry is not MISSING and entry[1] + timedelta(seconds=fresh_ttl) > datetime.utcnow()
+
+
+def _refresh_in_background(app, lock, report_type, filters, fn, args, kwargs, fresh_ttl, ttl):
+    def run():
+        try:
+            with app.app_context():
+                # Another caller may have refreshed it between our read and the lock
+                if not _is_fresh(get_cached_entry(report_type, filters), fresh_ttl):
+                    set_cached(report_type, filters, fn(*args, **kwargs), ttl)
+        except Exception as e:
+            app.logger.error(f"Background refresh of {report_type} failed: {e}")
+        finally:
+            lock.release()
+
+    thread = threading.Thread(target=run, name=f'report-refresh-{report_type}', daemon=True)
+    thread.start()
+    return thread
+
+
+def cached_report(report_type: str, ttl: int | None = None, key_func=None, stale_ttl: int = 0):
+    """Cache a function's JSON-serializable result in the report_cache table.
+
+    The cache key is built from ``key_func(*args, **kwargs)`` when given,
+    otherwise from the call arguments. A cache hit returns the stored JSON
+    value, so callers always see plain dicts/lists/strings/numbers.
+
+    Misses are single-flight: one caller per key computes the result while
+    concurrent callers, in any thread or worker process, wait for it and
+    read it from the cache. With ``stale_ttl`` an entry is kept that many
+    seconds past its TTL; callers get the stale value immediately while a
+    single background thread recomputes it.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cfg = current_app.config
+            if cfg.get('DISABLE_REPORT_CACHE'):
+                return fn(*args, **kwargs)
+            fresh_ttl = ttl if ttl is not None else cfg.get('REPORT_CACHE_TTL', 600)
+            filters = key_func(*args, **kwargs) if key_func else {'args': list(args), 'kwargs': kwargs}
+            lock_key = make_cache_key(report_type, filters)
+
+            entry = get_cached_entry(report_type, filters)
+            if entry is not MISSING:
+                if _is_fresh(entry, fresh_ttl):
+                    return entry[0]
+                # Stale but within stale_ttl: serve it and let one caller refresh
+                lock = KeyLock(lock_key)
+                if lock.acquire(timeout=0):
+                    _refresh_in_background(current_app._get_current_object(), lock, report_type,
+                                           filters, fn, args, kwargs, fresh_ttl, fresh_ttl + stale_ttl)
+                return entry[0]
+
+            with single_flight(lock_key, timeout=cfg.get('SINGLE_FLIGHT_TIMEOUT', 30)):
+                entry = get_cached_entry(report_type, filters)
+                if entry is not MISSING:
+                    return entry[0]
+                return set_cached(report_type, filters, fn(*args, **kwargs), fresh_ttl + stale_ttl)
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def start_purge_thread(app) -> None:
+    """Start a daemon thread that purges expired rows every REPORT_CACHE_PURGE_INTERVAL seconds."""
+    global _purge_thread
+    interval = app.config.get('REPORT_CACHE_PURGE_INTERVAL', 300)
+    if not interval:
+        return
+    with _purge_lock:
+        if _purge_thread is not None and _purge_thread.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    with app.app_context():
+                        removed = purge_expired()
+                        if removed:
+                            app.logger.info("Purged %s expired report cache rows", removed)
+                except Exception as e:
+                    app.logger.error(f"Report cache purge failed: {e}")
+
+        _purge_thread = threading.Thread(target=run, name='report-cache-purge', daemon=True)
+        _purge_thread.start()
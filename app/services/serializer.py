@@ -0,0 +1,147 @@
+"""Central JSON serialization for API responses.
+
+``init_serializer(app)`` installs a Flask JSON provider, so ``jsonify``,
+returned dicts and ``request.get_json`` all go through one pluggable
+encoder:
+
+* ``StdlibEncoder``: the ``json`` module, always available.
+* ``OrjsonEncoder``: orjson (``pip install orjson``), several times
+  faster on large payloads.
+
+``JSON_ENCODER`` selects one (``auto``, the default, prefers orjson when
+it is installed). Both write dates and datetimes natively as ISO 8601
+(``2025-01-31``, ``2025-01-31T12:00:00``), so routes pass them through
+instead of calling ``.isoformat()`` per row, and both emit compact JSON
+with keys in insertion order.
+
+Named tuples, such as the read-model rows, encode as arrays;
+``row_dicts`` turns them (or any projected rows) into objects without
+per-field code, and ``stream_json`` writes a response whose main array is
+encoded and sent in batches while the rows are still being read.
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+from itertools import islice
+from flask import current_app, stream_with_context
+from flask.json.provider import JSONProvider
+
+# Array items encoded per chunk by stream_json
+STREAM_BATCH_SIZE = 1000
+
+
+def _default(value):
+    """Types neither encoder handles on its own."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, tuple):
+        # Named tuples (orjson rejects tuple subclasses) encode as arrays, as with json
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class StdlibEncoder:
+    name = 'stdlib'
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonEncoder:
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        # Integer dict keys become strings, as with the json module
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj) -> bytes:
+        return self._orjson.dumps(obj, default=_default, option=self._options)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+ENCODERS = {'stdlib': StdlibEncoder, 'orjson': OrjsonEncoder}
+
+
+def create_encoder(name: str = 'auto'):
+    name = (name or 'auto').lower()
+    if name == 'auto':
+        try:
+            return OrjsonEncoder()
+        except ImportError:
+            return StdlibEncoder()
+    if name not in ENCODERS:
+        raise ValueError(f'Unknown JSON_ENCODER: {name}')
+    return ENCODERS[name]()
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider backed by the configured encoder."""
+
+    def __init__(self, app, encoder=None):
+        super().__init__(app)
+        self.encoder = encoder or create_encoder(app.config.get('JSON_ENCODER', 'auto'))
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self.encoder.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return self.encoder.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encoder.dumps(obj), mimetype='application/json')
+
+
+def init_serializer(app) -> None:
+    app.json = FastJSONProvider(app)
+
+
+def get_encoder():
+    return current_app.json.encoder
+
+
+def row_dicts(rows, fields):
+    """Dicts keyed by ``fields`` for each row of a column-projected query."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def _iter_json(payload: dict, key: str, items, encoder, batch_size: int):
+    dumps = encoder.dumps
+    items = iter(items)
+    yield b'{' + dumps(key) + b':['
+    separator = b''
+    while batch := list(islice(items, batch_size)):
+        yield separator + dumps(batch)[1:-1]
+        separator = b','
+    rest = dumps(payload)
+    yield b']' + (b',' + rest[1:] if rest != b'{}' else b'}')
+
+
+def stream_json(key: str, items, payload: dict | None = None, batch_size: int = STREAM_BATCH_SIZE):
+    """Stream ``{key: [items...], **payload}`` in chunks of ``batch_size`` items.
+
+    ``items`` may be any iterable (a generator over a ``yield_per`` query),
+    so the whole array is never held in memory at once. The body is only
+    known to be complete once sent; errors while iterating end the
+    response early instead of returning an error status.
+    """
+    encoder = get_encoder()
+    chunks = _iter_json(payload or {}, key, items, encoder, batch_size)
+    resp = current_app.response_class(stream_with_context(chunks), mimetype='application/json')
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+
+_registry_lock = threading.Lock()
+_thread_locks: dict[str, list] = {}  # key -> [threading.Lock, refcount]
+
+
+def _lock_dir() -> str:
+    try:
+        from flask import current_app
+        configured = current_app.config.get('SINGLE_FLIGHT_LOCK_DIR')
+    except RuntimeError:
+        configured = None
+    path = configured or os.path.join(tempfile.gettempdir(), 'syllabus-tracker-locks')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class KeyLock:
+    """Mutual exclusion for one key across threads and worker processes.
+
+    Combines a per-key ``threading.Lock`` with an ``flock`` on a lock file
+    under SINGLE_FLIGHT_LOCK_DIR, so no external service is needed. The
+    lock may be released from a different thread than the one that
+    acquired it, which lets a background refresh take over the lock.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._entry = None
+        self._fd = None
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Acquire the lock; ``timeout=0`` tries once, None waits forever."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with _registry_lock:
+            entry = _thread_locks.setdefault(self.key, [threading.Lock(), 0])
+            entry[1] += 1
+        if not entry[0].acquire(timeout=-1 if timeout is None else max(timeout, 0)):
+            self._unref(entry)
+            return False
+        if fcntl is not None:
+            name = hashlib.sha256(self.key.encode('utf-8')).hexdigest()[:32] + '.lock'
+            fd = os.open(os.path.join(_lock_dir(), name), os.O_RDWR | os.O_CREAT, 0o600)
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        os.close(fd)
+                        entry[0].release()
+                        self._unref(entry)
+                        return False
+                    time.sleep(0.05)
+            self._fd = fd
+        self._entry = entry
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            entry[0].release()
+            self._unref(entry)
+
+    def _unref(self, entry) -> None:
+        with _registry_lock:
+            entry[1] -= 1
+            if entry[1] <= 0 and _thread_locks.get(self.key) is entry:
+                del _thread_locks[self.key]
+
+
+@contextmanager
+def single_flight(key: str, timeout: float | None = None):
+    """Context manager yielding True when the key lock was acquired.
+
+    Yields False when ``timeout`` ran out; callers then proceed without
+    coordination rather than fail the request.
+    """
+    lock = KeyLock(key)
+    acquired = lock.acquire(timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
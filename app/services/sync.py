@@ -0,0 +1,209 @@
+"""Incremental sync of subjects, topics, enrollments and topic progress.
+
+Every change to those tables appends a ChangeLog row (app/models/change_log.py)
+whose id is a sequence number taken when its transaction commits. ``GET /api/changes?since=N``
+returns the changes after N in sequence order, one page at a time, with
+the current values of each changed row or a tombstone for deleted ones.
+A sync reads the log from its cursor forward through the primary key and
+then fetches only the changed rows by key, so it costs O(changes), not
+O(dataset).
+
+Client protocol:
+
+1. Call ``GET /api/changes`` without ``since`` for the current cursor,
+   then load the full lists.
+2. Poll ``GET /api/changes?since=<next_cursor>`` and apply each change,
+   repeating while ``has_more`` is true.
+3. On 410 (the cursor is older than the retained log) start over at 1.
+
+The log is scoped to the caller: coordinators, HODs and admins see every
+change, teachers those of their subjects, students those of the subjects
+they are enrolled in plus their own enrollments and progress. A subject
+that newly enters a client's scope is announced by its enrollment or
+subject change, not by a replay of its history, so the client should load
+it in full; a subject reassigned to another teacher just stops appearing
+in the old teacher's changes.
+
+Writers number their changes under a lock on the ChangeSequence row held
+until they commit, so sequence numbers become visible in order and a
+cursor never skips a change committed after it was handed out. The counter
+also survives pruning, so numbers are never reused.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_, tuple_
+from app import db
+from app.models import ChangeLog, ChangeSequence, Enrollment, Subject, Topic, TopicProgress
+from app.models.change_log import queue_changes
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 2000
+
+# Columns returned for each changed row; the key columns come first
+SYNC_COLUMNS = {
+    'subject': (Subject.id, Subject.name, Subject.code, Subject.semester, Subject.is_active, Subject.teacher_id),
+    'topic': (Topic.id, Topic.subject_id, Topic.name, Topic.order, Topic.hours_allocated,
+              Topic.expected_date, Topic.completed_date, Topic.is_completed),
+    'enrollment': (Enrollment.subject_id, Enrollment.student_id, Enrollment.status,
+                   Enrollment.enrolled_at, Enrollment.progress),
+    'topic_progress': (TopicProgress.id, TopicProgress.topic_id, TopicProgress.student_id,
+                       TopicProgress.is_completed, TopicProgress.completed_at, TopicProgress.updated_at),
+}
+SYNC_ENTITIES = tuple(SYNC_COLUMNS)
+ALL_CHANGES_ROLES = ('coordinator', 'hod', 'admin')
+
+
+class SyncError(ValueError):
+    """Raised for invalid sync arguments."""
+
+
+class CursorExpired(SyncError):
+    """The cursor points before the retained change log; resync in full."""
+
+
+def record_changes(entity: str, rows) -> None:
+    """Log upserts made by Core statements that bypass the ORM flush hooks.
+
+    ``rows`` are dicts with ``entity_id``, ``subject_id`` and (for
+    enrollments and progress) ``student_id``. They are written to the log
+    when the caller commits.
+    """
+    queue_changes(db.session(), [
+        {'entity': entity, 'entity_id': row.get('entity_id'), 'subject_id': row.get('subject_id'),
+         'student_id': row.get('student_id'), 'deleted': False}
+        for row in rows
+    ])
+
+
+def head_cursor() -> int:
+    """The sequence number of the latest change; a new client syncs from here."""
+    return db.session.query(ChangeSequence.value).filter(ChangeSequence.id == 1).scalar() or 0
+
+
+def _parse_since(value) -> int:
+    try:
+        since = int(value)
+    except (TypeError, ValueError):
+        raise SyncError('since must be a cursor returned by this endpoint')
+    if since < 0:
+        raise SyncError('since must be a cursor returned by this endpoint')
+    return since
+
+
+def _limit(value) -> int:
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_SYNC_LIMIT
+    return max(1, min(limit, MAX_SYNC_LIMIT))
+
+
+def _entities(value) -> tuple:
+    names = tuple(name.strip() for name in (value or '').split(',') if name.strip())
+    unknown = [name for name in names if name not in SYNC_COLUMNS]
+    if unknown:
+        raise SyncError(f"unknown entities: {', '.join(unknown)} (allowed: {', '.join(SYNC_ENTITIES)})")
+    return names or SYNC_ENTITIES
+
+
+def _scope(query, user):
+    """Limit the log to the changes ``user`` may see."""
+    if user.role in ALL_CHANGES_ROLES:
+        return query
+    if user.role == 'teacher':
+        subjects = db.session.query(Subject.id).filter(Subject.teacher_id == user.id)
+        return query.filter(ChangeLog.subject_id.in_(subjects))
+    subjects = db.session.query(Enrollment.subject_id).filter(Enrollment.student_id == user.id)
+    # Their own rows always, so a dropped enrollment's tombstone still arrives
+    return query.filter(or_(
+        ChangeLog.student_id == user.id,
+        and_(ChangeLog.subject_id.in_(subjects), ChangeLog.student_id.is_(None)),
+    ))
+
+
+def _key(change) -> tuple:
+    if change.entity == 'enrollment':
+        return change.entity, (change.subject_id, change.student_id)
+    return change.entity, change.entity_id
+
+
+def _current_rows(keys_by_entity: dict) -> dict:
+    """{(entity, key): values} for the rows that still exist, one query per entity."""
+    found = {}
+    for entity, keys in keys_by_entity.items():
+        columns = SYNC_COLUMNS[entity]
+        names = [c.key for c in columns]
+        query = db.session.query(*columns)
+        if entity == 'enrollment':
+            query = query.filter(tuple_(Enrollment.subject_id, Enrollment.student_id).in_(keys))
+        else:
+            query = query.filter(columns[0].in_(keys))
+        for row in query:
+            key = (row[0], row[1]) if entity == 'enrollment' else row[0]
+            found[entity, key] = dict(zip(names, row))
+    return found
+
+
+def changes_since(args, user) -> dict:
+    """One page of changes after ``args['since']`` visible to ``user``.
+
+    Other args: ``limit`` and ``entities`` (comma-separated subset of
+    SYNC_ENTITIES). Without ``since`` only the head cursor is returned.
+    Raises SyncError for invalid arguments and CursorExpired when the
+    cursor predates the retained log.
+    """
+    entities = _entities(args.get('entities'))
+    if args.get('since') in (None, ''):
+        return {'changes': [], 'next_cursor': str(head_cursor()), 'has_more': False}
+    since = _parse_since(args.get('since'))
+    limit = _limit(args.get('limit'))
+
+    # Sequence numbers have no gaps, so the log must hold every one after since
+    oldest = db.session.query(func.min(ChangeLog.id)).scalar()
+    first_retained = oldest if oldest is not None else head_cursor() + 1
+    if since < first_retained - 1:
+        raise CursorExpired('cursor is older than the retained change log; resync in full')
+
+    query = db.session.query(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.subject_id,
+                             ChangeLog.student_id, ChangeLog.deleted).filter(ChangeLog.id > since)
+    if entities != SYNC_ENTITIES:
+        query = query.filter(ChangeLog.entity.in_(entities))
+    log = _scope(query, user).order_by(ChangeLog.id.asc()).limit(limit + 1).all()
+    has_more = len(log) > limit
+    log = log[:limit]
+
+    # Several changes to one row collapse into its latest
+    latest = {}
+    for change in log:
+        latest.pop(_key(change), None)
+        latest[_key(change)] = change
+    keys_by_entity = {}
+    for (entity, key), change in latest.items():
+        if not change.deleted:
+            keys_by_entity.setdefault(entity, []).append(key)
+    current = _current_rows(keys_by_entity)
+
+    changes = []
+    for (entity, key), change in latest.items():
+        data = None if change.deleted else current.get((entity, key))
+        item = {'seq': change.id, 'entity': entity}
+        if entity == 'enrollment':
+            item.update(subject_id=key[0], student_id=key[1])
+        else:
+            item['id'] = key
+        # A row deleted after this change is reported as deleted already
+        item.update(deleted=data is None, data=data)
+        changes.append(item)
+    next_cursor = str(log[-1].id) if log else str(since)
+    return {'changes': changes, 'next_cursor': next_cursor, 'has_more': has_more}
+
+
+def prune_change_log(days: int) -> int:
+    """Delete log rows older than ``days``; returns how many were removed.
+
+    Clients whose cursor falls before the oldest remaining row get 410 and
+    resync in full. The sequence carries on from ChangeSequence, so it
+    does not restart even when every row is removed. The caller commits.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    table = ChangeLog.__table__
+    return db.session.execute(table.delete().where(table.c.changed_at < cutoff)).rowcount
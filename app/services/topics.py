@@ -0,0 +1,497 @@
+import threading
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import bindparam, event, func, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Topic, Subject
+from app.services.analytics import invalidate_dashboard_reports
+from app.services.progress import rebuild_subject_counters, subjects_progress
+from app.services.singleflight import KeyLock
+from app.services.sync import record_changes
+
+# Upper bound on topic ids accepted by one bulk request
+MAX_BULK_TOPICS = 1000
+
+# Topic.order is a sparse key: topics are spaced ORDER_GAP apart so a move
+# only rewrites the moved row, taking the midpoint of its new neighbours.
+# A subject is renumbered in the background once a gap drops below
+# RENUMBER_MIN_GAP, and inline if a move finds no room at all.
+ORDER_GAP = 1024
+RENUMBER_MIN_GAP = 4
+
+
+class TopicBulkError(ValueError):
+    """A bulk topic request that cannot be applied; nothing was changed.
+
+    ``errors`` lists per-item problems as
+    ``{'index': i, 'field': name, 'message': text}``.
+    """
+
+    def __init__(self, message: str, status: int = 400, topic_ids=None, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.topic_ids = sorted(topic_ids or [])
+        self.errors = errors or []
+
+
+def _topic_ids(values) -> list[int]:
+    if not isinstance(values, list) or not values:
+        raise TopicBulkError('topic_ids must be a non-empty list')
+    if len(values) > MAX_BULK_TOPICS:
+        raise TopicBulkError(f'at most {MAX_BULK_TOPICS} topic_ids per request')
+    try:
+        return sorted({int(v) for v in values})
+    except (TypeError, ValueError):
+        raise TopicBulkError('topic_ids must be integers')
+
+
+def set_topics_covered(teacher_id: int, topic_ids, covered: bool = True,
+                       completed_date: date | None = None, completion_notes: str | None = None) -> dict:
+    """Mark many topics covered (or not) for a teacher in one statement.
+
+    One query resolves the topics and their owners; the request is
+    rejected as a whole if any id is unknown or belongs to another
+    teacher. A single UPDATE then sets the state, so repeating a request
+    is harmless. Covering keeps an existing completed_date unless one is
+    given; uncovering clears it. The bulk UPDATE bypasses the Topic flush
+    hooks, so the affected subjects' counters are rebuilt and the changes
+    logged for sync afterwards.
+    Returns {'updated': n, 'subjects': {subject_id: progress}}; the
+    caller commits.
+    """
+    ids = _topic_ids(topic_ids)
+    rows = (
+        db.session.query(Topic.id, Topic.subject_id, Subject.teacher_id)
+        .join(Subject, Topic.subject_id == Subject.id)
+        .filter(Topic.id.in_(ids))
+        .all()
+    )
+    missing = set(ids) - {tid for tid, _, _ in rows}
+    if missing:
+        raise TopicBulkError('unknown topic ids', 404, missing)
+    foreign = {tid for tid, _, owner in rows if owner != teacher_id}
+    if foreign:
+        raise TopicBulkError('topics belong to another teacher', 403, foreign)
+
+    values = {'is_completed': bool(covered)}
+    if covered:
+        values['completed_date'] = completed_date or func.coalesce(Topic.completed_date, date.today())
+    else:
+        values['completed_date'] = None
+    if completion_notes is not None:
+        values['completion_notes'] = completion_notes
+    result = db.session.execute(
+        update(Topic).where(Topic.id.in_(ids)).values(**values)
+        .execution_options(synchronize_session='fetch')
+    )
+
+    subject_ids = {sid for _, sid, _ in rows}
+    rebuild_subject_counters(subject_ids)
+    record_changes('topic', [{'entity_id': tid, 'subject_id': sid} for tid, sid, _ in rows])
+    invalidate_dashboard_reports()
+    return {'updated': result.rowcount, 'subjects': subjects_progress(subject_ids)}
+
+
+# Fields a coordinator may set when creating or patching topics
+TOPIC_FIELDS = ('name', 'description', 'expected_date', 'hours_allocated', 'prerequisites')
+
+
+def _items(values) -> list:
+    if not isinstance(values, list) or not values:
+        raise TopicBulkError('topics must be a non-empty list')
+    if len(values) > MAX_BULK_TOPICS:
+        raise TopicBulkError(f'at most {MAX_BULK_TOPICS} topics per request')
+    return values
+
+
+def _clean_topic(item, partial: bool):
+    """Validate one item; return (column values, [(field, message)])."""
+    if not isinstance(item, dict):
+        return {}, [(None, 'must be an object')]
+    values, errors = {}, []
+    if 'name' in item or not partial:
+        name = item.get('name')
+        name = name.strip() if isinstance(name, str) else ''
+        if not name:
+            errors.append(('name', 'required'))
+        elif len(name) > 128:
+            errors.append(('name', 'at most 128 characters'))
+        else:
+            values['name'] = name
+    if 'description' in item:
+        desc = item['description']
+        if desc is not None and not isinstance(desc, str):
+            errors.append(('description', 'must be a string'))
+        else:
+            values['description'] = desc or None
+    if 'expected_date' in item:
+        raw = item['expected_date']
+        if raw in (None, ''):
+            values['expected_date'] = None
+        else:
+            try:
+                values['expected_date'] = datetime.strptime(raw, '%Y-%m-%d').date()
+            except (TypeError, ValueError):
+                errors.append(('expected_date', 'must be YYYY-MM-DD'))
+    if 'hours_allocated' in item:
+        hours = item['hours_allocated']
+        if hours is not None and (isinstance(hours, bool) or not isinstance(hours, int) or hours < 0):
+            errors.append(('hours_allocated', 'must be a non-negative integer'))
+        else:
+            values['hours_allocated'] = hours
+    if 'prerequisites' in item:
+        prereqs = item['prerequisites']
+        if prereqs is None:
+            values['prerequisites'] = None
+        elif not isinstance(prereqs, list) or not all(isinstance(p, int) and not isinstance(p, bool) for p in prereqs):
+            errors.append(('prerequisites', 'must be a list of topic ids'))
+        else:
+            values['prerequisites'] = prereqs
+    return values, errors
+
+
+def _validate_items(subject_id: int, items, partial: bool):
+    """Clean every item and check ids and prerequisites against the subject.
+
+    Issues one query for all referenced topic ids. Raises TopicBulkError
+    listing every invalid item; returns the cleaned values otherwise.
+    """
+    cleaned, errors = [], []
+    referenced = set()
+    for index, item in enumerate(items):
+        values, item_errors = _clean_topic(item, partial)
+        if partial:
+            topic_id = item.get('id') if isinstance(item, dict) else None
+            if not isinstance(topic_id, int) or isinstance(topic_id, bool):
+                item_errors.append(('id', 'required'))
+            else:
+                values['id'] = topic_id
+                referenced.add(topic_id)
+        referenced.update(values.get('prerequisites') or ())
+        errors.extend({'index': index, 'field': f, 'message': m} for f, m in item_errors)
+        cleaned.append(values)
+
+    known = {
+        tid for (tid,) in db.session.query(Topic.id)
+        .filter(Topic.subject_id == subject_id, Topic.id.in_(referenced))
+    } if referenced else set()
+    seen = set()
+    for index, values in enumerate(cleaned):
+        topic_id = values.get('id')
+        if topic_id is not None:
+            if topic_id not in known:
+                errors.append({'index': index, 'field': 'id', 'message': 'no such topic in this subject'})
+            elif topic_id in seen:
+                errors.append({'index': index, 'field': 'id', 'message': 'listed more than once'})
+            seen.add(topic_id)
+        unknown = [p for p in values.get('prerequisites') or () if p not in known]
+        if unknown:
+            errors.append({'index': index, 'field': 'prerequisites',
+                           'message': f'unknown topic ids: {unknown}'})
+        if topic_id is not None and topic_id in (values.get('prerequisites') or ()):
+            errors.append({'index': index, 'field': 'prerequisites', 'message': 'topic cannot require itself'})
+    if errors:
+        errors.sort(key=lambda e: e['index'])
+        raise TopicBulkError('validation failed', 400, errors=errors)
+    return cleaned
+
+
+def _topic_dict(row) -> dict:
+    return {
+        'id': row.id,
+        'name': row.name,
+        'order': row.order,
+        'expected_date': row.expected_date,
+        'hours_allocated': row.hours_allocated,
+        'prerequisites': row.prerequisites,
+        'is_completed': bool(row.is_completed),
+    }
+
+
+def _topic_rows(subject_id: int, *criteria):
+    return (
+        db.session.query(Topic.id, Topic.name, Topic.order, Topic.expected_date,
+                         Topic.hours_allocated, Topic.prerequisites, Topic.is_completed)
+        .filter(Topic.subject_id == subject_id, *criteria)
+        .order_by(Topic.order.asc())
+        .all()
+    )
+
+
+def create_topics(subject_id: int, items) -> list[dict]:
+    """Append many topics to a subject with one executemany INSERT.
+
+    Every item is validated before anything is written; prerequisites may
+    name existing topics of the same subject. New topics are numbered after
+    the current last one, under the subject's order lock (see
+    ``lock_topic_order``). Returns the created topics in order; the caller
+    commits.
+    """
+    cleaned = _validate_items(subject_id, _items(items), partial=False)
+    lock_topic_order(subject_id)
+    last_order = last_order_key(subject_id)
+    now = datetime.utcnow()
+    rows = [
+        dict({f: None for f in TOPIC_FIELDS}, **values, subject_id=subject_id,
+             order=last_order + i * ORDER_GAP, is_completed=False, created_at=now)
+        for i, values in enumerate(cleaned, start=1)
+    ]
+    db.session.execute(Topic.__table__.insert(), rows)
+    # Core inserts skip the Topic flush hooks that maintain the counters
+    rebuild_subject_counters([subject_id])
+    # executemany returns no ids; the keys handed out above are this call's alone
+    created = _topic_rows(subject_id, Topic.order.in_([row['order'] for row in rows]))
+    record_changes('topic', [{'entity_id': r.id, 'subject_id': subject_id} for r in created])
+    invalidate_dashboard_reports()
+    return [_topic_dict(r) for r in created]
+
+
+def update_topics(subject_id: int, items) -> list[dict]:
+    """Apply partial updates to many topics of one subject.
+
+    Items carry an ``id`` plus any of TOPIC_FIELDS. Items changing the
+    same set of fields share one executemany UPDATE. Returns the updated
+    topics in order; the caller commits.
+    """
+    cleaned = _validate_items(subject_id, _items(items), partial=True)
+    table = Topic.__table__
+    groups: dict[tuple, list] = {}
+    for values in cleaned:
+        fields = tuple(sorted(k for k in values if k != 'id'))
+        if fields:
+            groups.setdefault(fields, []).append(
+                dict({f'v_{k}': values[k] for k in fields}, topic_id=values['id'])
+            )
+    db.session.flush()
+    for fields, params in groups.items():
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam('topic_id'))
+            .values({k: bindparam(f'v_{k}') for k in fields})
+        )
+        db.session.execute(stmt, params)
+    ids = [values['id'] for values in cleaned]
+    # Refresh any copies already loaded in this session
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Topic) and obj.id in ids:
+            db.session.expire(obj)
+    if any('hours_allocated' in fields for fields in groups):
+        rebuild_subject_counters([subject_id])
+    record_changes('topic', [{'entity_id': tid, 'subject_id': subject_id} for tid in ids])
+    return [_topic_dict(r) for r in _topic_rows(subject_id, Topic.id.in_(ids))]
+
+
+_renumber_threads: dict[int, threading.Thread] = {}
+_renumber_threads_lock = threading.Lock()
+
+
+def last_order_key(subject_id: int) -> int:
+    """Largest order key in a subject, 0 when it has no topics."""
+    return db.session.query(func.max(Topic.order)).filter(Topic.subject_id == subject_id).scalar() or 0
+
+
+def _order_lock(subject_id: int) -> KeyLock:
+    """Serializes order changes of one subject across threads and workers."""
+    return KeyLock(f'topic-order:{subject_id}')
+
+
+def _lock_timeout() -> float:
+    return current_app.config.get('SINGLE_FLIGHT_TIMEOUT', 30)
+
+
+def lock_topic_order(subject_id: int) -> None:
+    """Hold the subject's order lock until the session's transaction ends.
+
+    Order keys read after this stay valid until the writes based on them
+    commit or roll back. Raises TopicBulkError (409) if the lock is busy.
+    """
+    session = db.session()
+    held = session.info.setdefault('_topic_order_locks', {})
+    if subject_id in held:
+        return
+    lock = _order_lock(subject_id)
+    if not lock.acquire(_lock_timeout()):
+        raise TopicBulkError('topic order is busy, try again', 409)
+    held[subject_id] = lock
+    # Begin the transaction now so its end always releases the lock
+    session.connection()
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _release_topic_order_locks(session, transaction):
+    if transaction.parent is None:
+        for lock in session.info.pop('_topic_order_locks', {}).values():
+            lock.release()
+
+
+def _renumber(subject_id: int) -> None:
+    """Respace a subject's topics ORDER_GAP apart, keeping their order."""
+    ids = [
+        tid for (tid,) in db.session.query(Topic.id)
+        .filter(Topic.subject_id == subject_id)
+        .order_by(Topic.order.asc(), Topic.id.asc())
+    ]
+    _write_order_keys(subject_id, [
+        {'topic_id': tid, 'new_order': i * ORDER_GAP} for i, tid in enumerate(ids, start=1)
+    ])
+
+
+def _write_order_keys(subject_id: int, changes: list[dict]) -> None:
+    """One executemany UPDATE of ``{'topic_id', 'new_order'}`` rows."""
+    if not changes:
+        return
+    table = Topic.__table__
+    db.session.execute(
+        table.update().where(table.c.id == bindparam('topic_id')).values(order=bindparam('new_order')),
+        changes,
+    )
+    record_changes('topic', [{'entity_id': c['topic_id'], 'subject_id': subject_id} for c in changes])
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Topic) and obj.subject_id == subject_id:
+            db.session.expire(obj, ['order'])
+
+
+def renumber_topics(subject_id: int) -> None:
+    """Respace a subject's order keys under its order lock and commit."""
+    lock = _order_lock(subject_id)
+    if not lock.acquire(_lock_timeout()):
+        raise TimeoutError(f'could not lock topic order of subject {subject_id}')
+    try:
+        _renumber(subject_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        lock.release()
+
+
+def _renumber_in_background(subject_id: int) -> None:
+    app = current_app._get_current_object()
+
+    def run():
+        try:
+            with app.app_context():
+                renumber_topics(subject_id)
+        except Exception as e:
+            app.logger.error(f'Renumbering topics of subject {subject_id} failed: {e}')
+        finally:
+            with _renumber_threads_lock:
+                _renumber_threads.pop(subject_id, None)
+
+    with _renumber_threads_lock:
+        if subject_id in _renumber_threads:
+            return  # one pending renumber per subject is enough
+        thread = threading.Thread(target=run, name=f'topic-renumber-{subject_id}', daemon=True)
+        _renumber_threads[subject_id] = thread
+    thread.start()
+
+
+def wait_for_renumbering(timeout: float | None = None) -> None:
+    """Block until background renumbering threads finish (used by tests and scripts)."""
+    with _renumber_threads_lock:
+        threads = list(_renumber_threads.values())
+    for thread in threads:
+        thread.join(timeout)
+
+
+def _neighbour_keys(subject_id: int, topic_id: int, after_id, before_id):
+    """Order keys of the topics the moved topic should sit between.
+
+    With ``after_id`` the topic goes directly after that topic; otherwise
+    directly before ``before_id``; with neither it goes first. The other
+    neighbour is read from the database, so a client with a stale view
+    still gets a consistent result. Either key is None at the ends.
+    """
+    anchor_id = after_id if after_id is not None else before_id
+    others = db.session.query(Topic.order).filter(Topic.subject_id == subject_id, Topic.id != topic_id)
+    if anchor_id is None:
+        return None, others.order_by(Topic.order.asc()).limit(1).scalar()
+    anchor = (
+        db.session.query(Topic.order)
+        .filter(Topic.id == anchor_id, Topic.subject_id == subject_id)
+        .scalar()
+    )
+    if anchor is None or anchor_id == topic_id:
+        raise TopicBulkError('anchor must be another topic of the same subject', 400, [anchor_id])
+    if after_id is not None:
+        upper = others.filter(Topic.order > anchor).order_by(Topic.order.asc()).limit(1).scalar()
+        return anchor, upper
+    lower = others.filter(Topic.order < anchor).order_by(Topic.order.desc()).limit(1).scalar()
+    return lower, anchor
+
+
+def _key_between(lower, upper):
+    if lower is None and upper is None:
+        return ORDER_GAP
+    if lower is None:
+        return upper - ORDER_GAP
+    if upper is None:
+        return lower + ORDER_GAP
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+
+def move_topic(topic_id: int, after_id: int | None = None, before_id: int | None = None) -> dict:
+    """Move one topic directly after ``after_id`` (or before ``before_id``).
+
+    Only the moved row is written. Moves within a subject are serialized
+    by a per-subject lock (plus a row lock on the subject where the
+    database supports it), so concurrent moves are applied one after the
+    other and none is lost. Commits and returns ``{'id', 'subject_id',
+    'order'}``; the lock is held until the transaction really ends, which
+    inside an atomic batch is when the batch commits or rolls back.
+    """
+    subject_id = db.session.query(Topic.subject_id).filter(Topic.id == topic_id).scalar()
+    if subject_id is None:
+        raise TopicBulkError('unknown topic', 404, [topic_id])
+    lock_topic_order(subject_id)
+    try:
+        db.session.query(Subject.id).filter(Subject.id == subject_id).with_for_update().scalar()
+        lower, upper = _neighbour_keys(subject_id, topic_id, after_id, before_id)
+        key = _key_between(lower, upper)
+        if key is None:
+            # No room left between the neighbours: respace now, then retry
+            _renumber(subject_id)
+            lower, upper = _neighbour_keys(subject_id, topic_id, after_id, before_id)
+            key = _key_between(lower, upper)
+        db.session.execute(
+            update(Topic).where(Topic.id == topic_id).values(order=key)
+            .execution_options(synchronize_session='fetch')
+        )
+        record_changes('topic', [{'entity_id': topic_id, 'subject_id': subject_id}])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    gaps = [g for g in (key - lower if lower is not None else None,
+                        upper - key if upper is not None else None) if g is not None]
+    if gaps and min(gaps) < RENUMBER_MIN_GAP:
+        _renumber_in_background(subject_id)
+    return {'id': topic_id, 'subject_id': subject_id, 'order': key}
+
+
+def reorder_topics(subject_id: int, topic_ids: list[int]) -> int:
+    """Apply a complete order for a subject, writing only rows whose key changes.
+
+    ``topic_ids`` must list exactly the subject's topics. Holds the order
+    lock as ``move_topic`` does and commits; returns the rows updated.
+    """
+    lock_topic_order(subject_id)
+    try:
+        current = dict(db.session.query(Topic.id, Topic.order).filter(Topic.subject_id == subject_id))
+        if len(topic_ids) != len(set(topic_ids)) or set(topic_ids) != set(current):
+            raise TopicBulkError("order list must match exactly the subject's topic ids")
+        changes = [
+            {'topic_id': tid, 'new_order': i * ORDER_GAP}
+            for i, tid in enumerate(topic_ids, start=1)
+            if current[tid] != i * ORDER_GAP
+        ]
+        _write_order_keys(subject_id, changes)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(changes)
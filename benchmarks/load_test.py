@@ -0,0 +1,347 @@
+"""End-to-end HTTP load test against a running server.
+
+Logs in once per role through the real login form, then drives each
+scenario below from --concurrency threads sharing that role's session for
+--duration seconds (after --warmup seconds that are not recorded). For
+every scenario and concurrency level it reports throughput, p50/p95/p99
+latency, error rate and SQL statements per request (from the X-Query-Count
+header), and writes everything to a JSON file so that runs on different
+commits can be compared with --compare.
+
+Only the standard library is used on the client side. The target is any
+server on this machine; --serve starts one with gunicorn for the given
+database. Generate the data first (scripts/generate_dataset.py), since the
+default logins are the generated users:
+
+Usage:
+  python scripts/generate_dataset.py --scale 0.1 --database-url sqlite:////tmp/load.db --reset --yes
+  python benchmarks/load_test.py --serve --database-url sqlite:////tmp/load.db --concurrency 1,8,32
+  python benchmarks/load_test.py --base-url http://127.0.0.1:5000 --scenarios student_dashboard,hod_reports
+  python benchmarks/load_test.py --serve --database-url ... --output new.json --compare old.json
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_PASSWORD = 'Password123!'
+DEFAULT_LOGINS = {
+    'student': 'student1@example.edu',
+    'teacher': 'teacher1@example.edu',
+    'hod': 'hod.cse@example.edu',
+    'coordinator': 'coordinator1@example.edu',
+}
+
+# name -> (role, method, path); {subject_id} is resolved after login
+SCENARIOS = {
+    'student_dashboard': ('student', 'GET', '/dashboard/student'),
+    'teacher_dashboard': ('teacher', 'GET', '/dashboard/teacher'),
+    'hod_reports': ('hod', 'GET', '/dashboard/hod/reports'),
+    'coordinator_subjects': ('coordinator', 'GET', '/api/coordinator/subjects'),
+    'enrollment_upload': ('coordinator', 'POST', '/api/coordinator/subjects/{subject_id}/enrollments/upload?report=summary'),
+}
+
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="HTTP load test with latency percentiles")
+    p.add_argument("--base-url", default="http://127.0.0.1:5000")
+    p.add_argument("--serve", action="store_true", help="Start gunicorn for --database-url on a free port")
+    p.add_argument("--database-url", help="Database for --serve (default: the app configuration)")
+    p.add_argument("--workers", type=int, default=4, help="gunicorn workers for --serve")
+    p.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker for --serve")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of scenarios")
+    p.add_argument("--concurrency", default="1,8", help="Comma-separated concurrency levels")
+    p.add_argument("--duration", type=float, default=15.0, help="Measured seconds per scenario and level")
+    p.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each measurement")
+    p.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    p.add_argument("--password", default=DEFAULT_PASSWORD)
+    for role, email in DEFAULT_LOGINS.items():
+        p.add_argument(f"--{role}-email", default=email)
+    p.add_argument("--subject-id", type=int, help="Subject for the upload (default: first coordinator subject)")
+    p.add_argument("--upload-rows", type=int, default=50, help="Student emails per uploaded CSV")
+    p.add_argument("--output", default="load_test_results.json")
+    p.add_argument("--compare", help="Earlier results file to print deltas against")
+    return p.parse_args()
+
+
+class Client:
+    """One keep-alive HTTP connection; reconnects when the server closes it."""
+
+    def __init__(self, base_url, timeout, cookie=''):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.cookie = cookie
+        self.conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Return (status, headers dict, body bytes)."""
+        headers = dict(headers or {})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt == 2:
+                    raise
+                continue
+            if resp.getheader('Connection', '').lower() == 'close':
+                self.close()
+            return resp.status, {k.lower(): v for k, v in resp.getheaders()}, data
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def _session_cookie(headers):
+    cookie = headers.get('set-cookie', '')
+    return cookie.split(';', 1)[0] if cookie.startswith('session=') else ''
+
+
+def login(base_url, email, password, timeout):
+    """Log in through the form and return the session cookie."""
+    client = Client(base_url, timeout)
+    status, headers, body = client.request('GET', '/login')
+    match = CSRF_RE.search(body.decode('utf-8', 'replace'))
+    if status != 200 or not match:
+        raise SystemExit(f"[error] GET /login returned {status} without a CSRF token")
+    client.cookie = _session_cookie(headers)
+    form = urlencode({'csrf_token': match.group(1), 'email': email, 'password': password})
+    status, headers, _ = client.request('POST', '/login', form, {'Content-Type': 'application/x-www-form-urlencoded'})
+    client.close()
+    location = headers.get('location', '')
+    if status != 302 or '/login' in location:
+        raise SystemExit(f"[error] login as {email} failed (status {status}, redirect {location or 'none'})")
+    return _session_cookie(headers)
+
+
+def upload_body(emails):
+    boundary = uuid.uuid4().hex
+    csv_text = 'email\n' + '\n'.join(emails) + '\n'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="enrollments.csv"\r\n'
+        f'Content-Type: text/csv\r\n\r\n{csv_text}\r\n--{boundary}--\r\n'
+    ).encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_level(base_url, cookie, method, path, body, headers, concurrency, duration, warmup, timeout):
+    """Drive one request shape from ``concurrency`` threads; returns samples."""
+    samples = []  # (latency seconds, ok, queries)
+    lock = threading.Lock()
+    start = time.perf_counter()
+    record_from = start + warmup
+    stop_at = record_from + duration
+
+    def worker():
+        client = Client(base_url, timeout, cookie)
+        local = []
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= stop_at:
+                break
+            try:
+                status, resp_headers, _ = client.request(method, path, body, headers)
+                # A redirect from an authenticated route means the session was lost
+                ok = status < 300
+                queries = resp_headers.get('x-query-count')
+            except (OSError, http.client.HTTPException):
+                client.close()
+                ok, queries = False, None
+            t1 = time.perf_counter()
+            if t0 >= record_from:
+                local.append((t1 - t0, ok, int(queries) if queries else None))
+        client.close()
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def summarize(samples, duration):
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for s in samples if not s[1])
+    queries = [s[2] for s in samples if s[2] is not None]
+    ms = lambda v: round(v, 2) if v is not None else None
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else None,
+        'throughput_rps': round(len(samples) / duration, 2),
+        'latency_ms': {
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'queries_per_request': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(args):
+    """Start gunicorn on a free port and wait for /api/health."""
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    cmd = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+           '--threads', str(args.threads), '--log-level', 'warning', 'app:create_app()']
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"[error] server exited with status {proc.returncode}")
+        try:
+            if Client(base_url, 2).request('GET', '/api/health')[0] == 200:
+                return proc, base_url
+        except OSError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("[error] server did not become healthy within 60s")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r['scenario'], r['concurrency']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    matched = 0
+    for r in results:
+        old = baseline.get((r['scenario'], r['concurrency']))
+        if not old or not old['throughput_rps'] or old['latency_ms']['p95'] is None or r['latency_ms']['p95'] is None:
+            continue
+        matched += 1
+        rps = (r['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100
+        p95 = (r['latency_ms']['p95'] - old['latency_ms']['p95']) / old['latency_ms']['p95'] * 100
+        print(f"  {r['scenario']:<22} c={r['concurrency']:<4} throughput {rps:+6.1f}%  p95 {p95:+6.1f}%"
+              f"  queries {old['queries_per_request']['mean']} -> {r['queries_per_request']['mean']}")
+    if not matched:
+        print("  no scenario and concurrency level in common")
+
+
+def main() -> int:
+    args = parse_args()
+    names = [n.strip() for n in args.scenarios.split(',') if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"[error] unknown scenarios: {', '.join(unknown)}; choose from {', '.join(SCENARIOS)}")
+        return 2
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    server, base_url = (None, args.base_url)
+    if args.serve:
+        server, base_url = start_server(args)
+        print(f"[info] started gunicorn at {base_url}")
+    try:
+        cookies = {}
+        for role in sorted({SCENARIOS[n][0] for n in names}):
+            cookies[role] = login(base_url, getattr(args, f'{role}_email'), args.password, args.timeout)
+
+        subject_id = args.subject_id
+        if 'enrollment_upload' in names and subject_id is None:
+            client = Client(base_url, args.timeout, cookies['coordinator'])
+            status, _, body = client.request('GET', '/api/coordinator/subjects?limit=1')
+            client.close()
+            subjects = json.loads(body).get('subjects') if status == 200 else None
+            if not subjects:
+                print("[error] no subject to upload enrollments to; pass --subject-id")
+                return 1
+            subject_id = subjects[0]['id']
+
+        results = []
+        for name in names:
+            role, method, path = SCENARIOS[name]
+            path = path.format(subject_id=subject_id)
+            body, headers = None, {}
+            if name == 'enrollment_upload':
+                body, headers = upload_body([f'student{i}@example.edu' for i in range(1, args.upload_rows + 1)])
+            for level in levels:
+                samples = run_level(base_url, cookies[role], method, path, body, headers, level,
+                                    args.duration, args.warmup, args.timeout)
+                row = {'scenario': name, 'role': role, 'method': method, 'path': path, 'concurrency': level,
+                       **summarize(samples, args.duration)}
+                results.append(row)
+                lat, q = row['latency_ms'], row['queries_per_request']
+                print(f"{name:<22} c={level:<4} {row['throughput_rps']:>8.1f} req/s  "
+                      f"p50 {lat['p50']} ms  p95 {lat['p95']} ms  p99 {lat['p99']} ms  "
+                      f"errors {row['error_rate']}  queries {q['mean']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'base_url': base_url,
+        'database_url': args.database_url,
+        'python': platform.python_version(),
+        'duration_s': args.duration,
+        'warmup_s': args.warmup,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[ok] wrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 1 if any(r['errors'] for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,256 @@
+"""Microbenchmarks with scaling curves for services and dashboard data code.
+
+Each case runs against datasets of several sizes, counted in topics
+(default 10, 1k and 100k), generated by app/services/datagen.py into an
+in-memory SQLite database. For every case and size it records the median,
+minimum and mean time of --repeat calls and the SQL statements per call,
+then fits the growth exponent between the smallest and largest size:
+about 0 means the cost does not depend on the data (O(1), or O(n) pushed
+into an indexed database lookup), about 1 means it grows linearly.
+
+Results are written as JSON. With --baseline, each case and size is
+compared with an earlier results file and the run fails (exit status 1)
+when its fastest call is more than --threshold slower and the difference
+is above --min-delta-ms. The fastest call is the least noisy estimate of
+the cost, and the floor keeps sub-millisecond jitter from failing a run.
+
+Usage:
+  python benchmarks/microbench.py
+  python benchmarks/microbench.py --sizes 10,1000 --cases progress_rebuild_counters,ratelimit_gcra
+  python benchmarks/microbench.py --output new.json --baseline old.json --threshold 0.25
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import event  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models import Subject, Topic, User  # noqa: E402
+from app.services import analytics, listings, progress  # noqa: E402
+from app.services.cache_backend import MemoryBackend  # noqa: E402
+from app.services.datagen import BASE_COUNTS, DEFAULT_PASSWORD, dataset_email, generate_dataset  # noqa: E402
+from app.services.ratelimit import gcra_allow  # noqa: E402
+
+# Password hashing does not depend on the dataset and is slow by design
+SLOW_CASES = {'password_hash', 'password_check'}
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Microbenchmarks with scaling curves")
+    p.add_argument("--sizes", default="10,1000,100000", help="Comma-separated dataset sizes in topics")
+    p.add_argument("--cases", help="Comma-separated subset of cases (default: all)")
+    p.add_argument("--repeat", type=int, default=7, help="Timed calls per case and size")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--output", default="microbench_results.json")
+    p.add_argument("--baseline", help="Earlier results file to compare against")
+    p.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown as a fraction (0.25 = 25%%)")
+    p.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    return p.parse_args()
+
+
+class BenchConfig:
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SECRET_KEY = 'bench'
+    DISABLE_RATE_LIMITS = True
+    # Measure the computation, not the report cache
+    DISABLE_REPORT_CACHE = True
+
+
+def build_site(topics, seed):
+    """An app whose in-memory database holds a dataset of about ``topics`` topics."""
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        generate_dataset(topics / BASE_COUNTS['topics'], seed=seed)
+    return app
+
+
+def _dashboard(app, email, path):
+    with app.app_context():
+        user_id = User.query.filter_by(email=email).with_entities(User.id).scalar()
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+    def call():
+        resp = client.get(path)
+        if resp.status_code != 200:
+            raise RuntimeError(f'{path} returned {resp.status_code}')
+    return call
+
+
+def make_cases(app, size):
+    """name -> zero-argument callable, prepared for the dataset in ``app``."""
+    with app.app_context():
+        subject_ids = [i for (i,) in db.session.query(Subject.id)]
+    first_subject_id = subject_ids[0]
+    backend = MemoryBackend(max_entries=max(size, 10))
+    for i in range(size):
+        gcra_allow(backend, f'login|ip|ip:{i}', 10, 60, now=1000.0)
+    hashed_user = User(name='x', email='x', role='student')
+    hashed_user.set_password(DEFAULT_PASSWORD)
+
+    def in_app(fn):
+        def call():
+            with app.app_context():
+                fn()
+                db.session.remove()
+        return call
+
+    return {
+        # app/services/progress.py
+        'progress_subjects_progress': in_app(lambda: progress.subjects_progress(subject_ids)),
+        'progress_subject_progress': in_app(lambda: progress.subject_progress(db.session.get(Subject, first_subject_id))),
+        'progress_topics_progress': in_app(lambda: progress.topics_progress(Topic.query.all())),
+        'progress_rebuild_counters': in_app(lambda: (progress.rebuild_subject_counters(), db.session.rollback())),
+        # Rate limiter on the in-memory backend holding ``size`` other keys
+        'ratelimit_gcra': lambda: gcra_allow(backend, 'login|ip|ip:bench', 10 ** 9, 60),
+        'password_hash': lambda: User(name='x', email='x', role='student').set_password(DEFAULT_PASSWORD),
+        'password_check': lambda: hashed_user.check_password(DEFAULT_PASSWORD),
+        # Coordinator listings, one full page of projected rows
+        'listing_users': in_app(lambda: listings.list_users({'limit': '200'})),
+        'listing_subjects': in_app(lambda: listings.list_subjects({'limit': '200'})),
+        # Dashboard data gathering
+        'analytics_department': in_app(lambda: analytics.department_analytics('CSE')),
+        'analytics_coordinator_metrics': in_app(analytics.coordinator_metrics),
+        'dashboard_student': _dashboard(app, dataset_email('student', 1), '/dashboard/student'),
+        'dashboard_teacher': _dashboard(app, dataset_email('teacher', 1), '/dashboard/teacher'),
+        'dashboard_hod': _dashboard(app, dataset_email('hod', department='CSE'), '/dashboard/hod'),
+        'dashboard_hod_reports': _dashboard(app, dataset_email('hod', department='CSE'), '/dashboard/hod/reports'),
+        'dashboard_coordinator': _dashboard(app, dataset_email('coordinator', 1), '/dashboard/coordinator'),
+    }
+
+
+def measure(engine, fn, repeat):
+    """Time ``repeat`` calls after one warm-up call; count statements per call.
+
+    The garbage collector is paused while timing, as timeit does.
+    """
+    statements = []
+    listener = lambda *args: statements.append(1)
+    fn()
+    gc.collect()
+    gc.disable()
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+        gc.enable()
+    return {
+        'median_ms': round(statistics.median(times), 4),
+        'min_ms': round(min(times), 4),
+        'mean_ms': round(statistics.fmean(times), 4),
+        'queries': round(len(statements) / repeat, 2),
+        'repeat': repeat,
+    }
+
+
+def growth(points):
+    """Exponent k in time ~ size**k between the smallest and largest size."""
+    sizes = sorted(points, key=int)
+    small, large = points[sizes[0]], points[sizes[-1]]
+    if len(sizes) < 2 or small['median_ms'] <= 0:
+        return None
+    return round(math.log(large['median_ms'] / small['median_ms']) / math.log(int(sizes[-1]) / int(sizes[0])), 2)
+
+
+def compare(results, baseline_path, threshold, min_delta_ms):
+    """Print per-case changes; return the regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    print(f"\nCompared with {baseline_path} (threshold {threshold:.0%}, min delta {min_delta_ms} ms):")
+    for case, points in results.items():
+        for size, new in points['sizes'].items():
+            old = baseline.get(case, {}).get('sizes', {}).get(size)
+            if not old:
+                continue
+            delta = new['min_ms'] - old['min_ms']
+            change = delta / old['min_ms'] if old['min_ms'] else 0.0
+            regressed = change > threshold and delta > min_delta_ms
+            if regressed:
+                regressions.append({'case': case, 'size': int(size), 'baseline_ms': old['min_ms'],
+                                    'min_ms': new['min_ms'], 'change': round(change, 3)})
+            print(f"  {case:<32} {size:>7} {old['min_ms']:>10.3f} -> {new['min_ms']:>10.3f} ms "
+                  f"{change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(','))
+    wanted = set(args.cases.split(',')) if args.cases else None
+    results = {}
+    for size in sizes:
+        start = time.perf_counter()
+        app = build_site(size, args.seed)
+        print(f"[info] dataset with {size} topics built in {time.perf_counter() - start:.1f}s")
+        with app.app_context():
+            engine = db.engine
+        cases = make_cases(app, size)
+        unknown = (wanted or set()) - set(cases)
+        if unknown:
+            print(f"[error] unknown cases: {', '.join(sorted(unknown))}; choose from {', '.join(cases)}")
+            return 2
+        for name, fn in cases.items():
+            if wanted and name not in wanted:
+                continue
+            repeat = min(args.repeat, 3) if name in SLOW_CASES else args.repeat
+            point = measure(engine, fn, repeat)
+            results.setdefault(name, {'sizes': {}})['sizes'][str(size)] = point
+            print(f"  {name:<32} {size:>7} topics  {point['median_ms']:>10.3f} ms  {point['queries']:>6} queries")
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    print("\nGrowth exponent (0 = flat, 1 = linear in topics):")
+    for name, entry in results.items():
+        entry['growth'] = growth(entry['sizes'])
+        print(f"  {name:<32} {entry['growth']}")
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'sizes': sizes,
+        'results': results,
+    }
+    status = 0
+    if args.baseline:
+        report['regressions'] = compare(results, args.baseline, args.threshold, args.min_delta_ms)
+        status = 1 if report['regressions'] else 0
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[ok] wrote {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+"""Memory benchmark for the GCRA rate limiter under many distinct keys.
+
+Feeds one million distinct keys (e.g. an IP enumeration attack) through
+gcra_allow() on the in-memory backend and samples traced memory as it
+goes. Once the backend's LRU bound is reached, memory stays flat.
+
+Usage:
+  python benchmarks/ratelimit_memory.py [--keys 1000000] [--max-entries 10000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache_backend import MemoryBackend  # noqa: E402
+from app.services.ratelimit import gcra_allow  # noqa: E402
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Rate limiter memory under distinct keys")
+    p.add_argument("--keys", type=int, default=1_000_000)
+    p.add_argument("--max-entries", type=int, default=10_000)
+    p.add_argument("--samples", type=int, default=10)
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    backend = MemoryBackend(max_entries=args.max_entries)
+    step = max(args.keys // args.samples, 1)
+    samples = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(1, args.keys + 1):
+        gcra_allow(backend, f'login|ip|ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}#{i}', 10, 60, now=1000.0)
+        if i % step == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            samples.append({'keys': i, 'entries': len(backend), 'traced_kib': round(current / 1024, 1)})
+            print(f"{i:>9} keys  {len(backend):>7} entries  {current / 1024:>10.1f} KiB")
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    after_fill = [s['traced_kib'] for s in samples if s['keys'] >= args.max_entries]
+    growth = (max(after_fill) - min(after_fill)) / min(after_fill) if after_fill else 0.0
+    print(json.dumps({
+        'keys': args.keys,
+        'max_entries': args.max_entries,
+        'seconds': round(elapsed, 2),
+        'ops_per_sec': round(args.keys / elapsed),
+        'memory_growth_after_fill': round(growth, 3),
+        'samples': samples,
+    }, indent=2))
+    # Memory is bounded when it stops growing once the LRU is full
+    return 0 if growth < 0.10 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
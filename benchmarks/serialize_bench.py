@@ -0,0 +1,123 @@
+"""Benchmark JSON serialization of large API listings.
+
+Encodes a response of --rows enrollment-like rows (id, name, email,
+status, datetime), the shape of /api/coordinator/subjects/<id>/enrollments,
+through each path and reports the fastest of --repeat runs, the peak
+memory of one run and the response size:
+
+- current: dicts built field by field with ``.isoformat()`` per row,
+  encoded by Flask's default provider (sorted keys), as the API did before
+  app/services/serializer.py
+- stdlib / orjson: ``row_dicts`` with native dates through each encoder
+- stream-stdlib / stream-orjson: ``stream_json`` in batches, consumed
+  chunk by chunk as the WSGI server would
+
+Usage:
+  python benchmarks/serialize_bench.py
+  python benchmarks/serialize_bench.py --rows 50000 --repeat 5 --output serialize.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app.services.serializer import FastJSONProvider, create_encoder, row_dicts, stream_json  # noqa: E402
+
+FIELDS = ('student_id', 'name', 'email', 'status', 'enrolled_at')
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="JSON serialization benchmark")
+    p.add_argument("--rows", type=int, default=50_000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--output", help="Write results as JSON")
+    return p.parse_args()
+
+
+def make_rows(n):
+    start = datetime(2024, 8, 1, 9, 0)
+    return [(i, f'Student {i}', f'student{i}@example.edu', 'active', start + timedelta(minutes=i))
+            for i in range(1, n + 1)]
+
+
+def _app(encoder):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app, create_encoder(encoder)) if encoder else DefaultJSONProvider(app)
+    return app
+
+
+def make_paths(rows):
+    def current(app):
+        data = [
+            {'student_id': r[0], 'name': r[1], 'email': r[2], 'status': r[3], 'enrolled_at': r[4].isoformat()}
+            for r in rows
+        ]
+        return app.json.response({'enrollments': data}).get_data()
+
+    def buffered(app):
+        return app.json.response({'enrollments': row_dicts(rows, FIELDS)}).get_data()
+
+    def streamed(app):
+        resp = stream_json('enrollments', (dict(zip(FIELDS, r)) for r in rows))
+        return b''.join(resp.response)
+
+    paths = {'current': (None, current), 'stdlib': ('stdlib', buffered), 'stream-stdlib': ('stdlib', streamed)}
+    try:
+        create_encoder('orjson')
+    except ImportError:
+        print("[info] orjson is not installed; skipping its paths")
+    else:
+        paths.update({'orjson': ('orjson', buffered), 'stream-orjson': ('orjson', streamed)})
+    return paths
+
+
+def run(app, fn, repeat):
+    with app.test_request_context():
+        body = fn(app)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(app)
+            times.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        fn(app)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return body, {'min_ms': round(min(times), 2), 'peak_mb': round(peak / 1e6, 2), 'bytes': len(body)}
+
+
+def main() -> int:
+    args = parse_args()
+    rows = make_rows(args.rows)
+    results, reference = {}, None
+    for name, (encoder, fn) in make_paths(rows).items():
+        body, result = run(_app(encoder), fn, args.repeat)
+        decoded = json.loads(body)
+        if reference is None:
+            reference = decoded
+        elif decoded != reference:
+            print(f"[error] {name} produced a different document")
+            return 1
+        results[name] = result
+    base = results['current']['min_ms']
+    print(f"{args.rows} rows, fastest of {args.repeat}:")
+    for name, r in results.items():
+        print(f"  {name:<14} {r['min_ms']:>9.1f} ms  {base / r['min_ms']:>5.1f}x  "
+              f"peak {r['peak_mb']:>7.1f} MB  {r['bytes'] / 1e6:>6.2f} MB body")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
+        print(f"[ok] wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -35,6 +35,9 @@ class Config:
         'pool_timeout': 20,
         'max_overflow': 0
     }
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # SQLite's pools take no sizing options (local load tests and benchmarks)
+        SQLALCHEMY_ENGINE_OPTIONS = {}
 
     # Security settings for production
     SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'false').lower() in ('1','true','yes','on')
@@ -44,6 +47,44 @@ class Config:
     # Feature flags
     ENABLE_CLAUDE_HAIKU_45 = os.environ.get('ENABLE_CLAUDE_HAIKU_45', 'false').lower() in ('1','true','yes','on')
 
+    # Shared cache/counter backend (app/services/cache_backend.py): memory, sqlite or redis.
+    # Use sqlite or redis when running more than one gunicorn worker.
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_URL = os.environ.get('CACHE_URL', '')  # sqlite file path or redis://host:port/db (Redis 7+)
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))
+
+    # Number of reverse proxies in front of the app. 0 ignores X-Forwarded-For,
+    # which clients can forge; deployments behind a proxy set it (render.yaml, Procfile: 1).
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '0'))
+
+    # Report cache (app/services/report_cache.py): TTL in seconds, max rows, purge interval (0 disables)
+    DISABLE_REPORT_CACHE = os.environ.get('DISABLE_REPORT_CACHE', 'false').lower() in ('1','true','yes','on')
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', '600'))
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', '1000'))
+    REPORT_CACHE_PURGE_INTERVAL = int(os.environ.get('REPORT_CACHE_PURGE_INTERVAL', '300'))
+
+    # Single-flight locks for expensive computations (app/services/singleflight.py)
+    SINGLE_FLIGHT_LOCK_DIR = os.environ.get('SINGLE_FLIGHT_LOCK_DIR', '')
+    SINGLE_FLIGHT_TIMEOUT = int(os.environ.get('SINGLE_FLIGHT_TIMEOUT', '30'))
+
+    # Per-request SQL statistics (app/services/query_stats.py): a warning is logged when a
+    # request runs more than QUERY_BUDGET statements (0 disables) or repeats one statement
+    # shape more than QUERY_REPEAT_THRESHOLD times
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() in ('1','true','yes','on')
+    QUERY_BUDGET = int(os.environ.get('QUERY_BUDGET', '50'))
+    QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', '10'))
+
+    # JSON encoder for API responses (app/services/serializer.py): auto, orjson or stdlib.
+    # auto uses orjson when it is installed.
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+
+    # Most sub-requests one POST /api/batch may carry (app/services/batch.py)
+    BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '50'))
+
+    # Delta sync (app/services/sync.py): the change log is kept this many days
+    # (scripts/prune_change_log.py)
+    CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', '30'))
+
     # Email / SMTP settings (optional)
     EMAIL_ENABLED = os.environ.get('EMAIL_ENABLED', 'false').lower() in ('1','true','yes','on')
     EMAIL_SERVER = os.environ.get('EMAIL_SERVER', '')
@@ -0,0 +1,251 @@
+"""Initial schema
+
+Tables as the application first created them with db.create_all(). Every
+table is created only when it is missing, so databases that were set up
+by create_all() can be upgraded in place (or marked with
+`flask db stamp 3f1c2a9b7d10`).
+
+Revision ID: 3f1c2a9b7d10
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if not _has_table('academic_year'):
+        op.create_table(
+            'academic_year',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('year', sa.String(length=9), nullable=False),
+            sa.Column('is_current', sa.Boolean(), nullable=True),
+            sa.Column('start_date', sa.Date(), nullable=False),
+            sa.Column('end_date', sa.Date(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('year')
+        )
+
+    if not _has_table('report_cache'):
+        op.create_table(
+            'report_cache',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('report_type', sa.String(length=64), nullable=False),
+            sa.Column('filters', sa.JSON(), nullable=True),
+            sa.Column('data', sa.JSON(), nullable=True),
+            sa.Column('generated_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('user'):
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=255), nullable=True),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.Column('department', sa.String(length=64), nullable=True),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('profile_image', sa.String(length=256), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('user_metadata', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email')
+        )
+
+    if not _has_table('activity_log'):
+        op.create_table(
+            'activity_log',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('action', sa.String(length=64), nullable=False),
+            sa.Column('entity_type', sa.String(length=32), nullable=True),
+            sa.Column('entity_id', sa.Integer(), nullable=True),
+            sa.Column('details', sa.JSON(), nullable=True),
+            sa.Column('ip_address', sa.String(length=45), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('department'):
+        op.create_table(
+            'department',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('code', sa.String(length=10), nullable=False),
+            sa.Column('hod_id', sa.Integer(), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['hod_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('code'),
+            sa.UniqueConstraint('name')
+        )
+
+    if not _has_table('notification'):
+        op.create_table(
+            'notification',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=128), nullable=False),
+            sa.Column('message', sa.Text(), nullable=False),
+            sa.Column('notification_type', sa.String(length=20), nullable=True),
+            sa.Column('is_read', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('course'):
+        op.create_table(
+            'course',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('code', sa.String(length=20), nullable=False),
+            sa.Column('department_id', sa.Integer(), nullable=False),
+            sa.Column('total_semesters', sa.Integer(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['department_id'], ['department.id'], ),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('code')
+        )
+
+    if not _has_table('subject'):
+        op.create_table(
+            'subject',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=64), nullable=False),
+            sa.Column('code', sa.String(length=20), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('teacher_id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=True),
+            sa.Column('semester', sa.Integer(), nullable=True),
+            sa.Column('credits', sa.Integer(), nullable=True),
+            sa.Column('academic_year_id', sa.Integer(), nullable=True),
+            sa.Column('syllabus_document', sa.String(length=256), nullable=True),
+            sa.Column('total_hours', sa.Integer(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['academic_year_id'], ['academic_year.id'], ),
+            sa.ForeignKeyConstraint(['course_id'], ['course.id'], ),
+            sa.ForeignKeyConstraint(['teacher_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('enrollment'):
+        op.create_table(
+            'enrollment',
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False),
+            sa.Column('enrolled_at', sa.DateTime(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('progress', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['student_id'], ['user.id'], ),
+            sa.ForeignKeyConstraint(['subject_id'], ['subject.id'], ),
+            sa.PrimaryKeyConstraint('student_id', 'subject_id')
+        )
+
+    if not _has_table('topic'):
+        op.create_table(
+            'topic',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('subject_id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=128), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('order', sa.Integer(), nullable=False),
+            sa.Column('hours_allocated', sa.Integer(), nullable=True),
+            sa.Column('expected_date', sa.Date(), nullable=True),
+            sa.Column('completed_date', sa.Date(), nullable=True),
+            sa.Column('is_completed', sa.Boolean(), nullable=True),
+            sa.Column('completion_notes', sa.Text(), nullable=True),
+            sa.Column('attachments', sa.JSON(), nullable=True),
+            sa.Column('prerequisites', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['subject_id'], ['subject.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('comment'):
+        op.create_table(
+            'comment',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('topic_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            sa.Column('parent_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['parent_id'], ['comment.id'], ),
+            sa.ForeignKeyConstraint(['topic_id'], ['topic.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('resource'):
+        op.create_table(
+            'resource',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('topic_id', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=128), nullable=False),
+            sa.Column('resource_type', sa.String(length=20), nullable=True),
+            sa.Column('url', sa.String(length=512), nullable=True),
+            sa.Column('file_path', sa.String(length=512), nullable=True),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('uploaded_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['topic_id'], ['topic.id'], ),
+            sa.ForeignKeyConstraint(['uploaded_by'], ['user.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _has_table('topic_progress'):
+        op.create_table(
+            'topic_progress',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('topic_id', sa.Integer(), nullable=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('is_completed', sa.Boolean(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['student_id'], ['user.id'], ),
+            sa.ForeignKeyConstraint(['topic_id'], ['topic.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('topic_progress')
+    op.drop_table('resource')
+    op.drop_table('comment')
+    op.drop_table('topic')
+    op.drop_table('enrollment')
+    op.drop_table('subject')
+    op.drop_table('course')
+    op.drop_table('notification')
+    op.drop_table('department')
+    op.drop_table('activity_log')
+    op.drop_table('user')
+    op.drop_table('report_cache')
+    op.drop_table('academic_year')
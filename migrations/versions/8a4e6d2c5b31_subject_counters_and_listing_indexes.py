@@ -0,0 +1,92 @@
+"""Subject counters, report cache key and listing indexes
+
+Brings databases created before the denormalized subject counters, the
+hashed report cache key and the keyset-pagination indexes up to date.
+Each step is skipped when db.create_all() already created it.
+
+Revision ID: 8a4e6d2c5b31
+Revises: 3f1c2a9b7d10
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c5b31'
+down_revision = '3f1c2a9b7d10'
+branch_labels = None
+depends_on = None
+
+COUNTER_COLUMNS = ('topic_count', 'completed_topic_count', 'completed_hours')
+
+LISTING_INDEXES = {
+    'user': [
+        ('ix_user_name_id', ['name', 'id']),
+        ('ix_user_role_name_id', ['role', 'name', 'id']),
+        ('ix_user_department_name_id', ['department', 'name', 'id']),
+        ('ix_user_created_at_id', ['created_at', 'id']),
+    ],
+    'subject': [
+        ('ix_subject_code_id', ['code', 'id']),
+        ('ix_subject_name_id', ['name', 'id']),
+        ('ix_subject_semester_id', ['semester', 'id']),
+        ('ix_subject_created_at_id', ['created_at', 'id']),
+        ('ix_subject_teacher_id_code', ['teacher_id', 'code']),
+    ],
+    'report_cache': [
+        ('ix_report_cache_cache_key', ['cache_key']),
+        ('ix_report_cache_expires_at', ['expires_at']),
+    ],
+}
+
+
+def _columns(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    missing = [c for c in COUNTER_COLUMNS if c not in _columns('subject')]
+    if missing:
+        with op.batch_alter_table('subject', schema=None) as batch_op:
+            for name in missing:
+                batch_op.add_column(sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+        # Same totals as app.services.progress.rebuild_subject_counters()
+        op.execute(
+            'UPDATE subject SET '
+            'topic_count = (SELECT COUNT(*) FROM topic WHERE topic.subject_id = subject.id), '
+            'completed_topic_count = (SELECT COUNT(*) FROM topic '
+            'WHERE topic.subject_id = subject.id AND topic.is_completed), '
+            'completed_hours = (SELECT COALESCE(SUM(topic.hours_allocated), 0) FROM topic '
+            'WHERE topic.subject_id = subject.id AND topic.is_completed)'
+        )
+
+    if 'cache_key' not in _columns('report_cache'):
+        with op.batch_alter_table('report_cache', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('cache_key', sa.String(length=64), nullable=True))
+
+    for table, indexes in LISTING_INDEXES.items():
+        existing = _indexes(table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                if name not in existing:
+                    batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in reversed(list(LISTING_INDEXES.items())):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in reversed(indexes):
+                batch_op.drop_index(name)
+
+    with op.batch_alter_table('report_cache', schema=None) as batch_op:
+        batch_op.drop_column('cache_key')
+
+    with op.batch_alter_table('subject', schema=None) as batch_op:
+        for name in reversed(COUNTER_COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,43 @@
+"""User listing indexes for the role and department sorts
+
+(role, id) and (department, id) indexes so the users listing sorted by
+role or department reads its pages in index order, like the other sort
+keys. Each is skipped when db.create_all() already created it.
+
+Revision ID: a9c3e5d7f1b2
+Revises: f4d1b7c2e8a5
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c3e5d7f1b2'
+down_revision = 'f4d1b7c2e8a5'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_user_role_id', ['role', 'id']),
+    ('ix_user_department_id', ['department', 'id']),
+]
+
+
+def _indexes(table):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    existing = _indexes('user')
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name, columns in INDEXES:
+            if name not in existing:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        for name, _ in reversed(INDEXES):
+            batch_op.drop_index(name)
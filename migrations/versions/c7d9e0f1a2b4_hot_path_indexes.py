@@ -0,0 +1,70 @@
+"""Hot-path indexes and unique topic progress
+
+Composite indexes for the lookups the dashboards and APIs run on every
+request, and a unique constraint on TopicProgress(student_id, topic_id).
+Duplicate progress rows are removed first, keeping the newest row for
+each student and topic.
+
+Revision ID: c7d9e0f1a2b4
+Revises: 8a4e6d2c5b31
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d9e0f1a2b4'
+down_revision = '8a4e6d2c5b31'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'topic': [('ix_topic_subject_id_order', ['subject_id', 'order'])],
+    'enrollment': [('ix_enrollment_subject_id_student_id', ['subject_id', 'student_id'])],
+    'topic_progress': [('ix_topic_progress_topic_id', ['topic_id'])],
+    'user': [('ix_user_department_role_is_active', ['department', 'role', 'is_active'])],
+    'subject': [('ix_subject_teacher_id_is_active', ['teacher_id', 'is_active'])],
+    'notification': [('ix_notification_user_id_is_read', ['user_id', 'is_read'])],
+    'activity_log': [('ix_activity_log_created_at', ['created_at'])],
+}
+
+PROGRESS_UNIQUE = 'uq_topic_progress_student_id_topic_id'
+
+
+def _indexes(table):
+    return {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _unique_constraints(table):
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_unique_constraints(table)}
+
+
+def upgrade():
+    if PROGRESS_UNIQUE not in _unique_constraints('topic_progress'):
+        # The derived table lets MySQL delete from the table it reads
+        op.execute(
+            'DELETE FROM topic_progress WHERE id NOT IN ('
+            'SELECT id FROM (SELECT MAX(id) AS id FROM topic_progress '
+            'GROUP BY student_id, topic_id) AS keep)'
+        )
+        with op.batch_alter_table('topic_progress', schema=None) as batch_op:
+            batch_op.create_unique_constraint(PROGRESS_UNIQUE, ['student_id', 'topic_id'])
+
+    for table, indexes in INDEXES.items():
+        existing = _indexes(table)
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                if name not in existing:
+                    batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in reversed(list(INDEXES.items())):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _ in reversed(indexes):
+                batch_op.drop_index(name)
+
+    with op.batch_alter_table('topic_progress', schema=None) as batch_op:
+        batch_op.drop_constraint(PROGRESS_UNIQUE, type_='unique')
@@ -0,0 +1,52 @@
+"""Change log for delta sync
+
+A change_log row per insert, update or delete of a subject, topic,
+enrollment or topic progress row; its id is the sequence clients sync
+from (app/services/sync.py). The log starts empty: existing clients
+begin from the current head after a full load.
+
+Revision ID: e2b8f4a6c913
+Revises: c7d9e0f1a2b4
+Create Date: 2026-10-18 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8f4a6c913'
+down_revision = 'c7d9e0f1a2b4'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # db.create_all() at startup may have created it already
+    if _has_table('change_log'):
+        return
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=True),
+        sa.Column('subject_id', sa.Integer(), nullable=True),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index('ix_change_log_subject_id_id', ['subject_id', 'id'], unique=False)
+        batch_op.create_index('ix_change_log_changed_at', ['changed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_log_changed_at')
+        batch_op.drop_index('ix_change_log_subject_id_id')
+    op.drop_table('change_log')
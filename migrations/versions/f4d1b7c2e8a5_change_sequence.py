@@ -0,0 +1,45 @@
+"""Change sequence counter for delta sync
+
+A single-row change_sequence table holding the last change log id handed
+out. Writers lock it when they commit and number their change log rows
+from it (app/models/change_log.py), so ids become visible in commit order
+and carry on after the log is pruned. Seeded from the current log.
+
+Revision ID: f4d1b7c2e8a5
+Revises: e2b8f4a6c913
+Create Date: 2026-10-18 20:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4d1b7c2e8a5'
+down_revision = 'e2b8f4a6c913'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # db.create_all() at startup may have created it already
+    if not _has_table('change_sequence'):
+        op.create_table(
+            'change_sequence',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    bind = op.get_bind()
+    if bind.execute(sa.text('SELECT COUNT(*) FROM change_sequence')).scalar() == 0:
+        bind.execute(sa.text(
+            'INSERT INTO change_sequence (id, value) SELECT 1, COALESCE(MAX(id), 0) FROM change_log'
+        ))
+
+
+def downgrade():
+    op.drop_table('change_sequence')
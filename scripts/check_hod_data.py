@@ -12,7 +12,7 @@ with app.app_context():
         teachers = User.query.filter_by(department='CSE', role='teacher', is_active=True).all()
         print(f'\nTeachers in CSE: {len(teachers)}')
         for t in teachers:
-            subjects = t.subjects_teaching.filter_by(is_active=True).all()
+            subjects = [s for s in t.subjects_teaching if s.is_active]
             print(f'  - {t.name}: {len(subjects)} subjects')
             for s in subjects:
                 print(f'    * {s.name} ({s.code})')
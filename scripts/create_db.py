@@ -91,7 +91,7 @@ def main(seed=False):
                 print('Subject created: Data Structures')
 
             # Topic
-            existing_topics = subject.topics.count()
+            existing_topics = len(subject.topics)
             if existing_topics < 6:
                 # Seed a richer ordered topic list if not already present
                 topic_specs = [
@@ -121,7 +121,7 @@ def main(seed=False):
                         )
                         db.session.add(t)
                 db.session.commit()
-                print(f'Seeded topics for {subject.code} (count now: {subject.topics.count()})')
+                print(f'Seeded topics for {subject.code} (count now: {len(subject.topics)})')
 
             # Student user
             student = User.query.filter_by(email='student1@example.com').first()
@@ -173,7 +173,7 @@ def main(seed=False):
                 db.session.commit()
                 print('Subject created: Algorithms')
 
-            if subject2.topics.count() < 6:
+            if len(subject2.topics) < 6:
                 algo_topics = [
                     (1, 'Complexity Analysis', 'Big-O, Omega, Theta notation', 4),
                     (2, 'Recursion & Backtracking', 'Recursive patterns & backtracking', 6),
@@ -199,7 +199,7 @@ def main(seed=False):
                         )
                         db.session.add(t)
                 db.session.commit()
-                print(f'Seeded topics for {subject2.code} (count now: {subject2.topics.count()})')
+                print(f'Seeded topics for {subject2.code} (count now: {len(subject2.topics)})')
 
             # Enroll student in Algorithms as well
             enrollment2 = Enrollment.query.filter_by(student_id=student.id, subject_id=subject2.id).first()
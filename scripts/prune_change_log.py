@@ -0,0 +1,36 @@
+"""Delete delta-sync change log rows older than the retention period.
+
+Clients whose sync cursor is older than the oldest remaining row get
+410 Gone from /api/changes and reload in full. Run daily, e.g. from cron.
+
+Usage (PowerShell):
+  $env:PYTHONPATH = 'D:\syllabus-tracker-fresh'
+  python .\scripts\prune_change_log.py              # CHANGE_LOG_RETENTION_DAYS (30)
+  python .\scripts\prune_change_log.py --days 7
+"""
+
+import argparse
+from app import create_app, db
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Prune the delta-sync change log")
+    p.add_argument("--days", type=int, help="Keep this many days (default: CHANGE_LOG_RETENTION_DAYS)")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    app = create_app()
+    with app.app_context():
+        from app.services.sync import prune_change_log
+
+        days = args.days if args.days is not None else app.config.get('CHANGE_LOG_RETENTION_DAYS', 30)
+        removed = prune_change_log(days)
+        db.session.commit()
+        print(f"[ok] Removed {removed} change log row(s) older than {days} day(s).")
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
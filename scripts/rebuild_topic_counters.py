@@ -0,0 +1,36 @@
+"""Rebuild the denormalized topic counters on Subject from the Topic table.
+
+Subject.topic_count, completed_topic_count and completed_hours are kept
+current by ORM flush hooks. Run this after importing data with raw SQL,
+after restoring a backup, or whenever the counters are suspected to drift.
+
+Usage (PowerShell):
+  $env:PYTHONPATH = 'D:\syllabus-tracker-fresh'
+  python .\scripts\rebuild_topic_counters.py            # all subjects
+  python .\scripts\rebuild_topic_counters.py 12 15      # selected subjects
+"""
+
+import argparse
+from app import create_app, db
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Rebuild Subject topic counters")
+    p.add_argument("subject_ids", nargs="*", type=int, help="Subject ids to rebuild (default: all)")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    app = create_app()
+    with app.app_context():
+        from app.services.progress import rebuild_subject_counters
+
+        updated = rebuild_subject_counters(args.subject_ids or None)
+        db.session.commit()
+        print(f"[ok] Rebuilt topic counters for {updated} subject(s).")
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
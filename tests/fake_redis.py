@@ -0,0 +1,151 @@
+"""In-process stand-in for a Redis server, speaking enough RESP for RedisBackend.
+
+Supports PING, GET, SET (EX/PX), DEL, INCRBY, PEXPIRE (NX), WATCH, UNWATCH,
+MULTI and EXEC with optimistic-locking semantics.
+"""
+import socketserver
+import threading
+import time
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}  # key -> (value bytes, expires_at or None)
+        self.versions = {}  # key -> int, bumped on every write
+
+    def get(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= time.time():
+            del self.data[key]
+            self.bump(key)
+            return None
+        return item[0] if item else None
+
+    def bump(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+
+def _encode(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(_encode(v) for v in value)
+    if isinstance(value, Exception):
+        return b'-ERR ' + str(value).encode() + b'\r\n'
+    if isinstance(value, str):
+        return b'+' + value.encode() + b'\r\n'
+    return b'$%d\r\n' % len(value) + value + b'\r\n'
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        watched = {}
+        queue = None
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name = args[0].upper().decode()
+            if name == 'MULTI':
+                queue = []
+                reply = 'OK'
+            elif name == 'EXEC':
+                with store.lock:
+                    if any(store.versions.get(k, 0) != v for k, v in watched.items()):
+                        reply = None
+                    else:
+                        reply = [self.run(store, cmd) for cmd in queue]
+                watched, queue = {}, None
+                self.wfile.write(b'*-1\r\n' if reply is None else _encode(reply))
+                continue
+            elif queue is not None:
+                queue.append(args)
+                reply = 'QUEUED'
+            elif name == 'WATCH':
+                with store.lock:
+                    for key in args[1:]:
+                        store.get(key)
+                        watched[key] = store.versions.get(key, 0)
+                reply = 'OK'
+            elif name == 'UNWATCH':
+                watched = {}
+                reply = 'OK'
+            else:
+                with store.lock:
+                    reply = self.run(store, args)
+            self.wfile.write(_encode(reply))
+
+    def run(self, store, args):
+        name = args[0].upper().decode()
+        if name == 'PING':
+            return 'PONG'
+        if name == 'GET':
+            return store.get(args[1])
+        if name == 'SET':
+            expires_at = None
+            if len(args) > 3:
+                unit, amount = args[3].upper(), int(args[4])
+                expires_at = time.time() + (amount / 1000 if unit == b'PX' else amount)
+            store.data[args[1]] = (args[2], expires_at)
+            store.bump(args[1])
+            return 'OK'
+        if name == 'DEL':
+            removed = sum(1 for k in args[1:] if store.data.pop(k, None) is not None)
+            for k in args[1:]:
+                store.bump(k)
+            return removed
+        if name == 'INCRBY':
+            current = store.get(args[1])
+            value = int(current or 0) + int(args[2])
+            expires_at = store.data[args[1]][1] if current is not None else None
+            store.data[args[1]] = (str(value).encode(), expires_at)
+            store.bump(args[1])
+            return value
+        if name == 'PEXPIRE':
+            if store.get(args[1]) is None:
+                return 0
+            if b'NX' in (a.upper() for a in args[3:]) and store.data[args[1]][1] is not None:
+                return 0
+            store.data[args[1]] = (store.data[args[1]][0], time.time() + int(args[2]) / 1000)
+            return 1
+        return Exception(f'unknown command {name}')
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.store = _Store()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'redis://{host}:{port}/0'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,159 @@
+import unittest
+from app import create_app, db
+from app.models import Enrollment, Subject, Topic, User
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            BATCH_MAX_OPERATIONS = 5
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.coordinator = User(name='Coord', email='coord@example.com', role='coordinator')
+        self.teacher = User(name='Teacher', email='t@example.com', role='teacher')
+        db.session.add_all([self.coordinator, self.teacher])
+        db.session.commit()
+        self.subject = Subject(name='Maths', code='M1', teacher_id=self.teacher.id)
+        db.session.add(self.subject)
+        db.session.commit()
+        self.subject_id = self.subject.id
+        self.client = self.app.test_client()
+        self.login(self.coordinator)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+
+    def batch(self, operations, atomic=False, status=200):
+        resp = self.client.post('/api/batch', json={'operations': operations, 'atomic': atomic})
+        self.assertEqual(resp.status_code, status, resp.get_data(as_text=True))
+        return resp.get_json()
+
+    def enroll_ops(self, email):
+        url = f'/api/coordinator/subjects/{self.subject.id}/enrollments'
+        return [
+            {'method': 'POST', 'path': '/api/coordinator/users', 'body': {'name': 'New', 'email': email}},
+            {'method': 'POST', 'path': url, 'body': {'email': email}},
+            {'method': 'GET', 'path': url},
+        ]
+
+    def test_operations_run_in_order(self):
+        data = self.batch(self.enroll_ops('new@example.com'))
+        self.assertEqual([r['status'] for r in data['results']], [201, 200, 200])
+        student_id = data['results'][0]['body']['id']
+        self.assertEqual(data['results'][1]['body'], {'status': 'added', 'student_id': student_id})
+        self.assertEqual([e['email'] for e in data['results'][2]['body']['enrollments']], ['new@example.com'])
+
+    def test_failures_do_not_stop_a_plain_batch(self):
+        ops = self.enroll_ops('new@example.com')
+        ops.insert(1, {'method': 'POST', 'path': '/api/coordinator/users', 'body': {'name': 'Dup', 'email': 'new@example.com'}})
+        data = self.batch(ops)
+        self.assertEqual([r['status'] for r in data['results']], [201, 409, 200, 200])
+        self.assertEqual(Enrollment.query.count(), 1)
+
+    def test_atomic_batch_commits_once(self):
+        ops = self.enroll_ops('new@example.com')
+        ops.append({'method': 'POST', 'path': f'/api/coordinator/subjects/{self.subject.id}/topics',
+                    'body': {'topics': [{'name': 'Limits'}, {'name': 'Series'}]}})
+        data = self.batch(ops, atomic=True)
+        self.assertTrue(data['committed'])
+        self.assertIsNone(data['failed'])
+        db.session.remove()
+        self.assertEqual(Enrollment.query.count(), 1)
+        self.assertEqual(db.session.get(Subject, self.subject_id).topic_count, 2)
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        url = f'/api/coordinator/subjects/{self.subject.id}/enrollments'
+        ops = [
+            {'method': 'POST', 'path': '/api/coordinator/users', 'body': {'name': 'New', 'email': 'new@example.com'}},
+            {'method': 'POST', 'path': f'/api/coordinator/subjects/{self.subject.id}/topics', 'body': {'name': 'Limits'}},
+            {'method': 'POST', 'path': url, 'body': {'email': 'missing@example.com'}},
+            {'method': 'GET', 'path': url},
+        ]
+        data = self.batch(ops, atomic=True)
+        self.assertFalse(data['committed'])
+        self.assertEqual(data['failed'], 2)
+        self.assertEqual([r['status'] for r in data['results']], [201, 201, 404, None])
+        self.assertTrue(data['results'][3]['skipped'])
+        db.session.remove()
+        self.assertIsNone(User.query.filter_by(email='new@example.com').first())
+        self.assertEqual(Topic.query.count(), 0)
+        self.assertEqual(db.session.get(Subject, self.subject_id).topic_count, 0)
+
+    def test_operations_keep_their_role_checks(self):
+        self.login(self.teacher)
+        data = self.batch([{'method': 'GET', 'path': '/api/coordinator/users'}])
+        self.assertEqual(data['results'][0]['status'], 403)
+
+    def test_invalid_batches(self):
+        cases = [
+            {'operations': []},
+            {'operations': [{'method': 'GET', 'path': '/dashboard/coordinator'}]},
+            {'operations': [{'method': 'TRACE', 'path': '/api/health'}]},
+            {'operations': [{'method': 'POST', 'path': '/api/batch', 'body': {'operations': []}}]},
+            # Nesting is caught by the endpoint the path resolves to, however it is spelled
+            {'operations': [{'method': 'POST', 'path': '/api/%62atch', 'body': {'operations': []}}]},
+            {'operations': [{'method': 'GET', 'path': '/api/health'}] * 6},
+        ]
+        for body in cases:
+            with self.subTest(body=body):
+                resp = self.client.post('/api/batch', json=body)
+                self.assertEqual(resp.status_code, 400)
+
+    def test_order_lock_is_held_until_the_batch_commits(self):
+        from app.services.batch import _deferred_commits
+        from app.services.topics import _order_lock, move_topic, reorder_topics
+        topics = [Topic(subject_id=self.subject_id, name=f'T{i}', order=(i + 1) * 1024) for i in range(3)]
+        db.session.add_all(topics)
+        db.session.commit()
+        ids = [t.id for t in topics]
+        probe = _order_lock(self.subject_id)
+        with _deferred_commits(db.session()):
+            # A second order change of the same subject reuses the held lock
+            move_topic(ids[2], before_id=ids[0])
+            reorder_topics(self.subject_id, ids)
+            self.assertFalse(probe.acquire(timeout=0))
+        self.assertFalse(probe.acquire(timeout=0))
+        db.session.commit()
+        self.assertTrue(probe.acquire(timeout=0))
+        probe.release()
+
+    def test_atomic_batch_of_moves(self):
+        topics = [Topic(subject_id=self.subject_id, name=f'T{i}', order=(i + 1) * 1024) for i in range(3)]
+        db.session.add_all(topics)
+        db.session.commit()
+        a, b, c = (t.id for t in topics)
+        data = self.batch([
+            {'method': 'POST', 'path': f'/api/coordinator/topics/{c}/move', 'body': {'before_id': a}},
+            {'method': 'POST', 'path': f'/api/coordinator/topics/{b}/move', 'body': {'before_id': c}},
+        ], atomic=True)
+        self.assertTrue(data['committed'], data)
+        db.session.remove()
+        order = [t.id for t in Topic.query.filter_by(subject_id=self.subject_id).order_by(Topic.order)]
+        self.assertEqual(order, [b, c, a])
+
+    def test_deferred_commits_nest(self):
+        from app.services.batch import _deferred_commits
+        session = db.session()
+        with _deferred_commits(session):
+            with _deferred_commits(session):
+                self.assertEqual(session.commit, session.flush)
+            # The outer deferral is still in force
+            self.assertEqual(session.commit, session.flush)
+        self.assertNotIn('commit', session.__dict__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from flask import Flask
+from app.services.cache_backend import MemoryBackend, SQLiteBackend, RedisBackend, NamespacedBackend, get_cache_backend
+from tests.fake_redis import FakeRedisServer
+
+
+class BackendContract:
+    """Behaviour every backend must share; subclasses provide make_backend()."""
+
+    def test_get_set_delete(self):
+        b = self.backend
+        self.assertIsNone(b.get('missing'))
+        b.set('k', {'a': [1, 2]})
+        self.assertEqual(b.get('k'), {'a': [1, 2]})
+        b.delete('k')
+        self.assertIsNone(b.get('k'))
+
+    def test_ttl_expiry(self):
+        b = self.backend
+        b.set('short', 1, ttl=0.05)
+        b.set('long', 2, ttl=60)
+        time.sleep(0.1)
+        self.assertIsNone(b.get('short'))
+        self.assertEqual(b.get('long'), 2)
+
+    def test_incr(self):
+        b = self.backend
+        self.assertEqual(b.incr('c', ttl=60), 1)
+        self.assertEqual(b.incr('c', 5), 6)
+        self.assertEqual(b.get('c'), 6)
+        b.incr('expiring', ttl=0.05)
+        time.sleep(0.1)
+        self.assertEqual(b.incr('expiring', ttl=0.05), 1)
+
+    def test_update(self):
+        b = self.backend
+        result = b.update('u', lambda cur: ((cur or 0) + 10, 60, 'first'))
+        self.assertEqual(result, 'first')
+        self.assertEqual(b.get('u'), 10)
+        self.assertEqual(b.update('u', lambda cur: (None, None, cur)), 10)
+        self.assertEqual(b.get('u'), 10)
+
+    def test_concurrent_updates_are_atomic(self):
+        b = self.backend
+
+        def worker():
+            for _ in range(25):
+                b.update('n', lambda cur: ((cur or 0) + 1, 60, None))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(b.get('n'), 100)
+
+    def test_namespacing(self):
+        a = NamespacedBackend(self.backend, 'a:')
+        c = NamespacedBackend(self.backend, 'c:')
+        a.set('k', 1)
+        c.set('k', 2)
+        self.assertEqual((a.get('k'), c.get('k')), (1, 2))
+
+
+class TestMemoryBackend(BackendContract, unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryBackend(max_entries=100)
+
+    def test_lru_bound(self):
+        b = MemoryBackend(max_entries=3)
+        for k in 'abc':
+            b.set(k, k)
+        b.get('a')
+        b.set('d', 'd')
+        self.assertEqual(len(b), 3)
+        self.assertIsNone(b.get('b'))
+        self.assertEqual(b.get('a'), 'a')
+
+
+def _sqlite_incr(path, n):
+    b = SQLiteBackend(path)
+    for _ in range(n):
+        b.incr('shared', ttl=60)
+
+
+class TestSQLiteBackend(BackendContract, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache.sqlite3')
+        self.backend = SQLiteBackend(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shared_across_processes(self):
+        mp = multiprocessing.get_context('fork')
+        procs = [mp.Process(target=_sqlite_incr, args=(self.path, 50)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(30)
+        self.assertEqual(self.backend.get('shared'), 200)
+
+
+class TestRedisBackend(BackendContract, unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer().__enter__()
+        self.backend = RedisBackend.from_url(self.server.url)
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+
+    def test_incr_sets_ttl_only_on_creation(self):
+        self.assertEqual(self.backend.incr('c', ttl=60), 1)
+        expires_at = self.server.store.data[b'c'][1]
+        self.assertIsNotNone(expires_at)
+        self.assertEqual(self.backend.incr('c', ttl=120), 2)
+        self.assertEqual(self.server.store.data[b'c'][1], expires_at)
+        # The connection stays in step after the transaction replies
+        self.assertEqual(self.backend.execute('PING'), 'PONG')
+
+
+class TestBackendSelection(unittest.TestCase):
+    def test_interface_is_abstract(self):
+        from app.services.cache_backend import CacheBackend
+        with self.assertRaises(TypeError):
+            CacheBackend()
+
+    def test_configured_backend_is_shared(self):
+        app = Flask(__name__)
+        app.config['CACHE_BACKEND'] = 'memory'
+        with app.app_context():
+            get_cache_backend('x').set('k', 1)
+            self.assertEqual(get_cache_backend('x').get('k'), 1)
+            self.assertIsNone(get_cache_backend('y').get('k'))
+            self.assertIsInstance(get_cache_backend(), MemoryBackend)
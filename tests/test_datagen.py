@@ -0,0 +1,88 @@
+import unittest
+from sqlalchemy import func, select
+from app import create_app, db
+from app.models import Enrollment, Subject, Topic, TopicProgress, User
+from app.services.datagen import (
+    DEFAULT_PASSWORD, DatasetError, dataset_counts, dataset_email, generate_dataset,
+)
+from app.services.progress import rebuild_subject_counters
+
+SCALE = 0.002
+
+
+class TestDatasetGenerator(unittest.TestCase):
+    def make_app(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            WTF_CSRF_ENABLED = False
+            DISABLE_RATE_LIMITS = True
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+        return app
+
+    def snapshot(self, app, seed):
+        """Generated rows of the tables most derived from randomness."""
+        with app.app_context():
+            generate_dataset(SCALE, seed=seed)
+            tables = (User.__table__, Subject.__table__, Enrollment.__table__, TopicProgress.__table__)
+            rows = {}
+            for t in tables:
+                # Password hashes are salted, so they differ between runs
+                columns = [c for c in t.c if c.name != 'password_hash']
+                rows[t.name] = db.session.execute(select(*columns).order_by(*t.primary_key.columns)).fetchall()
+            return rows
+
+    def test_same_seed_same_rows(self):
+        first = self.snapshot(self.make_app(), seed=7)
+        self.assertEqual(first, self.snapshot(self.make_app(), seed=7))
+        other = self.snapshot(self.make_app(), seed=8)
+        self.assertNotEqual(first['enrollment'], other['enrollment'])
+
+    def test_counts_and_consistency(self):
+        app = self.make_app()
+        counts = dataset_counts(SCALE)
+        with app.app_context():
+            written = generate_dataset(SCALE)
+            self.assertEqual(written['subject'], counts['subjects'])
+            self.assertEqual(written['topic'], counts['topics'])
+            self.assertEqual(written['comment'], counts['comments'])
+            self.assertGreater(written['topic_progress'], counts['topic_progress'] * 0.9)
+            self.assertLessEqual(written['topic_progress'], counts['topic_progress'])
+
+            # Progress rows only exist for topics of subjects the student takes
+            orphans = db.session.execute(
+                select(func.count()).select_from(TopicProgress)
+                .join(Topic, Topic.id == TopicProgress.topic_id)
+                .outerjoin(Enrollment, (Enrollment.subject_id == Topic.subject_id)
+                           & (Enrollment.student_id == TopicProgress.student_id))
+                .where(Enrollment.student_id.is_(None))
+            ).scalar()
+            self.assertEqual(orphans, 0)
+
+            # Counters written with the subjects match a rebuild from topics
+            before = db.session.execute(select(Subject.id, Subject.topic_count, Subject.completed_topic_count,
+                                               Subject.completed_hours).order_by(Subject.id)).fetchall()
+            rebuild_subject_counters()
+            after = db.session.execute(select(Subject.id, Subject.topic_count, Subject.completed_topic_count,
+                                              Subject.completed_hours).order_by(Subject.id)).fetchall()
+            self.assertEqual(before, after)
+
+            with self.assertRaises(DatasetError):
+                generate_dataset(SCALE)
+
+    def test_generated_users_can_log_in(self):
+        app = self.make_app()
+        with app.app_context():
+            generate_dataset(SCALE)
+        client = app.test_client()
+        resp = client.post('/login', data={'email': dataset_email('teacher', 1), 'password': DEFAULT_PASSWORD})
+        self.assertEqual(resp.status_code, 302)
+        self.assertTrue(resp.headers['Location'].endswith('/dashboard/teacher'))
+
+
+if __name__ == '__main__':
+    unittest.main()
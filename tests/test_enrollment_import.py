@@ -0,0 +1,77 @@
+import io
+import unittest
+from app import create_app, db
+from app.models import Enrollment, Subject, User
+
+
+class TestEnrollmentImport(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        coordinator = User(name='Coord', email='c@example.com', role='coordinator')
+        teacher = User(name='Teacher', email='t@example.com', role='teacher')
+        db.session.add_all([coordinator, teacher])
+        db.session.commit()
+        self.subject = Subject(name='DS', code='CS101', teacher_id=teacher.id)
+        db.session.add(self.subject)
+        db.session.add_all([
+            User(name=f'S{i}', email=f's{i}@example.com', role='student') for i in range(1200)
+        ])
+        db.session.add(User(name='Gone', email='gone@example.com', role='student', is_active=False))
+        db.session.commit()
+        db.session.add(Enrollment(subject_id=self.subject.id, student_id=User.query.filter_by(email='s0@example.com').one().id))
+        db.session.commit()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(coordinator.id)
+            sess['_fresh'] = True
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def upload(self, text, query=''):
+        data = {'file': (io.BytesIO(text.encode('utf-8')), 'enrollments.csv')}
+        return self.client.post(f'/api/coordinator/subjects/{self.subject.id}/enrollments/upload{query}',
+                                data=data, content_type='multipart/form-data')
+
+    def test_per_row_report(self):
+        csv_text = '\ufeffemail\nS1@example.com\ns0@example.com\nt@example.com\nnot-an-email\n\ns1@example.com\ngone@example.com\nnobody@example.com\n'
+        resp = self.upload(csv_text)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual((data['added'], data['skipped'], data['invalid']), (1, 5, 1))
+        by_row = {r['row']: r for r in data['rows']}
+        self.assertEqual(by_row[2]['status'], 'added')
+        self.assertEqual(by_row[3]['reason'], 'already enrolled')
+        self.assertEqual(by_row[4]['reason'], 'user is not a student')
+        self.assertEqual(by_row[5]['status'], 'invalid')
+        self.assertEqual(by_row[7]['reason'], 'duplicate row')
+        self.assertEqual(by_row[8]['reason'], 'no active user with this email')
+        self.assertEqual(Enrollment.query.filter_by(subject_id=self.subject.id).count(), 2)
+
+    def test_large_file_uses_batched_queries(self):
+        from sqlalchemy import event
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            csv_text = ''.join(f's{i}@example.com\n' for i in range(1200))
+            resp = self.upload(csv_text, '?report=summary')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        data = resp.get_json()
+        self.assertEqual((data['added'], data['skipped'], data['invalid']), (1199, 1, 0))
+        self.assertNotIn('rows', data)
+        self.assertEqual(Enrollment.query.filter_by(subject_id=self.subject.id).count(), 1200)
+        # 3 chunks x (user lookup + enrollment lookup + insert), plus auth, subject checks
+        # and the report cache invalidation
+        self.assertLess(len(statements), 16)
@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import unittest
+from app import create_app, db
+from app.models import Enrollment, Subject, Topic, User
+from app.services.export import iter_csv, iter_ndjson
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            DISABLE_REPORT_CACHE = True
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.coordinator = User(name='Coord', email='c@example.com', role='coordinator')
+        self.hod = User(name='Head', email='h@example.com', role='hod', department='CSE')
+        teacher = User(name='Teacher', email='t@example.com', role='teacher', department='CSE')
+        db.session.add_all([self.coordinator, self.hod, teacher])
+        db.session.commit()
+        self.subject = Subject(name='DS', code='CS101', teacher_id=teacher.id)
+        db.session.add(self.subject)
+        db.session.add_all([
+            User(name=f'S{i:04d}', email=f's{i}@example.com', role='student') for i in range(2500)
+        ])
+        db.session.commit()
+        db.session.add_all([
+            Topic(subject_id=self.subject.id, name='T1', order=1, is_completed=True),
+            Topic(subject_id=self.subject.id, name='T2', order=2),
+        ])
+        db.session.execute(Enrollment.__table__.insert(), [
+            {'subject_id': self.subject.id, 'student_id': uid}
+            for (uid,) in db.session.query(User.id).filter(User.role == 'student')
+        ])
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+
+    def test_encoders_chunk_rows(self):
+        rows = [(i, f'n{i}') for i in range(5)]
+        chunks = list(iter_csv(rows, ('id', 'name'), batch_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks).splitlines()[0], 'id,name')
+        lines = ''.join(iter_ndjson(rows, ('id', 'name'), batch_size=2)).splitlines()
+        self.assertEqual(json.loads(lines[4]), {'id': 4, 'name': 'n4'})
+
+    def test_enrollment_export_streams_csv(self):
+        self.login(self.coordinator)
+        resp = self.client.get(f'/api/coordinator/subjects/{self.subject.id}/enrollments/export')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.is_streamed)
+        self.assertIn('CS101_enrollments.csv', resp.headers['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[0]['name'], 'S0000')
+        self.assertEqual(rows[0]['status'], 'active')
+
+    def test_user_export_ndjson(self):
+        self.login(self.coordinator)
+        resp = self.client.get('/api/coordinator/users/export?format=ndjson')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        users = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(users), User.query.count())
+        self.assertEqual(users[0]['email'], 'c@example.com')
+        self.assertIsInstance(users[0]['created_at'], str)
+
+    def test_export_does_not_load_orm_objects(self):
+        self.login(self.coordinator)
+        resp = self.client.get(f'/api/coordinator/subjects/{self.subject.id}/enrollments/export')
+        resp.get_data()
+        # Only the subject lookup and the logged-in user are identity-mapped
+        self.assertLess(len(db.session.identity_map), 5)
+
+    def test_invalid_format(self):
+        self.login(self.coordinator)
+        self.assertEqual(self.client.get('/api/coordinator/users/export?format=xml').status_code, 400)
+
+    def test_coordinator_exports_require_role(self):
+        self.login(self.hod)
+        self.assertEqual(self.client.get('/api/coordinator/users/export').status_code, 403)
+
+    def test_hod_subject_report_export(self):
+        self.login(self.hod)
+        resp = self.client.get('/api/hod/reports/subjects/export')
+        self.assertEqual(resp.status_code, 200)
+        rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row['code'], 'CS101')
+        self.assertEqual(row['teacher_name'], 'Teacher')
+        self.assertEqual((row['total_topics'], row['completed_topics']), ('2', '1'))
+        self.assertEqual(float(row['progress_percent']), 50.0)
+        self.assertEqual(row['student_count'], '2500')
+        self.assertEqual(row['status'], 'Behind')
+
+
+if __name__ == '__main__':
+    unittest.main()
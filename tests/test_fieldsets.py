@@ -0,0 +1,114 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Enrollment, Subject, Topic, User
+
+
+class TestFieldsets(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.coordinator = User(name='Coord', email='coord@example.com', role='coordinator')
+        self.teacher = User(name='Teacher', email='t@example.com', role='teacher', department='CSE')
+        students = [User(name=f'Student {i}', email=f's{i}@example.com', role='student') for i in range(6)]
+        db.session.add_all([self.coordinator, self.teacher, *students])
+        db.session.commit()
+        self.subjects = [Subject(name=f'Subject {i}', code=f'C{i:02d}', teacher_id=self.teacher.id) for i in range(12)]
+        db.session.add_all(self.subjects)
+        db.session.commit()
+        # Subject 0: three topics (one covered), four active and two dropped students
+        self.subject = self.subjects[0]
+        for i in range(3):
+            db.session.add(Topic(subject_id=self.subject.id, name=f'T{i}', order=(i + 1) * 10,
+                                 hours_allocated=2, is_completed=i == 0))
+        for i, student in enumerate(students):
+            db.session.add(Enrollment(student_id=student.id, subject_id=self.subject.id,
+                                      status='active' if i < 4 else 'dropped'))
+        db.session.commit()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.coordinator.id)
+            sess['_fresh'] = True
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def get(self, url):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            resp = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+        return resp.get_json(), statements
+
+    def test_default_subject_fields(self):
+        data, _ = self.get('/api/coordinator/subjects?limit=1')
+        self.assertEqual(list(data['subjects'][0]), ['id', 'name', 'code', 'teacher_id', 'teacher_name', 'is_active'])
+
+    def test_sparse_fields_and_includes_in_one_query(self):
+        data, statements = self.get('/api/coordinator/subjects?fields=code,name'
+                                    '&include=teacher,topic_counts,enrollment_counts&limit=100')
+        # The logged-in user and the page itself
+        self.assertLessEqual(len(statements), 2)
+        first = data['subjects'][0]
+        self.assertEqual(list(first), ['id', 'code', 'name', 'teacher', 'topic_counts', 'enrollment_counts'])
+        self.assertEqual(first['teacher'], {'id': self.teacher.id, 'name': 'Teacher',
+                                            'email': 't@example.com', 'department': 'CSE'})
+        self.assertEqual(first['topic_counts'], {'total': 3, 'completed': 1, 'completed_hours': 2})
+        self.assertEqual(first['enrollment_counts'], {'total': 6, 'active': 4})
+        self.assertEqual(data['subjects'][1]['enrollment_counts'], {'total': 0, 'active': 0})
+
+    def test_paging_without_the_sort_field(self):
+        ids, cursor = [], None
+        while True:
+            data, _ = self.get('/api/coordinator/subjects?sort=name&dir=desc&fields=code&limit=5'
+                               + (f'&cursor={cursor}' if cursor else ''))
+            self.assertTrue(all(list(s) == ['id', 'code'] for s in data['subjects']))
+            ids.extend(s['id'] for s in data['subjects'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        expected = [s.id for s in sorted(self.subjects, key=lambda s: s.name, reverse=True)]
+        self.assertEqual(ids, expected)
+
+    def test_topics_fields_and_subject_includes(self):
+        data, statements = self.get(f'/api/coordinator/subjects/{self.subject.id}/topics'
+                                    '?fields=name,hours_allocated&include=teacher,enrollment_counts')
+        self.assertLessEqual(len(statements), 2)
+        self.assertEqual(data['subject']['name'], 'Subject 0')
+        self.assertEqual(data['subject']['teacher']['name'], 'Teacher')
+        self.assertEqual(data['subject']['enrollment_counts'], {'total': 6, 'active': 4})
+        self.assertEqual([t['name'] for t in data['topics']], ['T0', 'T1', 'T2'])
+        self.assertEqual(list(data['topics'][0]), ['id', 'name', 'hours_allocated'])
+
+    def test_topics_of_subject_without_topics(self):
+        data, _ = self.get(f'/api/coordinator/subjects/{self.subjects[1].id}/topics')
+        self.assertEqual(data['subject'], {'id': self.subjects[1].id, 'name': 'Subject 1', 'code': 'C01'})
+        self.assertEqual(data['topics'], [])
+        self.assertEqual(self.client.get('/api/coordinator/subjects/999/topics').status_code, 404)
+
+    def test_unknown_names(self):
+        for url in ('/api/coordinator/subjects?fields=password_hash',
+                    '/api/coordinator/subjects?include=students',
+                    f'/api/coordinator/subjects/{self.subject.id}/topics?fields=teacher_name',
+                    f'/api/coordinator/subjects/{self.subject.id}/topics?include=topics'):
+            with self.subTest(url=url):
+                resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 400)
+                self.assertIn('unknown', resp.get_json()['error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from app import create_app, db
+from app.models import Enrollment, Subject, Topic, User
+from app.services.loading import LoadGraphError, load_graph
+
+
+class TestLoadGraph(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        teacher = User(name='Teacher', email='t@example.com', role='teacher')
+        student = User(name='Student', email='s@example.com', role='student')
+        db.session.add_all([teacher, student])
+        db.session.flush()
+        for i in range(3):
+            subject = Subject(name=f'S{i}', code=f'C{i}', teacher_id=teacher.id)
+            db.session.add(subject)
+            db.session.flush()
+            db.session.add_all([Topic(subject_id=subject.id, name=f'T{j}', order=3 - j) for j in range(3)])
+            db.session.add(Enrollment(student_id=student.id, subject_id=subject.id))
+        db.session.commit()
+        self.student_id = student.id
+        db.session.expunge_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def count_statements(self, fn):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            fn()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return len(statements)
+
+    def test_graph_loads_in_constant_statements(self):
+        def render():
+            rows = (Enrollment.query.filter_by(student_id=self.student_id)
+                    .options(*load_graph(Enrollment, 'subject.teacher', 'subject.topics')).all())
+            for e in rows:
+                self.assertEqual(e.subject.teacher.name, 'Teacher')
+                self.assertEqual([t.order for t in e.subject.topics], [1, 2, 3])
+        # Enrollments joined to subjects and teachers, then one IN query for topics
+        self.assertEqual(self.count_statements(render), 2)
+
+    def test_strict_graph_raises_on_undeclared_relationship(self):
+        rows = (Enrollment.query.filter_by(student_id=self.student_id)
+                .options(*load_graph(Enrollment, 'subject', strict=True)).all())
+        with self.assertRaises(InvalidRequestError):
+            rows[0].subject.teacher
+        with self.assertRaises(InvalidRequestError):
+            rows[0].student
+
+    def test_rejects_unknown_and_dynamic_relationships(self):
+        with self.assertRaises(LoadGraphError):
+            load_graph(Enrollment, 'subject.nothing')
+        with self.assertRaises(LoadGraphError):
+            load_graph(Subject, 'enrollments')
+
+
+if __name__ == '__main__':
+    unittest.main()
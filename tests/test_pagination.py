@@ -0,0 +1,158 @@
+import unittest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Subject, User
+from app.services.listings import list_subjects, list_users
+from app.services.read_models import SubjectRow, UserRow
+
+
+class TestKeysetPagination(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.coordinator = User(name='Coord', email='coord@example.com', role='coordinator')
+        db.session.add(self.coordinator)
+        # Duplicate names and NULL departments exercise the id tiebreak and NULL ordering
+        for i in range(120):
+            db.session.add(User(
+                name=f'Student {i % 40:02d}', email=f's{i}@example.com', role='student',
+                department=None if i % 3 == 0 else f'D{i % 4}', is_active=i % 10 != 0,
+            ))
+        teachers = [User(name=f'Teacher {i}', email=f't{i}@example.com', role='teacher',
+                         department='CSE' if i % 2 else 'ECE') for i in range(5)]
+        db.session.add_all(teachers)
+        db.session.commit()
+        for i in range(60):
+            db.session.add(Subject(name=f'Subject {i}', code=None if i % 7 == 0 else f'C{i:03d}',
+                                   teacher_id=teachers[i % 5].id, is_active=i % 6 != 0))
+        db.session.commit()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(self.coordinator.id)
+            sess['_fresh'] = True
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def walk(self, url, key):
+        items, cursor, pages = [], None, 0
+        while True:
+            sep = '&' if '?' in url else '?'
+            resp = self.client.get(url + (f'{sep}cursor={cursor}' if cursor else ''))
+            self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+            data = resp.get_json()
+            items.extend(data[key])
+            pages += 1
+            cursor = data['next_cursor']
+            if not cursor:
+                return items, pages
+
+    def test_users_pages_cover_every_row_once(self):
+        for sort in ('name', 'department', 'created_at'):
+            for direction in ('asc', 'desc'):
+                users, pages = self.walk(f'/api/coordinator/users?sort={sort}&dir={direction}&limit=17', 'users')
+                self.assertEqual(len(users), User.query.count())
+                self.assertEqual(len({u['id'] for u in users}), len(users))
+                self.assertEqual(pages, 8)
+
+    def test_user_order_matches_sort(self):
+        users, _ = self.walk('/api/coordinator/users?sort=name&dir=desc&limit=9', 'users')
+        keys = [(u['name'], u['id']) for u in users]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_user_filters(self):
+        users, _ = self.walk('/api/coordinator/users?role=student&active=true&q=student%200&limit=50', 'users')
+        self.assertTrue(users)
+        for u in users:
+            self.assertEqual(u['role'], 'student')
+            self.assertTrue(u['is_active'])
+            self.assertTrue(u['name'].startswith('Student 0'))
+        users, _ = self.walk('/api/coordinator/users?department=D1', 'users')
+        self.assertEqual({u['department'] for u in users}, {'D1'})
+        # LIKE wildcards in the prefix are literal
+        users, _ = self.walk('/api/coordinator/users?q=%25', 'users')
+        self.assertEqual(users, [])
+
+    def test_subjects_pages_with_null_codes(self):
+        for direction in ('asc', 'desc'):
+            subjects, _ = self.walk(f'/api/coordinator/subjects?sort=code&dir={direction}&limit=7', 'subjects')
+            self.assertEqual(len(subjects), 60)
+            self.assertEqual(len({s['id'] for s in subjects}), 60)
+            codes = [s['code'] for s in subjects]
+            # SQLite sorts NULL below every code
+            nulls = [c is None for c in codes]
+            self.assertEqual(nulls, sorted(nulls, reverse=direction == 'asc'))
+
+    def test_pages_are_read_in_index_order(self):
+        from sqlalchemy import text
+        from app.services.listings import SUBJECT_SORTS, USER_SORTS
+        from app.services.pagination import _after, _order_by
+        for model, sorts in ((User, USER_SORTS), (Subject, SUBJECT_SORTS)):
+            for column in sorts.values():
+                for direction in ('asc', 'desc'):
+                    query = (db.session.query(model.id)
+                             .filter(_after(column, model.id, direction, None, 1))
+                             .order_by(*_order_by(column, model.id, direction)).limit(51))
+                    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+                    plan = ' '.join(row[-1] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+                    self.assertNotIn('TEMP B-TREE', plan, f'{column} {direction}: {plan}')
+
+    def test_subjects_api_pages_by_default(self):
+        data = self.client.get('/api/coordinator/subjects').get_json()
+        self.assertEqual(len(data['subjects']), 50)
+        subjects, pages = self.walk('/api/coordinator/subjects', 'subjects')
+        self.assertEqual((len(subjects), pages), (60, 2))
+
+    def test_subject_filters_and_teacher_loaded_with_page(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            resp = self.client.get('/api/coordinator/subjects?department=CSE&active=true&limit=100')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        subjects = resp.get_json()['subjects']
+        self.assertTrue(subjects)
+        self.assertTrue(all(s['is_active'] and s['teacher_name'] for s in subjects))
+        # The logged-in user and the page itself, no per-row teacher lookups
+        self.assertLessEqual(len(statements), 2)
+
+    def test_listings_return_projected_rows(self):
+        db.session.expunge_all()
+        with self.app.test_request_context():
+            users = list_users({'limit': '50'})['items']
+            subjects = list_subjects({'limit': '50'})['items']
+        self.assertTrue(all(isinstance(u, UserRow) for u in users))
+        self.assertTrue(all(isinstance(s, SubjectRow) for s in subjects))
+        self.assertTrue(all(s.teacher_name.startswith('Teacher') for s in subjects))
+        # Nothing was loaded as an entity
+        self.assertEqual(len(db.session.identity_map), 0)
+
+    def test_invalid_arguments(self):
+        self.assertEqual(self.client.get('/api/coordinator/users?sort=password_hash').status_code, 400)
+        self.assertEqual(self.client.get('/api/coordinator/users?cursor=garbage').status_code, 400)
+        cursor = self.client.get('/api/coordinator/users?limit=5').get_json()['next_cursor']
+        resp = self.client.get(f'/api/coordinator/users?sort=email&cursor={cursor}')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_html_views_paginate(self):
+        resp = self.client.get('/dashboard/coordinator/users?limit=10')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'Next page', resp.data)
+        resp = self.client.get('/dashboard/coordinator/subjects?q=C01')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b'C010', resp.data)
+        self.assertNotIn(b'C020', resp.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 from app import create_app, db
 from app.models import Subject, Topic, User
-from app.services.progress import subject_progress, topics_progress
+from app.services.progress import subject_progress, subjects_progress, topics_progress
 
 class TestProgressHelper(unittest.TestCase):
     def setUp(self):
@@ -57,6 +57,96 @@ class TestProgressHelper(unittest.TestCase):
             t = Topic(subject_id=subj.id, name=f'Topic {i}', order=i, is_completed=(i % 2 == 0))
             db.session.add(t)
         db.session.commit()
-        all_topics = subj.topics.order_by(Topic.order.asc()).all()
+        all_topics = subj.topics
         self.assertEqual(topics_progress(all_topics), 40.0)  # 2/5 completed
 
+    def test_subjects_progress_batch(self):
+        a = Subject(name='Networks', code='CS301', teacher_id=self.teacher.id)
+        b = Subject(name='Compilers', code='CS302', teacher_id=self.teacher.id)
+        empty = Subject(name='Ethics', code='HS101', teacher_id=self.teacher.id)
+        db.session.add_all([a, b, empty])
+        db.session.commit()
+        for i in range(1, 5):
+            db.session.add(Topic(subject_id=a.id, name=f'A{i}', order=i, is_completed=(i == 1)))
+        for i in range(1, 3):
+            db.session.add(Topic(subject_id=b.id, name=f'B{i}', order=i, is_completed=True))
+        db.session.commit()
+        result = subjects_progress([a.id, b.id, empty.id])
+        self.assertEqual(result[a.id], {'completed': 1, 'total': 4, 'percent': 25.0})
+        self.assertEqual(result[b.id], {'completed': 2, 'total': 2, 'percent': 100.0})
+        self.assertEqual(result[empty.id], {'completed': 0, 'total': 0, 'percent': 0.0})
+        self.assertEqual(subjects_progress([]), {})
+
+    def test_counters_follow_topic_changes(self):
+        subj = Subject(name='OS', code='CS401', teacher_id=self.teacher.id)
+        db.session.add(subj)
+        db.session.commit()
+        a = Topic(subject_id=subj.id, name='Processes', order=1, hours_allocated=3)
+        b = Topic(subject=subj, name='Threads', order=2, hours_allocated=2, is_completed=True)
+        db.session.add_all([a, b])
+        db.session.commit()
+        self.assertEqual((subj.topic_count, subj.completed_topic_count, subj.completed_hours), (2, 1, 2))
+
+        a.is_completed = True
+        db.session.commit()
+        self.assertEqual((subj.topic_count, subj.completed_topic_count, subj.completed_hours), (2, 2, 5))
+
+        b.hours_allocated = 4
+        db.session.commit()
+        self.assertEqual(subj.completed_hours, 7)
+
+        db.session.delete(a)
+        db.session.commit()
+        self.assertEqual((subj.topic_count, subj.completed_topic_count, subj.completed_hours), (1, 1, 4))
+        self.assertEqual(subject_progress(subj), 100.0)
+
+    def test_rebuild_subject_counters(self):
+        from app.services.progress import rebuild_subject_counters
+        subj = Subject(name='AI', code='CS402', teacher_id=self.teacher.id)
+        db.session.add(subj)
+        db.session.commit()
+        for i in range(1, 4):
+            db.session.add(Topic(subject_id=subj.id, name=f'T{i}', order=i, hours_allocated=2, is_completed=(i < 3)))
+        db.session.commit()
+        # Drift the counters behind the ORM's back, then repair them
+        db.session.execute(Subject.__table__.update().values(topic_count=0, completed_topic_count=0, completed_hours=0))
+        db.session.commit()
+        self.assertEqual(subj.topic_count, 0)
+        self.assertEqual(rebuild_subject_counters(), 1)
+        db.session.commit()
+        self.assertEqual((subj.topic_count, subj.completed_topic_count, subj.completed_hours), (3, 2, 4))
+
+    def test_department_analytics(self):
+        from app.models import Enrollment
+        from app.services.analytics import department_analytics
+        other = User(name='Other', email='o@example.com', role='teacher', department='ECE')
+        students = [User(name=f'S{i}', email=f's{i}@example.com', role='student', department='CSE') for i in range(3)]
+        db.session.add_all([other] + students)
+        db.session.commit()
+        a = Subject(name='DBMS', code='CS501', teacher_id=self.teacher.id)
+        b = Subject(name='Networks', code='CS502', teacher_id=self.teacher.id)
+        c = Subject(name='Signals', code='EC501', teacher_id=other.id)
+        db.session.add_all([a, b, c])
+        db.session.commit()
+        for i in range(1, 5):
+            db.session.add(Topic(subject_id=a.id, name=f'T{i}', order=i, is_completed=(i <= 3)))
+        db.session.add(Topic(subject_id=b.id, name='Only', order=1))
+        for st in students:
+            db.session.add(Enrollment(subject_id=a.id, student_id=st.id))
+        db.session.add(Enrollment(subject_id=b.id, student_id=students[0].id))
+        db.session.add(Enrollment(subject_id=c.id, student_id=students[1].id))
+        db.session.commit()
+
+        stats = department_analytics('CSE')
+        self.assertEqual(stats['faculty_count'], 1)
+        self.assertEqual(stats['subject_count'], 2)
+        self.assertEqual(stats['student_count'], 3)
+        self.assertEqual(stats['avg_progress'], 60.0)  # 3 of 5 topics
+        faculty = stats['faculty'][0]
+        self.assertEqual(faculty['student_count'], 3)
+        self.assertEqual(faculty['enrollment_count'], 4)
+        self.assertEqual(faculty['avg_progress'], 37.5)  # (75 + 0) / 2
+        report = {r['subject']['code']: r for r in stats['subjects']}
+        self.assertEqual(report['CS501']['student_count'], 3)
+        self.assertEqual(report['CS501']['progress_percent'], 75.0)
+        self.assertEqual(report['CS502']['teacher_name'], 'Teacher')
@@ -0,0 +1,334 @@
+"""Query-count budgets for the dashboard, student and API routes.
+
+Every route below runs against two seeded databases, one with 5 subjects
+and one with 500 (and proportionally more students, topics, enrollments
+and progress rows). A route passes when it runs the same number of SQL
+statements at both sizes, i.e. nothing loads per row, and stays within the
+budget declared next to it. Raise a budget only together with the change
+that needs the extra statements. Every route except static files must have
+an entry, so a new route fails until it is given a budget. Each test starts
+from a fresh copy of the seeded databases, so the order tests run in does
+not change their counts.
+"""
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from itsdangerous import URLSafeTimedSerializer
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models import ChangeLog, ChangeSequence, Department, Enrollment, Subject, Topic, TopicProgress, User
+from app.services.progress import rebuild_subject_counters
+from app.services.topics import ORDER_GAP
+
+SCALES = (5, 500)
+TOPICS_PER_SUBJECT = 4
+TEACHERS = 5
+
+# Ids fixed by the seeding order below
+COORDINATOR_ID, HOD_ID, FIRST_TEACHER_ID = 1, 2, 3
+FIRST_STUDENT_ID = FIRST_TEACHER_ID + TEACHERS
+# A deactivated student, past every other user at both scales
+FORMER_STUDENT_ID = 10000
+
+SECRET_KEY = 'test'
+# Every seeded user's password; a cheap hash keeps seeding fast
+PASSWORD = 'budget-password'
+PASSWORD_HASH = generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000')
+
+# (role, method, path, budget, request kwargs). {subject} belongs to the
+# logged-in teacher and has every student enrolled, {topic} and
+# {other_topic} are its first two topics, {student} is an enrolled student
+# other than the logged-in one, {open_topic} an uncovered topic of
+# {subject} and {former_student} a deactivated student. Role None sends the
+# request logged out.
+ROUTES = [
+    (None, 'GET', '/', 0, {}),
+    (None, 'GET', '/about', 0, {}),
+    (None, 'GET', '/help', 0, {}),
+    (None, 'GET', '/health', 0, {}),
+    (None, 'GET', '/login', 0, {}),
+    (None, 'POST', '/login', 1, {'data': {'email': 'budget.student@example.com', 'password': PASSWORD}}),
+    (None, 'GET', '/register', 0, {}),
+    (None, 'POST', '/register', 3, {'data': {
+        'name': 'Registered', 'email': 'registered@example.com', 'department': 'CSE',
+        'password': PASSWORD, 'password2': PASSWORD}}),
+    (None, 'GET', '/forgot-password', 0, {}),
+    (None, 'POST', '/forgot-password', 1, {'data': {'email': 'budget.student@example.com'}}),
+    (None, 'GET', '/reset-password/{reset_token}', 0, {}),
+    (None, 'POST', '/reset-password/{reset_token}', 2, {'data': {'password': 'new-password', 'password2': 'new-password'}}),
+    ('student', 'GET', '/change-password', 1, {}),
+    ('student', 'POST', '/change-password', 2, {'data': {
+        'current_password': PASSWORD, 'new_password': 'new-password', 'new_password2': 'new-password'}}),
+    ('student', 'GET', '/logout', 1, {}),
+    ('student', 'GET', '/dashboard/student', 2, {}),
+    ('student', 'GET', '/dashboard/student/schedule', 1, {}),
+    ('student', 'GET', '/student/subjects', 2, {}),
+    ('student', 'GET', '/student/subject/{subject}', 4, {}),
+    ('teacher', 'GET', '/dashboard/teacher', 3, {}),
+    ('teacher', 'GET', '/dashboard/teacher/subject/{subject}', 4, {}),
+    ('teacher', 'GET', '/dashboard/teacher/schedule', 1, {}),
+    ('teacher', 'POST', '/dashboard/teacher/topic/{open_topic}/cover', 10, {'data': {'completion_notes': 'done'}}),
+    ('teacher', 'POST', '/dashboard/teacher/topics/cover', 10,
+     {'json': {'topic_ids': ['{topic}', '{other_topic}'], 'covered': True}}),
+    ('hod', 'GET', '/dashboard/hod', 7, {}),
+    ('hod', 'GET', '/dashboard/hod/faculty', 6, {}),
+    ('hod', 'GET', '/dashboard/hod/reports', 6, {}),
+    ('hod', 'GET', '/dashboard/hod/schedule', 1, {}),
+    ('hod', 'GET', '/api/hod/reports/subjects/export', 2, {}),
+    ('coordinator', 'GET', '/dashboard/coordinator', 6, {}),
+    ('coordinator', 'GET', '/dashboard/coordinator/users', 2, {}),
+    ('coordinator', 'GET', '/dashboard/coordinator/subjects', 3, {}),
+    ('coordinator', 'GET', '/dashboard/coordinator/enrollments', 2, {}),
+    ('coordinator', 'GET', '/dashboard/coordinator/schedule', 1, {}),
+    ('coordinator', 'GET', '/api/coordinator/subjects', 2, {}),
+    ('coordinator', 'GET', '/api/coordinator/users', 2, {}),
+    ('coordinator', 'GET', '/api/coordinator/subjects?include=teacher,topic_counts,enrollment_counts', 2, {}),
+    ('coordinator', 'GET', '/api/coordinator/subjects/{subject}/topics', 2, {}),
+    ('coordinator', 'GET', '/api/coordinator/subjects/{subject}/topics?fields=name&include=teacher,enrollment_counts',
+     2, {}),
+    ('coordinator', 'GET', '/api/coordinator/subjects/{subject}/enrollments', 3, {}),
+    ('coordinator', 'GET', '/api/coordinator/subjects/{subject}/enrollments/export', 3, {}),
+    ('coordinator', 'GET', '/api/coordinator/users/export', 2, {}),
+    ('coordinator', 'GET', '/api/coordinator/enrollments/template', 1, {}),
+    ('coordinator', 'POST', '/api/coordinator/subjects', 8,
+     {'json': {'name': 'Budget', 'code': 'BUD101', 'teacher_id': FIRST_TEACHER_ID}}),
+    ('coordinator', 'POST', '/api/coordinator/subjects/{subject}/topics', 10, {'json': {'name': 'Extra'}}),
+    ('coordinator', 'POST', '/api/coordinator/subjects/{subject}/topics', 10,
+     {'json': {'topics': [{'name': 'Batch A'}, {'name': 'Batch B'}]}}),
+    ('coordinator', 'PATCH', '/api/coordinator/subjects/{subject}/topics', 8,
+     {'json': {'topics': [{'id': '{topic}', 'name': 'Renamed'}]}}),
+    ('coordinator', 'POST', '/api/coordinator/topics/{other_topic}/move', 10, {'json': {'before_id': '{topic}'}}),
+    ('coordinator', 'POST', '/api/coordinator/subjects/{subject}/enrollments', 10,
+     {'json': {'email': 'budget.student@example.com'}}),
+    ('coordinator', 'POST', '/api/coordinator/subjects/{subject}/enrollments/upload', 9,
+     {'data': {'file': (b'email\nbudget.student@example.com\nnobody@example.com\n', 'e.csv')}}),
+    ('coordinator', 'DELETE', '/api/coordinator/subjects/{subject}/enrollments/{student}', 7, {}),
+    ('coordinator', 'POST', '/api/coordinator/users', 5,
+     {'json': {'name': 'New Student', 'email': 'new.student@example.com'}}),
+    ('coordinator', 'POST', '/dashboard/coordinator/users/{student}/edit', 5, {'json': {'name': 'Renamed'}}),
+    ('coordinator', 'POST', '/api/batch', 9, {'json': {'operations': [
+        {'method': 'GET', 'path': '/api/coordinator/subjects/{subject}/topics'},
+        {'method': 'PATCH', 'path': '/api/coordinator/subjects/{subject}/topics',
+         'body': {'topics': [{'id': '{topic}', 'name': 'Batched'}]}},
+    ]}}),
+    ('coordinator', 'GET', '/api/changes', 2, {}),
+    # The seeded log has a subject, topic, enrollment and progress change: one row lookup each
+    ('coordinator', 'GET', '/api/changes?since=0', 7, {}),
+    ('coordinator', 'GET', '/api/health', 0, {}),
+    ('coordinator', 'PATCH', '/api/coordinator/topics/{topic}', 7, {'json': {'name': 'Patched'}}),
+    ('coordinator', 'POST', '/api/coordinator/subjects/{subject}/topics/reorder', 7,
+     {'json': {'order': [4, 3, 2, 1]}}),
+    ('coordinator', 'POST', '/dashboard/coordinator/users/create', 5,
+     {'json': {'name': 'Created', 'email': 'created@example.com', 'role': 'student'}}),
+    ('coordinator', 'DELETE', '/dashboard/coordinator/users/{student}/delete', 4, {}),
+    ('coordinator', 'POST', '/dashboard/coordinator/users/{former_student}/restore', 4, {}),
+    ('coordinator', 'DELETE', '/api/coordinator/topics/{topic}', 8, {}),
+]
+
+ROUTE_IDS = {
+    'subject': 1, 'topic': 1, 'other_topic': 2, 'open_topic': 3,
+    'student': FIRST_STUDENT_ID + 1, 'former_student': FORMER_STUDENT_ID,
+    'reset_token': URLSafeTimedSerializer(SECRET_KEY).dumps({'email': 'budget.student@example.com'},
+                                                             salt='password-reset'),
+}
+
+# Routes that still load rows one at a time; remove an entry once the
+# route is fixed, the test then starts failing as an unexpected success.
+KNOWN_N_PLUS_ONE = set()
+
+
+def _seed(subjects):
+    """Insert a department of ``subjects`` subjects, bypassing the ORM."""
+    students = max(3, subjects // 10)
+    db.session.execute(Department.__table__.insert(), [{'name': 'Computer Science', 'code': 'CSE'}])
+    users = [
+        {'name': 'Coordinator', 'email': 'coord@example.com', 'role': 'coordinator'},
+        {'name': 'Head', 'email': 'hod@example.com', 'role': 'hod', 'department': 'CSE'},
+    ]
+    users += [{'name': f'Teacher {i}', 'email': f't{i}@example.com', 'role': 'teacher', 'department': 'CSE'}
+              for i in range(TEACHERS)]
+    users += [{'name': f'Student {i}', 'email': f's{i}@example.com', 'role': 'student', 'department': 'CSE'}
+              for i in range(students)]
+    users.append({'name': 'Budget Student', 'email': 'budget.student@example.com', 'role': 'student'})
+    for row in users:
+        row.setdefault('department', None)
+        row.update(is_active=True, created_at=datetime(2024, 1, 1), password_hash=PASSWORD_HASH)
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(User.__table__.insert(), [{
+        'id': FORMER_STUDENT_ID, 'name': 'Former Student', 'email': 'former@example.com', 'role': 'student',
+        'department': 'CSE', 'is_active': False, 'created_at': datetime(2024, 1, 1), 'password_hash': PASSWORD_HASH,
+    }])
+    db.session.execute(Subject.__table__.insert(), [
+        {'name': f'Subject {i}', 'code': f'S{i:04d}', 'teacher_id': FIRST_TEACHER_ID + i % TEACHERS,
+         'semester': 1 + i % 8, 'is_active': True, 'created_at': datetime(2024, 1, 1)}
+        for i in range(subjects)
+    ])
+    start = date(2024, 1, 1)
+    db.session.execute(Topic.__table__.insert(), [
+        {'subject_id': s, 'name': f'Topic {s}.{j}', 'order': (j + 1) * ORDER_GAP, 'hours_allocated': 3,
+         'expected_date': start + timedelta(days=j * 7), 'is_completed': j < TOPICS_PER_SUBJECT // 2,
+         'completed_date': start + timedelta(days=j * 7) if j < TOPICS_PER_SUBJECT // 2 else None}
+        for s in range(1, subjects + 1) for j in range(TOPICS_PER_SUBJECT)
+    ])
+    db.session.execute(Enrollment.__table__.insert(), [
+        {'student_id': FIRST_STUDENT_ID + i, 'subject_id': s}
+        for i in range(students) for s in range(1, subjects + 1)
+    ])
+    db.session.execute(TopicProgress.__table__.insert(), [
+        {'student_id': FIRST_STUDENT_ID, 'topic_id': t, 'is_completed': True, 'completed_at': datetime(2024, 2, 1)}
+        for t in range(1, subjects * TOPICS_PER_SUBJECT + 1, 2)
+    ])
+    changes = [
+        {'entity': 'subject', 'entity_id': 1, 'subject_id': 1, 'student_id': None},
+        {'entity': 'topic', 'entity_id': 1, 'subject_id': 1, 'student_id': None},
+        {'entity': 'enrollment', 'entity_id': None, 'subject_id': 1, 'student_id': FIRST_STUDENT_ID},
+        {'entity': 'topic_progress', 'entity_id': 1, 'subject_id': 1, 'student_id': FIRST_STUDENT_ID},
+    ]
+    db.session.execute(ChangeLog.__table__.insert(), [
+        dict(row, id=i, deleted=False, changed_at=datetime(2024, 2, 1)) for i, row in enumerate(changes, start=1)
+    ])
+    db.session.execute(ChangeSequence.__table__.update().values(value=len(changes)))
+    rebuild_subject_counters()
+    db.session.commit()
+
+
+class _Site:
+    """One seeded app plus a test client per role.
+
+    The database is a file, seeded once and copied aside; ``reset()``
+    restores that copy and logs every role in again.
+    """
+
+    def __init__(self, subjects):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'budget.db')
+        self.seed_path = os.path.join(self.tmp.name, 'seed.db')
+
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + self.path
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = globals()['SECRET_KEY']
+            WTF_CSRF_ENABLED = False
+            DISABLE_RATE_LIMITS = True
+            DISABLE_REPORT_CACHE = True
+            SINGLE_FLIGHT_LOCK_DIR = self.tmp.name
+        self.app = create_app(TestConfig)
+        with self.app.app_context():
+            db.create_all()
+            _seed(subjects)
+            self.engine = db.engine
+            db.session.remove()
+        self.engine.dispose()
+        shutil.copyfile(self.path, self.seed_path)
+        self.clients = {}
+
+    def reset(self):
+        with self.app.app_context():
+            db.session.remove()
+        self.engine.dispose()
+        shutil.copyfile(self.seed_path, self.path)
+        user_ids = {'coordinator': COORDINATOR_ID, 'hod': HOD_ID,
+                    'teacher': FIRST_TEACHER_ID, 'student': FIRST_STUDENT_ID}
+        self.clients = {None: self.app.test_client()}
+        for role, user_id in user_ids.items():
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(user_id)
+                sess['_fresh'] = True
+            self.clients[role] = client
+
+    def close(self):
+        with self.app.app_context():
+            db.session.remove()
+        self.engine.dispose()
+        self.tmp.cleanup()
+
+    def count(self, role, method, url, **kwargs):
+        """Status and statements run for one request, streamed body included."""
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(self.engine, 'before_cursor_execute', listener)
+        try:
+            resp = self.clients[role].open(url, method=method, **kwargs)
+            resp.get_data()
+        finally:
+            event.remove(self.engine, 'before_cursor_execute', listener)
+        return resp.status_code, statements
+
+
+def _fill(value, ids):
+    if isinstance(value, str):
+        return int(value.format(**ids)) if value.startswith('{') else value.format(**ids)
+    if isinstance(value, dict):
+        return {k: _fill(v, ids) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, ids) for v in value]
+    if isinstance(value, tuple) and isinstance(value[0], bytes):
+        return (io.BytesIO(value[0]), value[1])
+    return value
+
+
+class TestQueryBudget(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sites = {n: _Site(n) for n in SCALES}
+
+    @classmethod
+    def tearDownClass(cls):
+        for site in cls.sites.values():
+            site.close()
+
+    def setUp(self):
+        for site in self.sites.values():
+            site.reset()
+
+    def test_every_route_has_a_budget(self):
+        app = self.sites[SCALES[0]].app
+        adapter = app.url_map.bind('localhost')
+        budgeted = set()
+        for _, method, path, _, _ in ROUTES:
+            endpoint, _ = adapter.match(path.format(**ROUTE_IDS).split('?', 1)[0], method)
+            budgeted.add((endpoint, method))
+        missing = [
+            f'{method} {rule.rule}'
+            for rule in app.url_map.iter_rules()
+            if rule.endpoint != 'static'
+            for method in sorted(rule.methods - {'HEAD', 'OPTIONS'})
+            if (rule.endpoint, method) not in budgeted
+        ]
+        self.assertEqual(missing, [], 'routes without a query budget in ROUTES')
+
+    def check_route(self, role, method, path, budget, kwargs):
+        url = path.format(**ROUTE_IDS)
+        counts = {}
+        for n, site in self.sites.items():
+            status, statements = site.count(role, method, url, **_fill(kwargs, ROUTE_IDS))
+            self.assertLess(status, 400, f'{method} {url} at {n} subjects returned {status}')
+            counts[n] = len(statements)
+        small, large = (counts[n] for n in SCALES)
+        self.assertEqual(small, large, f'{method} {url} runs more statements with more rows: {counts}')
+        self.assertLessEqual(large, budget, f'{method} {url} is over its budget of {budget}: {counts}')
+
+
+def _route_test(role, method, path, budget, kwargs):
+    def test(self):
+        self.check_route(role, method, path, budget, kwargs)
+    return test
+
+
+for _i, (_role, _method, _path, _budget, _kwargs) in enumerate(ROUTES):
+    _name = f'test_{_i:02d}_{_method.lower()}_' + (_path.strip('/').replace('/', '_').replace('{', '').replace('}', '')
+                                                 or 'index')
+    _test = _route_test(_role, _method, _path, _budget, _kwargs)
+    if (_method, _path) in KNOWN_N_PLUS_ONE:
+        _test = unittest.expectedFailure(_test)
+    setattr(TestQueryBudget, _name, _test)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import unittest
+from flask import Response, stream_with_context
+from app import create_app, db
+from app.models import Subject, User
+
+
+class TestQueryStats(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            QUERY_BUDGET = 20
+            QUERY_REPEAT_THRESHOLD = 5
+        self.app = create_app(TestConfig)
+
+        # N+1 on purpose: one lookup per subject
+        @self.app.route('/_test/n-plus-one/<int:count>')
+        def n_plus_one(count):
+            names = [User.query.get(s.teacher_id).name for s in Subject.query.limit(count).all()]
+            return {'names': names}
+
+        # Queries that run while the body is streamed, after the headers
+        @self.app.route('/_test/streamed/<int:count>')
+        def streamed(count):
+            def generate():
+                for s in Subject.query.limit(count).all():
+                    yield User.query.get(s.teacher_id).name + '\n'
+            return Response(stream_with_context(generate()))
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        teacher = User(name='Teacher', email='t@example.com', role='teacher')
+        db.session.add(teacher)
+        db.session.commit()
+        db.session.add_all([Subject(name=f'S{i}', code=f'C{i}', teacher_id=teacher.id) for i in range(30)])
+        db.session.commit()
+        # Identity-map hits would hide the repeated lookups
+        db.session.expunge_all()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def get(self, count):
+        db.session.expunge_all()
+        return self.client.get(f'/_test/n-plus-one/{count}')
+
+    def test_headers_report_count_and_time(self):
+        resp = self.get(3)
+        self.assertEqual(resp.headers['X-Query-Count'], '4')
+        self.assertTrue(resp.headers['Server-Timing'].startswith('db;dur='))
+        self.assertEqual(self.client.get('/api/health').headers['X-Query-Count'], '0')
+
+    def test_repeated_statement_warning(self):
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.get(8)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['event'], 'sql_queries')
+        self.assertEqual(record['endpoint'], 'n_plus_one')
+        self.assertEqual(record['problems'], ['repeated_statement'])
+        self.assertEqual(record['repeated'][0]['count'], 8)
+        self.assertTrue(record['repeated'][0]['statement'].startswith('SELECT user.id'))
+
+    def test_budget_warning(self):
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.get(25)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertIn('over_budget', record['problems'])
+        self.assertEqual(record['queries'], 26)
+
+    def test_streamed_body_is_counted(self):
+        db.session.expunge_all()
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            resp = self.client.get('/_test/streamed/8')
+            self.assertEqual(len(resp.get_data(as_text=True).splitlines()), 8)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['endpoint'], record['status']), ('streamed', 200))
+        self.assertEqual(record['queries'], 9)
+        self.assertEqual(record['repeated'][0]['count'], 8)
+
+    def test_quiet_within_limits(self):
+        with self.assertLogs(self.app.logger, 'DEBUG') as logs:
+            self.app.logger.debug('marker')
+            self.get(2)
+        self.assertFalse(any(r.levelname == 'WARNING' for r in logs.records))
+
+    def test_disabled(self):
+        class Off:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            QUERY_STATS_ENABLED = False
+        app = create_app(Off)
+        self.assertNotIn('X-Query-Count', app.test_client().get('/api/health').headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from flask import Flask
+from flask_login import LoginManager, UserMixin, login_user
+from app.services.cache_backend import MemoryBackend
+from app.services.ratelimit import gcra_allow, rate_limit
+
+
+class _User(UserMixin):
+    def __init__(self, id):
+        self.id = id
+
+
+class TestGCRA(unittest.TestCase):
+    def test_burst_then_sustained_rate(self):
+        b = MemoryBackend()
+        results = [gcra_allow(b, 'k', 5, 60, now=100.0)[0] for _ in range(6)]
+        self.assertEqual(results, [True] * 5 + [False])
+        allowed, retry_after = gcra_allow(b, 'k', 5, 60, now=100.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 12.0)
+        # One emission interval (60 / 5 s) later exactly one more request fits
+        self.assertTrue(gcra_allow(b, 'k', 5, 60, now=112.0)[0])
+        self.assertFalse(gcra_allow(b, 'k', 5, 60, now=112.0)[0])
+
+    def test_idle_key_expires(self):
+        b = MemoryBackend()
+        gcra_allow(b, 'k', 5, 0.05)
+        import time
+        time.sleep(0.1)
+        self.assertIsNone(b.get('k'))
+
+    def test_keys_are_bounded(self):
+        b = MemoryBackend(max_entries=100)
+        for i in range(1000):
+            gcra_allow(b, f'ip:{i}', 5, 60, now=100.0)
+        self.assertEqual(len(b), 100)
+
+
+class TestRateLimitDecorator(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.config.update(SECRET_KEY='test', TRUSTED_PROXY_COUNT=1)
+        login = LoginManager(app)
+        login.user_loader(lambda uid: _User(uid))
+
+        @app.route('/ip')
+        @rate_limit(limit=2, window_seconds=60)
+        def by_ip():
+            return 'ok'
+
+        @app.route('/user/<uid>')
+        @rate_limit(limit=2, window_seconds=60, per='user')
+        def by_user(uid):
+            login_user(_User(uid))
+            return 'ok'
+
+        self.app = app
+        self.client = app.test_client()
+
+    def statuses(self, path, n, **kw):
+        return [self.client.get(path, **kw).status_code for _ in range(n)]
+
+    def test_limits_per_forwarded_client(self):
+        a = {'X-Forwarded-For': '203.0.113.7'}
+        b = {'X-Forwarded-For': '203.0.113.8'}
+        self.assertEqual(self.statuses('/ip', 3, headers=a), [200, 200, 429])
+        self.assertEqual(self.statuses('/ip', 1, headers=b), [200])
+        resp = self.client.get('/ip', headers=a)
+        self.assertEqual(resp.headers.get('Retry-After'), '30')
+
+    def test_spoofed_forwarded_entries_are_ignored(self):
+        # The trusted proxy appends the real client; entries to its left are client supplied
+        for i in range(2):
+            self.client.get('/ip', headers={'X-Forwarded-For': f'1.1.1.{i}, 198.51.100.1'})
+        resp = self.client.get('/ip', headers={'X-Forwarded-For': '9.9.9.9, 198.51.100.1'})
+        self.assertEqual(resp.status_code, 429)
+
+    def test_invalid_header_falls_back_to_remote_addr(self):
+        headers = {'X-Forwarded-For': 'not-an-ip'}
+        self.assertEqual(self.statuses('/ip', 3, headers=headers), [200, 200, 429])
+        self.assertEqual(self.statuses('/ip', 1, environ_base={'REMOTE_ADDR': '192.0.2.50'}), [200])
+
+    def test_forwarded_header_is_ignored_by_default(self):
+        from config import Config
+        self.app.config['TRUSTED_PROXY_COUNT'] = Config.TRUSTED_PROXY_COUNT
+        rotated = [{'X-Forwarded-For': f'203.0.113.{i}'} for i in range(3)]
+        self.assertEqual([self.client.get('/ip', headers=h).status_code for h in rotated], [200, 200, 429])
+
+    def test_per_user_limit_follows_the_user(self):
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = '7'
+            sess['_fresh'] = True
+        ip1 = {'X-Forwarded-For': '203.0.113.1'}
+        ip2 = {'X-Forwarded-For': '203.0.113.2'}
+        self.assertEqual(self.statuses('/user/7', 2, headers=ip1), [200, 200])
+        self.assertEqual(self.statuses('/user/7', 1, headers=ip2), [429])
@@ -0,0 +1,242 @@
+import unittest
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models import ReportCache, Subject, Topic, User
+from app.services.report_cache import (
+    MISSING, cached_report, get_cached, invalidate_on_commit, invalidate_report, make_cache_key,
+    purge_expired, set_cached
+)
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            REPORT_CACHE_MAX_ENTRIES = 3
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_key_is_deterministic(self):
+        a = make_cache_key('dept', {'department': 'CSE', 'semester': 3})
+        b = make_cache_key('dept', {'semester': 3, 'department': 'CSE'})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, make_cache_key('dept', {'department': 'ECE', 'semester': 3}))
+        self.assertNotEqual(a, make_cache_key('other', {'department': 'CSE', 'semester': 3}))
+
+    def test_get_set_and_expiry(self):
+        self.assertIs(get_cached('dept', {'d': 1}), MISSING)
+        set_cached('dept', {'d': 1}, {'value': 42}, ttl=60)
+        self.assertEqual(get_cached('dept', {'d': 1}), {'value': 42})
+        set_cached('dept', {'d': 1}, None, ttl=60)
+        self.assertIsNone(get_cached('dept', {'d': 1}))
+        self.assertEqual(ReportCache.query.count(), 1)
+
+        ReportCache.query.update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+        db.session.commit()
+        self.assertIs(get_cached('dept', {'d': 1}), MISSING)
+        self.assertEqual(purge_expired(), 1)
+        self.assertEqual(ReportCache.query.count(), 0)
+
+    def test_size_bound_evicts_oldest(self):
+        for i in range(5):
+            set_cached('dept', {'d': i}, i, ttl=60)
+        self.assertEqual(ReportCache.query.count(), 3)
+        self.assertIs(get_cached('dept', {'d': 0}), MISSING)
+        self.assertEqual(get_cached('dept', {'d': 4}), 4)
+
+    def test_decorator_caches_and_invalidates(self):
+        calls = []
+
+        @cached_report('squares', ttl=60)
+        def square(n):
+            calls.append(n)
+            return {'n': n, 'square': n * n}
+
+        self.assertEqual(square(3), {'n': 3, 'square': 9})
+        self.assertEqual(square(3), {'n': 3, 'square': 9})
+        self.assertEqual(square(4)['square'], 16)
+        self.assertEqual(calls, [3, 4])
+
+        invalidate_report('squares')
+        square(3)
+        self.assertEqual(calls, [3, 4, 3])
+
+        self.app.config['DISABLE_REPORT_CACHE'] = True
+        square(3)
+        self.assertEqual(calls, [3, 4, 3, 3])
+
+    def test_invalidate_on_commit(self):
+        set_cached('dept', {'d': 1}, 1, ttl=60)
+        db.session.add(User(name='U', email='u@example.com', role='student'))
+        db.session.flush()
+        invalidate_on_commit('dept')
+        db.session.rollback()
+        db.session.commit()
+        self.assertEqual(get_cached('dept', {'d': 1}), 1)
+        invalidate_on_commit('dept')
+        self.assertEqual(get_cached('dept', {'d': 1}), 1)
+        db.session.commit()
+        self.assertIs(get_cached('dept', {'d': 1}), MISSING)
+
+    def test_writes_invalidate_dashboard_reports(self):
+        from app.services.analytics import coordinator_metrics, department_analytics
+        from app.services.topics import set_topics_covered
+        teacher = User(name='T', email='t@example.com', role='teacher', department='CSE')
+        db.session.add(teacher)
+        db.session.commit()
+        subject = Subject(name='Maths', code='M1', teacher_id=teacher.id)
+        db.session.add(subject)
+        db.session.commit()
+        topic = Topic(subject_id=subject.id, name='Limits', order=1)
+        db.session.add(topic)
+        db.session.commit()
+        self.assertEqual(department_analytics('CSE')['completed_topics'], 0)
+        self.assertEqual(coordinator_metrics()['unassigned_teachers'], 0)
+
+        set_topics_covered(teacher.id, [topic.id])
+        db.session.commit()
+        self.assertEqual(department_analytics('CSE')['completed_topics'], 1)
+
+        coordinator = User(name='C', email='c@example.com', role='coordinator')
+        db.session.add(coordinator)
+        db.session.commit()
+        with self.app.test_client() as client:
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(coordinator.id)
+                sess['_fresh'] = True
+            users = coordinator_metrics()['total_users']
+            resp = client.post('/api/coordinator/users', json={'name': 'S', 'email': 's@example.com'})
+            self.assertEqual(resp.status_code, 201)
+        self.assertEqual(coordinator_metrics()['total_users'], users + 1)
+
+    def test_unserializable_result_raises(self):
+        @cached_report('dates')
+        def today():
+            return datetime.utcnow()
+
+        with self.assertRaises(TypeError):
+            today()
+
+
+def _hold_lock(key, lock_dir, ready, release):
+    from app.services.singleflight import KeyLock
+    from flask import Flask
+    app = Flask(__name__)
+    app.config['SINGLE_FLIGHT_LOCK_DIR'] = lock_dir
+    with app.app_context():
+        lock = KeyLock(key)
+        lock.acquire()
+        ready.set()
+        release.wait(10)
+        lock.release()
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + self.tmp.name + '/cache.db'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            SINGLE_FLIGHT_LOCK_DIR = self.tmp.name
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def test_concurrent_misses_compute_once(self):
+        import threading, time
+        calls = []
+
+        @cached_report('slow', ttl=60)
+        def slow():
+            calls.append(1)
+            time.sleep(0.3)
+            return {'value': len(calls)}
+
+        results = []
+
+        def worker():
+            with self.app.app_context():
+                results.append(slow())
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 6)
+
+    def test_lock_is_shared_across_processes(self):
+        import multiprocessing
+        from app.services.singleflight import KeyLock
+        mp = multiprocessing.get_context('fork')
+        ready, release = mp.Event(), mp.Event()
+        child = mp.Process(target=_hold_lock, args=('report-x', self.tmp.name, ready, release))
+        child.start()
+        try:
+            self.assertTrue(ready.wait(10))
+            lock = KeyLock('report-x')
+            self.assertFalse(lock.acquire(timeout=0.2))
+            release.set()
+            child.join(10)
+            self.assertTrue(lock.acquire(timeout=5))
+            lock.release()
+        finally:
+            release.set()
+            child.join(10)
+
+    def test_stale_value_served_while_refreshing(self):
+        import time
+        calls = []
+
+        @cached_report('swr', ttl=60, stale_ttl=120)
+        def report():
+            calls.append(1)
+            return {'version': len(calls)}
+
+        self.assertEqual(report(), {'version': 1})
+        # Age the entry past its TTL but within the stale window
+        ReportCache.query.update({'generated_at': datetime.utcnow() - timedelta(seconds=90)})
+        db.session.commit()
+        self.assertEqual(report(), {'version': 1})
+        for _ in range(50):
+            if get_cached('swr', {'args': [], 'kwargs': {}}) == {'version': 2}:
+                break
+            time.sleep(0.05)
+        self.assertEqual(report(), {'version': 2})
+        self.assertEqual(len(calls), 2)
+
+    def test_refresh_skips_an_entry_already_refreshed(self):
+        from app.services.report_cache import _refresh_in_background
+        from app.services.singleflight import KeyLock
+        calls = []
+        # A caller read the stale entry, but another refreshed it before the lock
+        set_cached('swr', {}, {'version': 2}, ttl=180)
+        lock = KeyLock(make_cache_key('swr', {}))
+        self.assertTrue(lock.acquire(timeout=0))
+        thread = _refresh_in_background(self.app, lock, 'swr', {}, lambda: calls.append(1), (), {}, 60, 180)
+        thread.join(5)
+        self.assertEqual(calls, [])
+        self.assertEqual(get_cached('swr', {}), {'version': 2})
+        self.assertTrue(lock.acquire(timeout=0))
+        lock.release()
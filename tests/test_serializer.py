@@ -0,0 +1,82 @@
+import json
+import unittest
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from flask import jsonify
+from app import create_app, db
+from app.services.serializer import ENCODERS, create_encoder, row_dicts, stream_json
+
+Row = namedtuple('Row', 'id when')
+
+PAYLOAD = {
+    'when': datetime(2025, 1, 31, 12, 0, 5, 123),
+    'day': date(2025, 2, 1),
+    'amount': Decimal('1.50'),
+    'row': Row(1, date(2025, 3, 1)),
+    'by_id': {7: 'seven'},
+    'text': 'naïve',
+}
+EXPECTED = {
+    'when': '2025-01-31T12:00:05.000123',
+    'day': '2025-02-01',
+    'amount': '1.50',
+    'row': [1, '2025-03-01'],
+    'by_id': {'7': 'seven'},
+    'text': 'naïve',
+}
+
+
+class TestSerializer(unittest.TestCase):
+    def make_app(self, encoder='auto'):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            JSON_ENCODER = encoder
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+        return app
+
+    def encoders(self):
+        for name in ENCODERS:
+            try:
+                yield create_encoder(name)
+            except ImportError:
+                continue
+
+    def test_encoders_agree_on_native_types(self):
+        for encoder in self.encoders():
+            with self.subTest(encoder=encoder.name):
+                self.assertEqual(json.loads(encoder.dumps(PAYLOAD)), EXPECTED)
+                self.assertEqual(encoder.loads(encoder.dumps(EXPECTED)), EXPECTED)
+
+    def test_unknown_encoder(self):
+        with self.assertRaises(ValueError):
+            create_encoder('yaml')
+
+    def test_jsonify_uses_configured_encoder(self):
+        app = self.make_app('stdlib')
+        self.assertEqual(app.json.encoder.name, 'stdlib')
+        with app.test_request_context():
+            resp = jsonify(PAYLOAD)
+        self.assertEqual(resp.mimetype, 'application/json')
+        self.assertEqual(json.loads(resp.get_data()), EXPECTED)
+
+    def test_stream_json(self):
+        items = row_dicts([(i, date(2025, 1, 1 + i % 28)) for i in range(25)], Row._fields)
+        cases = [({'next_cursor': None, 'total': 25}, items), (None, items), ({'total': 0}, [])]
+        for encoder in self.encoders():
+            app = self.make_app(encoder.name)
+            for payload, rows in cases:
+                with self.subTest(encoder=encoder.name, payload=payload, rows=len(rows)):
+                    with app.test_request_context():
+                        resp = stream_json('rows', iter(rows), payload, batch_size=10)
+                        body = json.loads(resp.get_data())
+                    self.assertEqual(body, {'rows': json.loads(json.dumps(rows, default=str)), **(payload or {})})
+
+
+if __name__ == '__main__':
+    unittest.main()
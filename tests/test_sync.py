@@ -0,0 +1,234 @@
+import io
+import unittest
+from datetime import datetime, timedelta
+from flask import g
+from sqlalchemy import event
+from app import create_app, db
+from app.models import ChangeLog, Enrollment, Subject, Topic, TopicProgress, User
+
+
+class TestDeltaSync(unittest.TestCase):
+    def setUp(self):
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.coordinator = User(name='Coord', email='coord@example.com', role='coordinator')
+        self.teacher = User(name='Teacher', email='t@example.com', role='teacher')
+        self.other_teacher = User(name='Other', email='o@example.com', role='teacher')
+        self.student = User(name='Student', email='s@example.com', role='student')
+        self.classmate = User(name='Classmate', email='c@example.com', role='student')
+        db.session.add_all([self.coordinator, self.teacher, self.other_teacher, self.student, self.classmate])
+        db.session.commit()
+        self.subject = Subject(name='Maths', code='M1', teacher_id=self.teacher.id)
+        self.other = Subject(name='Physics', code='P1', teacher_id=self.other_teacher.id)
+        db.session.add_all([self.subject, self.other])
+        db.session.commit()
+        self.subject_id, self.other_id = self.subject.id, self.other.id
+        self.client = self.app.test_client()
+        self.login(self.coordinator)
+        self.start = self.head()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login(self, user):
+        # Requests share the pushed app context, where Flask-Login caches the user
+        g.pop('_login_user', None)
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+
+    def head(self):
+        data = self.client.get('/api/changes').get_json()
+        self.assertEqual(data['changes'], [])
+        return data['next_cursor']
+
+    def sync(self, since, query=''):
+        changes = []
+        while True:
+            resp = self.client.get(f'/api/changes?since={since}{query}')
+            self.assertEqual(resp.status_code, 200, resp.get_data(as_text=True))
+            data = resp.get_json()
+            changes.extend(data['changes'])
+            since = data['next_cursor']
+            if not data['has_more']:
+                return changes, since
+
+    def keys(self, changes):
+        return [(c['entity'], c.get('id', (c.get('subject_id'), c.get('student_id'))), c['deleted'])
+                for c in changes]
+
+    def test_upserts_and_tombstones(self):
+        topic = Topic(subject_id=self.subject_id, name='Limits', order=10)
+        db.session.add(topic)
+        db.session.commit()
+        topic_id = topic.id
+        topic.name = 'Limits and continuity'
+        db.session.commit()
+        changes, cursor = self.sync(self.start)
+        # The insert and the rename collapse into one change with current values
+        self.assertEqual(self.keys(changes), [('topic', topic_id, False)])
+        self.assertEqual(changes[0]['data']['name'], 'Limits and continuity')
+        self.assertEqual(changes[0]['data']['subject_id'], self.subject_id)
+
+        db.session.delete(topic)
+        db.session.add(Enrollment(subject_id=self.subject_id, student_id=self.student.id))
+        db.session.commit()
+        changes, cursor = self.sync(cursor)
+        self.assertEqual(self.keys(changes), [('topic', topic_id, True),
+                                              ('enrollment', (self.subject_id, self.student.id), False)])
+        self.assertIsNone(changes[0]['data'])
+        self.assertEqual(self.sync(cursor), ([], cursor))
+
+    def test_unchanged_and_rolled_back_rows_are_not_logged(self):
+        subject = db.session.get(Subject, self.subject_id)
+        subject.name = subject.name
+        db.session.commit()
+        subject.name = 'Discarded'
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(self.sync(self.start)[0], [])
+
+    def test_core_statement_writes_are_logged(self):
+        base = f'/api/coordinator/subjects/{self.subject_id}'
+        created = self.client.post(f'{base}/topics', json={'topics': [{'name': 'A'}, {'name': 'B'}]}).get_json()
+        ids = [t['id'] for t in created['topics']]
+        changes, cursor = self.sync(self.start)
+        self.assertEqual(self.keys(changes), [('topic', i, False) for i in ids])
+
+        self.client.post(f'/api/coordinator/topics/{ids[1]}/move', json={'before_id': ids[0]})
+        self.client.patch(f'{base}/topics', json={'topics': [{'id': ids[0], 'name': 'A2'}]})
+        csv = io.BytesIO(b'email\ns@example.com\n')
+        self.client.post(f'{base}/enrollments/upload', data={'file': (csv, 'roster.csv')})
+        changes, _ = self.sync(cursor)
+        self.assertEqual(self.keys(changes), [('topic', ids[1], False), ('topic', ids[0], False),
+                                              ('enrollment', (self.subject_id, self.student.id), False)])
+        self.assertEqual(changes[1]['data']['name'], 'A2')
+
+    def test_pages_follow_the_sequence(self):
+        for i in range(7):
+            db.session.add(Topic(subject_id=self.subject_id, name=f'T{i}', order=i + 1))
+            db.session.commit()
+        pages, since = [], self.start
+        while True:
+            data = self.client.get(f'/api/changes?since={since}&limit=3').get_json()
+            pages.append(len(data['changes']))
+            since = data['next_cursor']
+            if not data['has_more']:
+                break
+        self.assertEqual(pages, [3, 3, 1])
+        changes, _ = self.sync(self.start, '&entities=subject')
+        self.assertEqual(changes, [])
+
+    def test_changes_are_scoped_to_the_caller(self):
+        db.session.add_all([
+            Topic(subject_id=self.subject_id, name='Maths topic', order=1),
+            Topic(subject_id=self.other_id, name='Physics topic', order=1),
+            Enrollment(subject_id=self.subject_id, student_id=self.student.id),
+            Enrollment(subject_id=self.subject_id, student_id=self.classmate.id),
+        ])
+        db.session.commit()
+        topic_id = Topic.query.filter_by(subject_id=self.subject_id).one().id
+        db.session.add(TopicProgress(topic_id=topic_id, student_id=self.classmate.id, is_completed=True))
+        db.session.commit()
+
+        self.login(self.teacher)
+        names = {c['data'].get('name') for c in self.sync(self.start)[0] if c['entity'] == 'topic'}
+        self.assertEqual(names, {'Maths topic'})
+
+        self.login(self.student)
+        changes, cursor = self.sync(self.start)
+        self.assertEqual(self.keys(changes), [('topic', topic_id, False),
+                                              ('enrollment', (self.subject_id, self.student.id), False)])
+        # Dropping the student still reaches them as a tombstone
+        db.session.delete(Enrollment.query.filter_by(student_id=self.student.id).one())
+        db.session.commit()
+        changes, _ = self.sync(cursor)
+        self.assertEqual(self.keys(changes), [('enrollment', (self.subject_id, self.student.id), True)])
+
+    def test_cost_follows_changes_not_data(self):
+        db.session.add_all(Topic(subject_id=self.other_id, name=f'Old {i}', order=i) for i in range(300))
+        db.session.commit()
+        cursor = self.head()
+        db.session.add(Topic(subject_id=self.subject_id, name='New', order=1))
+        db.session.commit()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            changes, _ = self.sync(cursor)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual([c['data']['name'] for c in changes], ['New'])
+        # The user, the oldest retained id, the log page and the changed topics
+        self.assertLessEqual(len(statements), 4)
+
+    def age_log(self, rows):
+        for change in rows:
+            change.changed_at = datetime.utcnow() - timedelta(days=40)
+        db.session.commit()
+
+    def test_expired_cursor(self):
+        db.session.add(Topic(subject_id=self.subject_id, name='Old', order=1))
+        db.session.commit()
+        db.session.add(Topic(subject_id=self.subject_id, name='New', order=2))
+        db.session.commit()
+        log = ChangeLog.query.order_by(ChangeLog.id).all()
+        self.age_log(log[:-1])
+        from app.services.sync import prune_change_log
+        self.assertEqual(prune_change_log(30), len(log) - 1)
+        db.session.commit()
+        self.assertEqual(self.client.get(f'/api/changes?since={self.start}').status_code, 410)
+        self.assertEqual(self.client.get('/api/changes?since=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/changes?since=0&entities=grades').status_code, 400)
+        changes, _ = self.sync(log[-1].id - 1)
+        self.assertEqual([c['data']['name'] for c in changes], ['New'])
+
+    def test_sequence_is_taken_at_commit(self):
+        topic = Topic(subject_id=self.subject_id, name='Pending', order=1)
+        db.session.add(topic)
+        db.session.flush()
+        from app.services.sync import record_changes
+        record_changes('topic', [{'entity_id': topic.id, 'subject_id': self.subject_id}])
+        # Nothing is numbered or visible until the transaction commits
+        self.assertEqual(ChangeLog.query.filter(ChangeLog.id > int(self.start)).count(), 0)
+        db.session.commit()
+        ids = [c.id for c in ChangeLog.query.filter(ChangeLog.id > int(self.start)).order_by(ChangeLog.id)]
+        self.assertEqual(ids, [int(self.start) + 1, int(self.start) + 2])
+        self.assertEqual(self.head(), str(int(self.start) + 2))
+
+        db.session.add(Topic(subject_id=self.subject_id, name='Discarded', order=2))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(self.head(), str(int(self.start) + 2))
+
+    def test_sequence_survives_pruning_the_whole_log(self):
+        db.session.add(Topic(subject_id=self.subject_id, name='Old', order=1))
+        db.session.commit()
+        head = self.head()
+        from app.services.sync import prune_change_log
+        self.age_log(ChangeLog.query.all())
+        prune_change_log(30)
+        db.session.commit()
+        self.assertEqual(ChangeLog.query.count(), 0)
+        # The empty log still knows the sequence: old cursors expire, the head stays put
+        self.assertEqual(self.head(), head)
+        self.assertEqual(self.client.get(f'/api/changes?since={self.start}').status_code, 410)
+        self.assertEqual(self.sync(head), ([], head))
+        db.session.add(Topic(subject_id=self.subject_id, name='New', order=2))
+        db.session.commit()
+        changes, cursor = self.sync(head)
+        self.assertEqual([c['data']['name'] for c in changes], ['New'])
+        self.assertEqual(int(cursor), int(head) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,336 @@
+import tempfile
+import threading
+import unittest
+from datetime import date
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Subject, Topic, User
+from app.services.topics import ORDER_GAP, wait_for_renumbering
+
+
+class TopicTestCase(unittest.TestCase):
+    # Threaded tests need a database file every connection can see
+    file_db = False
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        uri = 'sqlite:///' + self.tmp.name + '/topics.db' if self.file_db else 'sqlite:///:memory:'
+
+        class TestConfig:
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = uri
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SECRET_KEY = 'test'
+            SINGLE_FLIGHT_LOCK_DIR = self.tmp.name
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.teacher = User(name='Teacher', email='t@example.com', role='teacher')
+        self.other = User(name='Other', email='o@example.com', role='teacher')
+        self.coordinator = User(name='Coord', email='c@example.com', role='coordinator')
+        db.session.add_all([self.teacher, self.other, self.coordinator])
+        db.session.commit()
+        self.subject = Subject(name='DS', code='CS101', teacher_id=self.teacher.id)
+        self.foreign_subject = Subject(name='OS', code='CS202', teacher_id=self.other.id)
+        db.session.add_all([self.subject, self.foreign_subject])
+        db.session.commit()
+        self.topics = [Topic(subject_id=self.subject.id, name=f'T{i}', order=i + 1, hours_allocated=2)
+                       for i in range(30)]
+        self.foreign_topic = Topic(subject_id=self.foreign_subject.id, name='F', order=1)
+        db.session.add_all(self.topics + [self.foreign_topic])
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        wait_for_renumbering()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.tmp.cleanup()
+
+    def login(self, user):
+        with self.client.session_transaction() as sess:
+            sess['_user_id'] = str(user.id)
+            sess['_fresh'] = True
+
+
+class TestBulkCover(TopicTestCase):
+    def cover(self, **payload):
+        return self.client.post('/dashboard/teacher/topics/cover', json=payload)
+
+    def test_covers_in_one_update_and_reports_progress(self):
+        self.login(self.teacher)
+        ids = [t.id for t in self.topics[:15]]
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            resp = self.cover(topic_ids=ids, completed_date='2026-03-01', completion_notes='exam week')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual(data['updated'], 15)
+        self.assertEqual(data['subjects'][str(self.subject.id)], {'completed': 15, 'total': 30, 'percent': 50.0})
+        self.assertEqual(sum(1 for s in statements if s.lstrip().upper().startswith('UPDATE TOPIC')), 1)
+        topic = db.session.get(Topic, ids[0])
+        self.assertTrue(topic.is_completed)
+        self.assertEqual(topic.completed_date, date(2026, 3, 1))
+        self.assertEqual(topic.completion_notes, 'exam week')
+        subject = db.session.get(Subject, self.subject.id)
+        self.assertEqual((subject.completed_topic_count, subject.completed_hours), (15, 30))
+
+    def test_idempotent_and_keeps_first_completed_date(self):
+        self.login(self.teacher)
+        ids = [t.id for t in self.topics[:3]]
+        self.cover(topic_ids=ids, completed_date='2026-03-01')
+        resp = self.cover(topic_ids=ids)
+        self.assertEqual(resp.get_json()['subjects'][str(self.subject.id)]['completed'], 3)
+        self.assertEqual(db.session.get(Topic, ids[0]).completed_date, date(2026, 3, 1))
+
+    def test_uncover(self):
+        self.login(self.teacher)
+        ids = [t.id for t in self.topics[:4]]
+        self.cover(topic_ids=ids)
+        resp = self.cover(topic_ids=ids[:2], covered=False)
+        self.assertEqual(resp.get_json()['subjects'][str(self.subject.id)]['completed'], 2)
+        topic = db.session.get(Topic, ids[0])
+        self.assertFalse(topic.is_completed)
+        self.assertIsNone(topic.completed_date)
+
+    def test_rejects_whole_request_on_foreign_or_unknown_topic(self):
+        self.login(self.teacher)
+        resp = self.cover(topic_ids=[self.topics[0].id, self.foreign_topic.id])
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(resp.get_json()['topic_ids'], [self.foreign_topic.id])
+        resp = self.cover(topic_ids=[self.topics[0].id, 999999])
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(Topic.query.filter_by(is_completed=True).count(), 0)
+
+    def test_validation(self):
+        self.login(self.teacher)
+        self.assertEqual(self.cover(topic_ids=[]).status_code, 400)
+        self.assertEqual(self.cover(topic_ids=['x']).status_code, 400)
+        self.assertEqual(self.cover(topic_ids=[self.topics[0].id], completed_date='03/01/2026').status_code, 400)
+        # "false" is not false: only JSON booleans are accepted
+        self.assertEqual(self.cover(topic_ids=[self.topics[0].id], covered='false').status_code, 400)
+        self.assertEqual(self.cover(topic_ids=[self.topics[0].id], completion_notes=['x']).status_code, 400)
+        self.assertEqual(Topic.query.filter_by(is_completed=True).count(), 0)
+
+
+class TestTopicBatchApi(TopicTestCase):
+    def url(self, subject=None):
+        return f'/api/coordinator/subjects/{(subject or self.subject).id}/topics'
+
+    def test_batch_create_in_one_insert(self):
+        self.login(self.coordinator)
+        items = [{'name': f'New {i}', 'expected_date': '2026-04-01', 'hours_allocated': 3,
+                  'prerequisites': [self.topics[0].id]} for i in range(60)]
+        statements = []
+        listener = lambda conn, cursor, stmt, params, context, executemany: statements.append((stmt, executemany))
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            resp = self.client.post(self.url(), json={'topics': items})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(resp.status_code, 201, resp.get_json())
+        created = resp.get_json()['topics']
+        self.assertEqual([t['order'] for t in created], [30 + i * ORDER_GAP for i in range(1, 61)])
+        self.assertEqual(created[0]['expected_date'], '2026-04-01')
+        self.assertEqual(created[0]['prerequisites'], [self.topics[0].id])
+        inserts = [s for s in statements if s[0].lstrip().upper().startswith('INSERT INTO TOPIC')]
+        self.assertEqual(len(inserts), 1)
+        self.assertTrue(inserts[0][1])
+        self.assertEqual(db.session.get(Subject, self.subject.id).topic_count, 90)
+
+    def test_batch_create_reports_every_invalid_item(self):
+        self.login(self.coordinator)
+        items = [
+            {'name': 'ok'},
+            {'name': ''},
+            {'name': 'bad date', 'expected_date': '01-04-2026'},
+            {'name': 'bad hours', 'hours_allocated': -1},
+            {'name': 'foreign prereq', 'prerequisites': [self.foreign_topic.id]},
+        ]
+        resp = self.client.post(self.url(), json={'topics': items})
+        self.assertEqual(resp.status_code, 400)
+        errors = resp.get_json()['errors']
+        self.assertEqual([(e['index'], e['field']) for e in errors],
+                         [(1, 'name'), (2, 'expected_date'), (3, 'hours_allocated'), (4, 'prerequisites')])
+        self.assertEqual(Topic.query.filter_by(subject_id=self.subject.id).count(), 30)
+
+    def test_order_lock_is_held_until_commit(self):
+        from app.services.topics import _order_lock, create_topics
+        create_topics(self.subject.id, [{'name': 'Pending'}])
+        probe = _order_lock(self.subject.id)
+        self.assertFalse(probe.acquire(timeout=0))
+        db.session.commit()
+        self.assertTrue(probe.acquire(timeout=0))
+        probe.release()
+
+    def test_single_create_still_works(self):
+        self.login(self.coordinator)
+        resp = self.client.post(self.url(), json={'name': 'Solo'})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.get_json()['order'], 30 + ORDER_GAP)
+
+    def test_bulk_patch(self):
+        self.login(self.coordinator)
+        t0, t1, t2 = self.topics[:3]
+        db.session.get(Topic, t0.id).is_completed = True
+        db.session.commit()
+        items = [
+            {'id': t0.id, 'hours_allocated': 5},
+            {'id': t1.id, 'name': 'Renamed', 'expected_date': '2026-05-01'},
+            {'id': t2.id, 'name': 'Also renamed', 'expected_date': None, 'prerequisites': [t1.id]},
+        ]
+        resp = self.client.patch(self.url(), json={'topics': items})
+        self.assertEqual(resp.status_code, 200, resp.get_json())
+        by_id = {t['id']: t for t in resp.get_json()['topics']}
+        self.assertEqual(by_id[t0.id]['hours_allocated'], 5)
+        self.assertEqual(by_id[t1.id]['name'], 'Renamed')
+        self.assertEqual(by_id[t2.id]['prerequisites'], [t1.id])
+        self.assertEqual(db.session.get(Subject, self.subject.id).completed_hours, 5)
+
+    def test_bulk_patch_rejects_foreign_and_duplicate_ids(self):
+        self.login(self.coordinator)
+        items = [
+            {'id': self.topics[0].id, 'name': 'x'},
+            {'id': self.foreign_topic.id, 'name': 'y'},
+            {'id': self.topics[0].id, 'name': 'z'},
+            {'name': 'no id'},
+        ]
+        resp = self.client.patch(self.url(), json={'topics': items})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual([(e['index'], e['field']) for e in resp.get_json()['errors']],
+                         [(1, 'id'), (2, 'id'), (3, 'id')])
+        self.assertEqual(db.session.get(Topic, self.topics[0].id).name, 'T0')
+
+
+class TestTopicMoves(TopicTestCase):
+    file_db = True
+
+    def move(self, topic, client=None, **anchors):
+        return (client or self.client).post(f'/api/coordinator/topics/{topic.id}/move', json=anchors)
+
+    def order(self):
+        db.session.expire_all()
+        return [t.id for t in Topic.query.filter_by(subject_id=self.subject.id)
+                .order_by(Topic.order.asc(), Topic.id.asc())]
+
+    def test_move_writes_one_row(self):
+        self.login(self.coordinator)
+        db.session.execute(Topic.__table__.update().values(order=Topic.__table__.c.id * ORDER_GAP))
+        db.session.commit()
+        t = self.topics
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            resp = self.move(t[10], after_id=t[2].id, before_id=t[3].id)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(resp.status_code, 200, resp.get_json())
+        updates = [s for s in statements if s.lstrip().upper().startswith('UPDATE TOPIC')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self.order()[:5], [t[0].id, t[1].id, t[2].id, t[10].id, t[3].id])
+
+    def test_move_to_ends(self):
+        self.login(self.coordinator)
+        t = self.topics
+        self.move(t[5], after_id=None)
+        self.move(t[6], before_id=t[5].id)
+        self.move(t[0], after_id=t[29].id)
+        order = self.order()
+        self.assertEqual(order[:2], [t[6].id, t[5].id])
+        self.assertEqual(order[-1], t[0].id)
+
+    def test_gap_exhaustion_renumbers(self):
+        self.login(self.coordinator)
+        t = self.topics
+        moved = t[1:25]
+        for topic in moved:
+            resp = self.move(topic, after_id=t[0].id)
+            self.assertEqual(resp.status_code, 200)
+        wait_for_renumbering()
+        order = self.order()
+        self.assertEqual(order[:25], [t[0].id] + [x.id for x in reversed(moved)])
+        keys = [k for (k,) in db.session.query(Topic.order).filter_by(subject_id=self.subject.id)]
+        self.assertEqual(len(keys), len(set(keys)))
+
+    def test_invalid_anchor(self):
+        self.login(self.coordinator)
+        self.assertEqual(self.move(self.topics[0], after_id=self.foreign_topic.id).status_code, 400)
+        self.assertEqual(self.move(self.topics[0], after_id=self.topics[0].id).status_code, 400)
+        self.assertEqual(self.client.post('/api/coordinator/topics/999999/move', json={}).status_code, 404)
+
+    def test_parallel_moves_are_not_lost(self):
+        t = self.topics
+        coordinator_id = self.coordinator.id
+        errors = []
+
+        def worker(i):
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(coordinator_id)
+                sess['_fresh'] = True
+            mover, home, away = t[20 + i].id, t[2 * i].id, t[2 * i + 1].id
+            for _ in range(5):
+                for anchor in (away, home):
+                    resp = client.post(f'/api/coordinator/topics/{mover}/move', json={'after_id': anchor})
+                    if resp.status_code != 200:
+                        errors.append(resp.get_data(as_text=True))
+
+        ids = {x: x.id for x in t}
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(10)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        wait_for_renumbering()
+        self.assertEqual(errors, [])
+        order = self.order()
+        for i in range(10):
+            home_pos = order.index(ids[t[2 * i]])
+            self.assertEqual(order[home_pos + 1], ids[t[20 + i]], f'move of topic {20 + i} was lost')
+        keys = [k for (k,) in db.session.query(Topic.order).filter_by(subject_id=self.subject.id)]
+        self.assertEqual(len(keys), len(set(keys)))
+
+
+class TestConcurrentAppends(TopicTestCase):
+    file_db = True
+
+    def test_parallel_appends_get_their_own_topics(self):
+        coordinator_id = self.coordinator.id
+        url = f'/api/coordinator/subjects/{self.subject.id}/topics'
+        created, errors = {}, []
+
+        def worker(i):
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['_user_id'] = str(coordinator_id)
+                sess['_fresh'] = True
+            body = {'topics': [{'name': f'W{i}-{j}'} for j in range(3)]} if i % 2 else {'name': f'W{i}-0'}
+            resp = client.post(url, json=body)
+            if resp.status_code != 201:
+                errors.append(resp.get_data(as_text=True))
+                return
+            data = resp.get_json()
+            created[i] = [t['name'] for t in data.get('topics', [data])]
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(errors, [])
+        for i, names in created.items():
+            self.assertEqual(names, [f'W{i}-{j}' for j in range(3 if i % 2 else 1)])
+        keys = [k for (k,) in db.session.query(Topic.order).filter_by(subject_id=self.subject.id)]
+        self.assertEqual(len(keys), 30 + 4 * 3 + 4)
+        self.assertEqual(len(keys), len(set(keys)))
+
+
+if __name__ == '__main__':
+    unittest.main()